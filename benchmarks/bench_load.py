@@ -0,0 +1,539 @@
+"""
+End-to-end load benchmark of API endpoints.
+
+Temporary SQLite database is seeded with given number of resources, users and
+bookings (and slots of first days) by src.database.seeding, then every scenario below is run through
+Flask test client (in-process, sequential requests) and through real HTTP
+server with multi-threaded HTTP client. Scenarios cover every endpoint, rows
+updated, deleted or confirmed by write scenarios are inserted before the run,
+so every write request succeeds. Latency percentiles (p50/p95/p99) and
+throughput of every scenario are written to JSON file, which can be compared
+with result of other commit (--compare option).
+
+Usage (from main repository directory):
+    python -m benchmarks.bench_load [--resources 1000] [--users 10000]
+        [--bookings 100000] [--slot-days 2] [--requests 200] [--threads 8]
+        [--seed 0] [--output bench_load.json] [--compare previous.json]
+
+Production scale volumes:
+    python -m benchmarks.bench_load --resources 10000 --users 1000000
+        --bookings 10000000
+"""
+import argparse
+import http.client
+import itertools
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+from flask import json
+from sqlalchemy import func, select
+from werkzeug.serving import make_server
+
+from bookings_api import app
+from src.database.models import db, Bookings, Holds, Resources, Users
+from src.database.seeding import SEED_START, seed_database
+
+START = SEED_START
+SLOTS_START = SEED_START.date()
+# bookings and holds of write scenarios start here, after all seeded bookings,
+# every scenario uses its own year
+POST_START = datetime(2030, 1, 1, 8, 0)
+PUT_START = datetime(2031, 1, 1, 8, 0)
+MOVED_START = datetime(2032, 1, 1, 8, 0)
+DELETE_START = datetime(2033, 1, 1, 8, 0)
+HOLDS_START = datetime(2034, 1, 1, 8, 0)
+RELEASE_START = datetime(2035, 1, 1, 8, 0)
+CONFIRM_START = datetime(2036, 1, 1, 8, 0)
+BATCH_START = datetime(2037, 1, 1, 8, 0)
+BATCH_SIZE = 10
+PERCENTILES = (50, 95, 99)
+
+
+def period(start, number, resources_num):
+    """ Get number-th 30 minutes long period of write scenario, consecutive
+        periods are spread over all resources.
+
+    Args:
+        start (datetime): beginning of the first period
+        number (int): period number
+        resources_num (int): number of resources
+
+    Returns:
+        period (tuple): (resource ID, beginning, end) tuple
+    """
+    period_from = start + timedelta(hours=number // resources_num)
+    return (
+        number % resources_num + 1,
+        period_from,
+        period_from + timedelta(minutes=30),
+    )
+
+
+def insert_rows(connection, table, rows):
+    """ Insert rows with single executemany.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+        table (sqlalchemy.Table): table
+        rows (list): list of rows dictionaries
+
+    Returns:
+        ids (list): IDs of inserted rows, in order of rows
+    """
+    first_id = connection.execute(select([func.max(table.c.id)])).scalar() or 0
+    connection.execute(table.insert(), rows)
+    return list(range(first_id + 1, first_id + 1 + len(rows)))
+
+
+def prepare_write_data(engine, args):
+    """ Insert rows consumed by write scenarios: updated, deleted and
+        confirmed ones. Every scenario is run by both clients, so each of
+        them gets 2 * requests rows.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+        args (argparse.Namespace): benchmark arguments
+
+    Returns:
+        pools (dict): lists of IDs of inserted rows, by scenario name
+    """
+    count = 2 * args.requests
+    now = datetime.now()
+    expires_at = now + timedelta(days=1)
+
+    def bookings(start):
+        return [
+            dict(
+                resource_id=resource_id,
+                user_id=number % args.users + 1,
+                booked_from=booked_from,
+                booked_to=booked_to,
+            )
+            for number in range(count)
+            for resource_id, booked_from, booked_to in [
+                period(start, number, args.resources)
+            ]
+        ]
+
+    def holds(start):
+        return [
+            dict(
+                resource_id=row["resource_id"],
+                user_id=row["user_id"],
+                held_from=row["booked_from"],
+                held_to=row["booked_to"],
+                expires_at=expires_at,
+            )
+            for row in bookings(start)
+        ]
+
+    with engine.begin() as connection:
+        return {
+            "delete_resource": insert_rows(
+                connection,
+                Resources.__table__,
+                [
+                    dict(
+                        title=f"Deleted resource {number}",
+                        created_at=now,
+                        updated_at=now,
+                        active=True,
+                        intervals="30",
+                    )
+                    for number in range(count)
+                ],
+            ),
+            "delete_user": insert_rows(
+                connection,
+                Users.__table__,
+                [
+                    dict(
+                        created_at=now,
+                        updated_at=now,
+                        name=f"Deleted user {number}",
+                        email=f"deleted{number}@example.com",
+                    )
+                    for number in range(count)
+                ],
+            ),
+            "put_booking": insert_rows(
+                connection, Bookings.__table__, bookings(PUT_START)
+            ),
+            "delete_booking": insert_rows(
+                connection, Bookings.__table__, bookings(DELETE_START)
+            ),
+            "release_hold": insert_rows(
+                connection, Holds.__table__, holds(RELEASE_START)
+            ),
+            "confirm_hold": insert_rows(
+                connection, Holds.__table__, holds(CONFIRM_START)
+            ),
+        }
+
+
+def scenarios(args, pools):
+    """ Create scenarios of the benchmark.
+
+    Args:
+        args (argparse.Namespace): benchmark arguments
+        pools (dict): IDs of rows consumed by write scenarios, returned by
+                      prepare_write_data
+
+    Returns:
+        scenarios (list): list of (name, request factory) tuples, request
+                          factory creates (method, URL, JSON body) tuple
+                          with given random number generator
+    """
+    post_numbers = itertools.count()
+    hold_numbers = itertools.count()
+    batch_numbers = itertools.count()
+    put_bookings = enumerate(pools["put_booking"])
+    delete_ids = {
+        name: iter(pools[name])
+        for name in ("delete_resource", "delete_user", "delete_booking")
+    }
+    release_holds = iter(pools["release_hold"])
+    confirm_holds = iter(pools["confirm_hold"])
+
+    def booking(start, number, rng):
+        resource_id, booked_from, booked_to = period(start, number, args.resources)
+        return dict(
+            resource_id=resource_id,
+            user_id=rng.randint(1, args.users),
+            booked_from=str(booked_from),
+            booked_to=str(booked_to),
+        )
+
+    def post_booking(rng):
+        return ("POST", "/bookings", booking(POST_START, next(post_numbers), rng))
+
+    def put_booking(rng):
+        number, booking_id = next(put_bookings)
+        _, booked_from, booked_to = period(MOVED_START, number, args.resources)
+        return (
+            "PUT",
+            "/bookings",
+            dict(id=booking_id, booked_from=str(booked_from), booked_to=str(booked_to)),
+        )
+
+    def post_bookings_batch(rng):
+        first = next(batch_numbers) * BATCH_SIZE
+        return (
+            "POST",
+            "/bookings/batch",
+            dict(
+                bookings=[
+                    booking(BATCH_START, number, rng)
+                    for number in range(first, first + BATCH_SIZE)
+                ]
+            ),
+        )
+
+    def post_hold(rng):
+        row = booking(HOLDS_START, next(hold_numbers), rng)
+        return (
+            "POST",
+            "/holds",
+            dict(
+                resource_id=row["resource_id"],
+                user_id=row["user_id"],
+                held_from=row["booked_from"],
+                held_to=row["booked_to"],
+            ),
+        )
+
+    def delete(path, name):
+        return lambda rng: ("DELETE", f"{path}?id={next(delete_ids[name])}", None)
+
+    def post_resource(rng):
+        number = rng.randint(1, 10 ** 9)
+        return (
+            "POST",
+            "/resources",
+            dict(
+                title=f"Resource {number}",
+                active=True,
+                intervals="30",
+                opening_hours_mon="08:00-16:00",
+            ),
+        )
+
+    def post_user(rng):
+        number = rng.randint(1, 10 ** 9)
+        return (
+            "POST",
+            "/users",
+            dict(
+                name=f"User {number}",
+                email=f"user{number}@example.com",
+                phonenumber="%09d" % number,
+            ),
+        )
+
+    def availability(rng):
+        day = START.date() + timedelta(days=rng.randint(0, 27))
+        return (
+            "GET",
+            f"/availability?resource-id={rng.randint(1, args.resources)}"
+            f"&from={day}&to={day + timedelta(days=7)}&duration=30",
+            None,
+        )
+
+    return [
+        ("resources_page", lambda rng: ("GET", "/resources?limit=100", None)),
+        (
+            "resource_by_id",
+            lambda rng: (
+                "GET",
+                f"/resources?id={rng.randint(1, args.resources)}",
+                None,
+            ),
+        ),
+        ("users_page", lambda rng: ("GET", "/users?limit=100", None)),
+        (
+            "user_by_id",
+            lambda rng: ("GET", f"/users?id={rng.randint(1, args.users)}", None),
+        ),
+        ("bookings_page", lambda rng: ("GET", "/bookings?limit=100", None)),
+        (
+            "bookings_by_resource",
+            lambda rng: (
+                "GET",
+                f"/bookings?resource-id={rng.randint(1, args.resources)}&limit=100",
+                None,
+            ),
+        ),
+        (
+            "bookings_by_user",
+            lambda rng: (
+                "GET",
+                f"/bookings?user-id={rng.randint(1, args.users)}&limit=100",
+                None,
+            ),
+        ),
+        (
+            "slots_by_day",
+            lambda rng: ("GET", f"/slots?from={SLOTS_START}&limit=100", None),
+        ),
+        ("availability", availability),
+        ("post_booking", post_booking),
+        ("put_booking", put_booking),
+        ("delete_booking", delete("/bookings", "delete_booking")),
+        ("post_bookings_batch", post_bookings_batch),
+        ("post_resource", post_resource),
+        (
+            "put_resource",
+            lambda rng: (
+                "PUT",
+                "/resources",
+                dict(id=rng.randint(1, args.resources), active=rng.random() < 0.5),
+            ),
+        ),
+        ("delete_resource", delete("/resources", "delete_resource")),
+        ("post_user", post_user),
+        (
+            "put_user",
+            lambda rng: (
+                "PUT",
+                "/users",
+                dict(
+                    id=rng.randint(1, args.users),
+                    phonenumber="%09d" % rng.randint(0, 10 ** 9 - 1),
+                ),
+            ),
+        ),
+        ("delete_user", delete("/users", "delete_user")),
+        ("post_hold", post_hold),
+        (
+            "release_hold",
+            lambda rng: ("DELETE", f"/holds?id={next(release_holds)}", None),
+        ),
+        (
+            "confirm_hold",
+            lambda rng: ("POST", "/holds/confirm", dict(id=next(confirm_holds))),
+        ),
+        ("diagnostics_cache", lambda rng: ("GET", "/diagnostics/cache", None)),
+        ("diagnostics_sqlite", lambda rng: ("GET", "/diagnostics/sqlite", None)),
+        ("diagnostics_queries", lambda rng: ("GET", "/diagnostics/queries", None)),
+        ("metrics", lambda rng: ("GET", "/metrics", None)),
+    ]
+
+
+def summarize(latencies, errors, elapsed):
+    """ Compute latency percentiles (in milliseconds) and throughput. """
+    latencies = np.array(latencies) * 1000
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "mean_ms": float(latencies.mean()),
+        "max_ms": float(latencies.max()),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value)
+    return summary
+
+
+def run_test_client(make_request, requests_num, rng):
+    """ Send requests sequentially with Flask test client. """
+    client = app.test_client()
+    latencies = list()
+    errors = 0
+    started = perf_counter()
+    for _ in range(requests_num):
+        method, url, body = make_request(rng)
+        request_start = perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        latencies.append(perf_counter() - request_start)
+        errors += response.status_code >= 400
+    return summarize(latencies, errors, perf_counter() - started)
+
+
+def run_http_client(make_request, requests_num, threads, port, seed_value):
+    """ Send requests from many threads to HTTP server. """
+    local = threading.local()
+    lock = threading.Lock()
+    latencies = list()
+    errors = list()
+
+    def send(number):
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection("127.0.0.1", port)
+            local.rng = random.Random(seed_value + number)
+        method, url, body = make_request(local.rng)
+        headers = dict()
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        request_start = perf_counter()
+        local.connection.request(method, url, body=body, headers=headers)
+        response = local.connection.getresponse()
+        response.read()
+        latency = perf_counter() - request_start
+        with lock:
+            latencies.append(latency)
+            if response.status >= 400:
+                errors.append(url)
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, range(requests_num)))
+    return summarize(latencies, len(errors), perf_counter() - started)
+
+
+def git_commit():
+    """ Get current git commit hash, None outside of git repository. """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            universal_newlines=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """ Print p95 latency and throughput changes against previous results. """
+    print(f"\nComparison with {previous['commit']}:")
+    for name, clients in current["scenarios"].items():
+        for client_name, summary in clients.items():
+            old = previous["scenarios"].get(name, dict()).get(client_name)
+            if old is None:
+                continue
+            print(
+                f"{name:>22} {client_name:>11}: "
+                f"p95 {old['p95_ms']:>8.2f} -> {summary['p95_ms']:>8.2f} ms, "
+                f"throughput x{summary['throughput'] / old['throughput']:.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark.")
+    parser.add_argument("--resources", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--slot-days", type=int, default=2, help="days of slots")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="HTTP client threads")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", default="bench_load.json", help="JSON results")
+    parser.add_argument("--compare", help="JSON results of previous run")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    db_file, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_file)
+    # HTTP server handles requests in many threads
+    database_uri = f"sqlite:///{db_path}?check_same_thread=false"
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "scenarios": dict(),
+    }
+    server = None
+    try:
+        with app.app_context():
+            db.create_all()
+            results["seed"] = seed_database(
+                db.engine,
+                args.resources,
+                args.users,
+                args.bookings,
+                slot_days=args.slot_days,
+                seed=args.seed,
+            )
+            pools = prepare_write_data(db.engine, args)
+            db.session.remove()
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        for name, make_request in scenarios(args, pools):
+            rng = random.Random(args.seed)
+            results["scenarios"][name] = {
+                "test_client": run_test_client(make_request, args.requests, rng),
+                "http": run_http_client(
+                    make_request,
+                    args.requests,
+                    args.threads,
+                    server.server_port,
+                    args.seed,
+                ),
+            }
+            for client_name, summary in results["scenarios"][name].items():
+                print(
+                    f"{name:>22} {client_name:>11}: "
+                    f"p50 {summary['p50_ms']:>8.2f} ms, "
+                    f"p95 {summary['p95_ms']:>8.2f} ms, "
+                    f"p99 {summary['p99_ms']:>8.2f} ms, "
+                    f"{summary['throughput']:>8.0f} req/s, "
+                    f"{summary['errors']} errors"
+                )
+    finally:
+        if server is not None:
+            server.shutdown()
+        os.remove(db_path)
+    with open(args.output, "w") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(json.load(previous_file), results)
+
+
+if __name__ == "__main__":
+    main()
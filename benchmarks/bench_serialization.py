@@ -0,0 +1,209 @@
+"""
+Benchmark of GET endpoints serialization: ORM objects copied into dictionaries
+(before 00.20.00) versus Core select() of needed columns mapped by
+src.libs.serialization.
+
+Every endpoint page is fetched, converted into dictionaries and encoded into
+JSON, from temporary SQLite database seeded with given number of rows per
+table.
+
+Usage (from main repository directory):
+    python -m benchmarks.bench_serialization [--rows 20000] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+from timeit import repeat
+
+from flask import json
+
+from bookings_api import app
+from src.api.bookings import booking_serializer
+from src.api.resources import resource_serializer
+from src.api.slots import SLOTS_KEY, slot_serializer
+from src.api.users import user_serializer
+from src.database.models import db, Bookings, Resources, Slots, Users
+
+START = datetime(2019, 6, 17, 8, 0)
+
+
+def legacy_booking_to_dict(booking):
+    """ Implementation of booking_to_dict from before 00.20.00. """
+    return {
+        "id": booking.id,
+        "resource_id": booking.resource_id,
+        "user_id": booking.user_id,
+        "booked_from": booking.booked_from,
+        "booked_to": booking.booked_to,
+        "notes": booking.notes,
+    }
+
+
+def legacy_resource_to_dict(res):
+    """ Implementation of resource_to_dict from before 00.20.00. """
+    return {
+        "id": res.id,
+        "title": res.title,
+        "created_at": str(res.created_at),
+        "updated_at": str(res.updated_at),
+        "active": res.active,
+        "intervals": res.intervals,
+        "opening_hours_mon": res.opening_hours_mon,
+        "opening_hours_tue": res.opening_hours_tue,
+        "opening_hours_wed": res.opening_hours_wed,
+        "opening_hours_thu": res.opening_hours_thu,
+        "opening_hours_fri": res.opening_hours_fri,
+        "opening_hours_sat": res.opening_hours_sat,
+        "opening_hours_sun": res.opening_hours_sun,
+    }
+
+
+def legacy_user_to_dict(user):
+    """ Implementation of user_to_dict from before 00.20.00. """
+    return {
+        "id": user.id,
+        "name": user.name,
+        "created_at": str(user.created_at),
+        "updated_at": str(user.updated_at),
+        "email": user.email,
+        "phonenumber": user.phonenumber,
+    }
+
+
+def legacy_slot_to_dict(slot):
+    """ Implementation of slot_to_dict from before 00.20.00. """
+    return {
+        "id": slot.id,
+        "timestamp": str(slot.timestamp),
+        "timestamp_end": str(slot.timestamp_end),
+        "formatted_timestamp": str(slot.formatted_timestamp),
+        "formatted_timestamp_end": str(slot.formatted_timestamp_end),
+        "free": slot.free,
+        "available_resources": slot.available_resources,
+        "maximum_capacity": slot.maximum_capacity,
+    }
+
+
+ENDPOINTS = [
+    ("bookings", Bookings, [Bookings.id], legacy_booking_to_dict, booking_serializer),
+    (
+        "resources",
+        Resources,
+        [Resources.id],
+        legacy_resource_to_dict,
+        resource_serializer,
+    ),
+    ("users", Users, [Users.id], legacy_user_to_dict, user_serializer),
+    ("slots", Slots, SLOTS_KEY, legacy_slot_to_dict, slot_serializer),
+]
+
+
+def seed(rows_num):
+    """ Insert rows_num rows into every table. """
+    numbers = range(1, rows_num + 1)
+    db.session.execute(
+        Resources.__table__.insert(),
+        [
+            dict(
+                title=f"Resource {number}",
+                created_at=START,
+                updated_at=START,
+                active=True,
+                intervals="15",
+                opening_hours_mon="08:00-12:00-12:30-16:00",
+            )
+            for number in numbers
+        ],
+    )
+    db.session.execute(
+        Users.__table__.insert(),
+        [
+            dict(
+                created_at=START,
+                updated_at=START,
+                name=f"User {number}",
+                email=f"user{number}@example.com",
+                phonenumber="123456789",
+            )
+            for number in numbers
+        ],
+    )
+    db.session.execute(
+        Bookings.__table__.insert(),
+        [
+            dict(
+                resource_id=number,
+                user_id=number,
+                booked_from=START + timedelta(minutes=15 * number),
+                booked_to=START + timedelta(minutes=15 * number + 15),
+                notes="note",
+            )
+            for number in numbers
+        ],
+    )
+    db.session.execute(
+        Slots.__table__.insert(),
+        [
+            dict(
+                resource_id=number,
+                timestamp=START + timedelta(minutes=15 * number),
+                timestamp_end=START + timedelta(minutes=15 * number + 15),
+                formatted_timestamp="Monday, June, 17, 2019, 08:00 AM",
+                formatted_timestamp_end="Monday, June, 17, 2019, 08:15 AM",
+                free=1,
+                available_resources=str(number),
+                maximum_capacity=rows_num,
+            )
+            for number in numbers
+        ],
+    )
+    db.session.commit()
+
+
+def legacy_page(model, key_columns, to_dict, rows_num):
+    """ Fetch ORM objects and copy them into dictionaries. """
+    db.session.expunge_all()
+    rows = model.query.order_by(*key_columns).limit(rows_num).all()
+    return json.dumps([to_dict(row) for row in rows])
+
+
+def core_page(serializer, key_columns, rows_num):
+    """ Select needed columns and map rows into dictionaries. """
+    query = serializer.select().order_by(*key_columns).limit(rows_num)
+    return json.dumps([serializer.to_dict(row) for row in db.session.execute(query)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark.")
+    parser.add_argument("--rows", type=int, default=20000, help="rows per table")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs")
+    args = parser.parse_args()
+
+    db_file, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_file)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(args.rows)
+            for name, model, key_columns, legacy_to_dict, serializer in ENDPOINTS:
+                results = list()
+                for function in (
+                    lambda: legacy_page(model, key_columns, legacy_to_dict, args.rows),
+                    lambda: core_page(serializer, key_columns, args.rows),
+                ):
+                    best = min(repeat(function, number=1, repeat=args.repeat))
+                    results.append(args.rows / best)
+                print(
+                    f"{name:>10}: ORM {results[0]:>9.0f} rows/s, "
+                    f"Core {results[1]:>9.0f} rows/s "
+                    f"(x{results[1] / results[0]:.1f})"
+                )
+            db.session.remove()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Microbenchmark of timeslots generation: DateTimeRange based implementation
+used before 00.13.00 versus vectorized src.libs.timeslots. Legacy
+implementation reports more slots: it also generates slots of breaks and a slot
+starting at closing hour, which are not generated anymore.
+
+Usage (from main repository directory):
+    python -m benchmarks.bench_timeslots [--days 90] [--interval 15]
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from timeit import repeat
+
+from datetimerange import DateTimeRange
+from dateutil.relativedelta import relativedelta
+
+from src.libs.timeslots import (
+    format_timestamps,
+    generate_timeslots,
+    parse_opening_windows,
+)
+
+OPENING_HOURS = "08:00-12:00-12:30-16:00"
+TIMESTAMP_FORMAT = "%A, %B, %d, %Y, %H:%M %p"
+
+
+def legacy_generate_timeslots_dict(work_hours_list, interval):
+    """ Implementation of generate_timeslots_dict from before 00.13.00. """
+    timeslots_dict = dict()
+    if len(work_hours_list) == 1:
+        time_range = DateTimeRange(work_hours_list[0], work_hours_list[-1])
+        timeslots_dict = {
+            value: 1
+            for value in time_range.range(relativedelta(minutes=+int(interval)))
+        }
+    elif len(work_hours_list) == 4:
+        for number, free in enumerate((1, 0, 1)):
+            time_range = DateTimeRange(
+                work_hours_list[number], work_hours_list[number + 1]
+            )
+            timeslots_dict.update(
+                {
+                    value: free
+                    for value in time_range.range(relativedelta(minutes=+int(interval)))
+                }
+            )
+    return timeslots_dict
+
+
+def legacy_generation(days, interval):
+    """ Generate and format slots day by day, as before 00.13.00. """
+    slots = list()
+    for day in days:
+        day_str = day.strftime("%Y-%m-%d")
+        dates = [
+            datetime.strptime(day_str + " " + hour + ":00", "%Y-%m-%d %H:%M:%S")
+            for hour in OPENING_HOURS.split("-")
+        ]
+        for timestamp in legacy_generate_timeslots_dict(dates, interval):
+            timestamp_end = timestamp + timedelta(minutes=interval)
+            slots.append(
+                (
+                    timestamp.strftime(TIMESTAMP_FORMAT),
+                    timestamp_end.strftime(TIMESTAMP_FORMAT),
+                )
+            )
+    return slots
+
+
+def vectorized_generation(days, interval):
+    """ Generate and format slots of all days in one call. """
+    weekly_windows = [parse_opening_windows(OPENING_HOURS)] * 7
+    starts, ends = generate_timeslots(days, weekly_windows, interval)
+    return list(zip(format_timestamps(starts), format_timestamps(ends)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timeslots generation benchmark.")
+    parser.add_argument("--days", type=int, default=90, help="number of days")
+    parser.add_argument("--interval", type=int, default=15, help="slot length")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs")
+    args = parser.parse_args()
+
+    days = [date.today() + timedelta(days=number) for number in range(args.days)]
+    for name, function in (
+        ("legacy", legacy_generation),
+        ("vectorized", vectorized_generation),
+    ):
+        slots_num = len(function(days, args.interval))
+        best = min(
+            repeat(lambda: function(days, args.interval), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{name:>10}: {slots_num} slots in {best * 1000:.2f} ms "
+            f"({best / slots_num * 1e6:.2f} us per slot)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,36 @@ This file is configured as FLASK_APP environment variable.
 import logging
 
 from flask import Flask, Blueprint
+from flask.logging import default_handler
 from src.api.resources import ns as resources_namespace
-from src.api.bookings import ns as bookings_namespace
+from src.api.bookings import ns as bookings_namespace, start_bookings_index_loader
 from src.api.users import ns as users_namespace
 from src.api.slots import ns as slots_namespace
+from src.api.holds import ns as holds_namespace, start_holds_sweeper
+from src.api.availability import ns as availability_namespace
+from src.api.diagnostics import ns as diagnostics_namespace
+from src.api.metrics import ns as metrics_namespace
 from config import Config
 from src.logger import handler
 from src.api import api
+from src.asgi import AsgiApp
 from src.database import db
+from src.database.db_config import configure_query_profiling, configure_sqlite_pragmas
+from src.libs.metrics import end_request_timer, observe_request, start_request_timer
 from src.cli import register_cli_commands
 
 
 app = Flask(__name__, template_folder="templates")
+# console output is written by log listener thread as well
+app.logger.removeHandler(default_handler)
 app.logger.addHandler(handler)
 app.logger.setLevel(logging.DEBUG)
 
 
 def initialize_app(flask_app):
     flask_app.config.from_object(Config)
+    configure_sqlite_pragmas(flask_app.config)
+    configure_query_profiling(flask_app.config)
     blueprint = Blueprint("swagger_ui", __name__, url_prefix="")
 
     api.init_app(blueprint)
@@ -29,12 +41,22 @@ def initialize_app(flask_app):
     api.add_namespace(bookings_namespace)
     api.add_namespace(users_namespace)
     api.add_namespace(slots_namespace)
+    api.add_namespace(holds_namespace)
+    api.add_namespace(availability_namespace)
+    api.add_namespace(diagnostics_namespace)
+    api.add_namespace(metrics_namespace)
     flask_app.register_blueprint(blueprint)
     register_cli_commands(flask_app)
+    flask_app.before_request(start_request_timer)
+    flask_app.after_request(observe_request)
+    flask_app.teardown_request(end_request_timer)
+    flask_app.before_first_request(start_bookings_index_loader)
+    flask_app.before_first_request(start_holds_sweeper)
     db.init_app(flask_app)
 
 
 initialize_app(app)
+asgi_app = AsgiApp(app, app.config["ASGI_MAX_WORKERS"])
 
 
 if __name__ == "__main__":
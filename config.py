@@ -5,5 +5,65 @@ cwd = os.path.dirname(os.path.abspath(__file__))
 
 class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = "sqlite:////{}/test.db".format(cwd)
+    # connections of the pools are shared between request threads
+    SQLALCHEMY_DATABASE_URI = "sqlite:////{}/test.db?check_same_thread=false".format(
+        cwd
+    )
+    SQLALCHEMY_POOL_SIZE = 5
+    SQLALCHEMY_MAX_OVERFLOW = 5
+    SQLALCHEMY_POOL_TIMEOUT = 30
+    READ_ONLY_ENGINE = True
+    READ_POOL_SIZE = 10
+    READ_MAX_OVERFLOW = 10
+    READ_POOL_TIMEOUT = 30
+    # requests handled concurrently in ASGI mode, each may hold a connection
+    ASGI_MAX_WORKERS = 20
     RESTPLUS_SWAGGER_UI_DOC_EXPANSION = "list"
+    PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    STREAM_CHUNK_SIZE = 1000
+    MAX_BATCH_SIZE = 1000
+    BOOKINGS_WITHIN_OPENING_HOURS = False
+    MAX_AVAILABILITY_DAYS = 366
+    # default and maximum lifetime of holds in seconds
+    HOLD_TTL = 300
+    HOLD_MAX_TTL = 3600
+    # expired holds are swept every HOLDS_SWEEP_INTERVAL seconds (None disables
+    # background sweeper), HOLDS_SWEEP_BATCH_SIZE holds per transaction
+    HOLDS_SWEEP_INTERVAL = 5
+    HOLDS_SWEEP_BATCH_SIZE = 500
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_CACHE_TTL = 30
+    SQLITE_PRAGMA_PROFILE = "wal"
+    SQLITE_PRAGMA_PROFILES = {
+        # SQLite defaults: rollback journal, readers block writers
+        "default": {"journal_mode": "DELETE", "synchronous": "FULL"},
+        # concurrent readers and single writer, durable after checkpoint
+        "wal": {
+            "busy_timeout": 5000,
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -65536,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+        # bulk loading (flask seed), commits not durable on power loss
+        "bulk": {
+            "busy_timeout": 5000,
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "cache_size": -262144,
+            "temp_store": "MEMORY",
+        },
+    }
+    SQLITE_PRAGMAS = {}
+    # statements taking longer (in seconds) are written to slow query log,
+    # None disables the log
+    SLOW_QUERY_THRESHOLD = 0.1
+    # log files are written by background thread, rotated at LOG_MAX_BYTES
+    LOG_FILE = "server.log"
+    SLOW_QUERY_LOG_FILE = "slow_queries.log"
+    LOG_MAX_BYTES = 10000000
+    LOG_BACKUP_COUNT = 5
+    # fraction of successful requests written to access log, errors always are
+    LOG_SUCCESS_SAMPLE_RATE = 0.1
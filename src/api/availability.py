@@ -0,0 +1,136 @@
+"""
+This file contains all API endpoints implementation connected with availability.
+"""
+from datetime import timedelta
+from flask import current_app, jsonify, request
+from flask_restplus import Resource
+
+from src.api import api
+from src.api.bookings import get_bookings_index
+from src.api.resources import resource_schedules
+from src.database.models import db
+from src.libs.availability import free_windows
+from src.libs.helpers import day_range, error_response
+from src.libs.holds import active_intervals, stored_intervals
+from src.libs.response_cache import cached_response
+from src.libs.versions import conditional_get
+
+ns = api.namespace("availability", description="Availability endpoint")
+
+
+def window_to_dict(window):
+    """ Convert free window into dictionary returned by GET /availability.
+
+    Args:
+        window (tuple): (start, end) datetime tuple
+
+    Returns:
+        window_dict (dict): free window dictionary
+    """
+    start, end = window
+    return {
+        "from": str(start),
+        "to": str(end),
+        "duration": int((end - start).total_seconds() // 60),
+    }
+
+
+def booked_intervals(resource_id, start, end):
+    """ Get bookings and holds of resource overlapping given range, from the
+        database until bookings index is loaded.
+
+    Args:
+        resource_id (int): resource ID
+        start (datetime): beginning of the range
+        end (datetime): end of the range (exclusive)
+
+    Returns:
+        intervals (list): (start, end, item_id) tuples sorted by start
+    """
+    index = get_bookings_index()
+    with index.lock:
+        if index.loaded:
+            return index.overlapping(resource_id, start, end)
+    return stored_intervals(db.session, resource_id, start, end)
+
+
+@ns.route("")
+class AvailabilityEndpoint(Resource):
+    """ Availability endpoint. """
+
+    @conditional_get("bookings", "holds", "resources")
+    @cached_response("bookings", "holds", "resources")
+    def get(self):
+        """ Get free time windows of the resource.
+
+        Free windows are opening hours of the resource minus its bookings and
+        active holds, windows shorter than 'duration' minutes are skipped.
+
+        Args:
+            resource-id (str): resource ID
+            from (str): first day of the range (YYYY-MM-DD)
+            to (str): last day of the range (YYYY-MM-DD)
+            duration (str): minimum window length in minutes
+
+        Returns:
+            windows_list (list): list of free windows dictionaries
+        """
+        try:
+            if request.get_json() is not None:
+                return error_response(
+                    "JSON body is not accepted in this endpoint",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            resource_id = request.args.get("resource-id")
+            from_date = request.args.get("from")
+            to_date = request.args.get("to")
+            if not (resource_id and from_date and to_date):
+                return error_response(
+                    "'resource-id', 'from' and 'to' URL parameters should be provided",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            try:
+                duration = int(request.args.get("duration", 0))
+                if duration < 0:
+                    raise ValueError
+            except ValueError:
+                return error_response(
+                    "'duration' should be a non-negative integer",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            try:
+                range_start, _ = day_range(from_date)
+                _, range_end = day_range(to_date)
+                resource_id = int(resource_id)
+            except ValueError:
+                return error_response(
+                    "Dates should be provided in YYYY-MM-DD format "
+                    "and resource ID should be an integer",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            max_days = current_app.config["MAX_AVAILABILITY_DAYS"]
+            if not 0 < (range_end - range_start).days <= max_days:
+                return error_response(
+                    f"'to' should be between 'from' and {max_days} days later",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            schedule = resource_schedules.get(resource_id)
+            if schedule is None:
+                return error_response(
+                    f"Resource with given ID: {resource_id} was not found",
+                    msg="Resource not found",
+                    err_code=404,
+                )
+            windows = free_windows(
+                schedule.open_windows(range_start, range_end),
+                active_intervals(booked_intervals(resource_id, range_start, range_end)),
+                timedelta(minutes=duration),
+            )
+            return jsonify([window_to_dict(window) for window in windows])
+        except Exception as err:
+            return error_response(err.__repr__())
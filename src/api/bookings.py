@@ -2,15 +2,37 @@
 This file contains all API endpoints implementation connected with bookings.
 """
 from datetime import datetime
+from itertools import chain
+from threading import Thread
+
 from flask_restplus import Resource
-from flask import jsonify, request
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, event, select
 
-from src.database.models import db, Bookings
+from src.database.db_config import begin_immediate
+from src.database.models import db, Bookings, Holds
 from src.api import api
+from src.api.resources import resource_schedules
 from src.libs.helpers import validate_schema, error_response
+from src.libs.holds import (
+    HoldKey,
+    find_conflict,
+    find_stored_conflict,
+    stored_intervals,
+)
+from src.libs.interval_index import IntervalIndex
+from src.libs.validation import compile_schema
+from src.libs.pagination import get_page_args, page_response, paginate
+from src.libs.response_cache import cached_response
+from src.libs.serialization import RowSerializer, http_datetime
+from src.libs.slot_capacity import release_slots, reserve_slots
+from src.libs.streaming import stream_requested, stream_response
+from src.libs.versions import bumps_versions, conditional_get
 
 ns = api.namespace("bookings", description="Bookings endpoint")
 
+bookings_index = IntervalIndex()
+
 post_schema = {
     "definitions": {},
     "$schema": "http://json-schema.org/draft-07/schema#",
@@ -112,10 +134,291 @@ put_schema = {
 }
 
 
+batch_schema = {
+    "definitions": {},
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "$id": "http://example.com/root.json",
+    "type": "object",
+    "title": "The Root Schema",
+    "required": ["bookings"],
+    "properties": {
+        "mode": {
+            "$id": "#/properties/mode",
+            "type": "string",
+            "title": "The Mode Schema",
+            "default": "all-or-nothing",
+            "enum": ["all-or-nothing", "best-effort"],
+            "examples": ["best-effort"],
+        },
+        "bookings": {
+            "$id": "#/properties/bookings",
+            "type": "array",
+            "title": "The Bookings Schema",
+            "minItems": 1,
+            "items": {"$id": "#/properties/bookings/items", "type": "object"},
+        },
+    },
+}
+
+validate_booking = compile_schema(post_schema)
+
+
+@event.listens_for(Bookings.__table__, "after_create")
+@event.listens_for(Bookings.__table__, "after_drop")
+@event.listens_for(Holds.__table__, "after_create")
+@event.listens_for(Holds.__table__, "after_drop")
+def reset_bookings_index(target, connection, **kwargs):
+    """ Drop bookings index whenever bookings or holds table is (re)created. """
+    bookings_index.clear()
+
+
+def load_bookings_index(app, generation):
+    """ Build bookings index from bookings and holds tables, run in background
+        thread.
+
+    Args:
+        app (flask.Flask): Flask application
+        generation (int): token returned by bookings_index.start_loading()
+    """
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                bookings = connection.execute(
+                    select(
+                        [
+                            Bookings.resource_id,
+                            Bookings.booked_from,
+                            Bookings.booked_to,
+                            Bookings.id,
+                        ]
+                    )
+                ).fetchall()
+                holds = connection.execute(
+                    select(
+                        [
+                            Holds.resource_id,
+                            Holds.held_from,
+                            Holds.held_to,
+                            Holds.id,
+                            Holds.expires_at,
+                        ]
+                    )
+                ).fetchall()
+            bookings_index.load(
+                chain(
+                    bookings,
+                    (
+                        (resource_id, held_from, held_to, HoldKey(hold_id, expires_at))
+                        for resource_id, held_from, held_to, hold_id, expires_at in holds
+                    ),
+                ),
+                generation,
+            )
+        except Exception:
+            bookings_index.stop_loading(generation)
+            app.logger.exception("Loading bookings index failed")
+            return
+        if bookings_index.overlapping_count:
+            app.logger.warning(
+                f"{bookings_index.overlapping_count} bookings overlap other "
+                f"bookings of the same resource"
+            )
+
+
+def get_bookings_index():
+    """ Get bookings index, start building it in background thread if it is
+        not loaded.
+
+    Index is checked only once loaded, until then writes rely on the database
+    check alone.
+
+    Returns:
+        bookings_index (IntervalIndex): per-resource bookings and holds index
+    """
+    with bookings_index.lock:
+        if not bookings_index.loaded and not bookings_index.loading:
+            Thread(
+                target=load_bookings_index,
+                args=(
+                    current_app._get_current_object(),
+                    bookings_index.start_loading(),
+                ),
+                name="bookings-index-loader",
+                daemon=True,
+            ).start()
+    return bookings_index
+
+
+def start_bookings_index_loader():
+    """ Before first request hook, start loading bookings index. """
+    get_bookings_index()
+
+
+def update_bookings_index(removed=(), added=()):
+    """ Apply committed write to bookings index.
+
+    Intervals of resource are reloaded from the database when index does not
+    match the write, e.g. removed interval is missing or added one overlaps
+    interval written by other process.
+
+    Args:
+        removed (list): (resource_id, start, item_id) tuples of removed items
+        added (list): (resource_id, start, end, item_id) tuples of added items
+    """
+    outdated = set()
+    with bookings_index.lock:
+        if not bookings_index.loaded:
+            return
+        for resource_id, start, item_id in removed:
+            if not bookings_index.remove(resource_id, start, item_id):
+                outdated.add(resource_id)
+        for resource_id, start, end, item_id in added:
+            if bookings_index.add(resource_id, start, end, item_id) not in (
+                None,
+                item_id,
+            ):
+                outdated.add(resource_id)
+    for resource_id in outdated:
+        current_app.logger.warning(
+            f"Bookings index of resource with ID: {resource_id} is outdated, "
+            f"reloading it"
+        )
+        bookings_index.load_resource(
+            resource_id, stored_intervals(db.session, resource_id)
+        )
+
+
+booking_serializer = RowSerializer(
+    [
+        ("id", Bookings.id, None),
+        ("resource_id", Bookings.resource_id, None),
+        ("user_id", Bookings.user_id, None),
+        ("booked_from", Bookings.booked_from, http_datetime),
+        ("booked_to", Bookings.booked_to, http_datetime),
+        ("notes", Bookings.notes, None),
+    ]
+)
+
+
+def build_bookings_query(booking_id, resource_id, user_id):
+    """ Build bookings select for given URL filters.
+
+    Args:
+        booking_id (str): booking ID
+        resource_id (str): resource ID
+        user_id (str): user ID
+
+    Returns:
+        bookings_query (sqlalchemy.sql.Select): bookings select
+    """
+    query = booking_serializer.select()
+    if booking_id and user_id and resource_id is not None:
+        return query.where(
+            and_(
+                Bookings.id == booking_id,
+                Bookings.user_id == user_id,
+                Bookings.resource_id == resource_id,
+            )
+        )
+    elif booking_id is not None:
+        return query.where(Bookings.id == booking_id)
+    elif user_id is not None:
+        return query.where(Bookings.user_id == user_id)
+    elif resource_id is not None:
+        return query.where(Bookings.resource_id == resource_id)
+    return query
+
+
+def conflict_error(conflict_id):
+    """ Create error message for booking overlapping existing booking or hold.
+    """
+    if isinstance(conflict_id, HoldKey):
+        return f"Booking overlaps hold with ID: {conflict_id.id}"
+    return f"Booking overlaps existing booking with ID: {conflict_id}"
+
+
+def conflict_response(conflict_id):
+    """ Create response for booking overlapping existing one.
+
+    Args:
+        conflict_id (int or HoldKey): ID of overlapping booking or hold
+
+    Returns:
+        response (flask.Response): Flask response object
+    """
+    return error_response(
+        conflict_error(conflict_id), msg="Booking conflict", err_code=409
+    )
+
+
+def capacity_error(resource_id, booked_from, booked_to):
+    """ Create error message for booking overlapping fully booked slot. """
+    return (
+        f"Slot of resource with ID: {resource_id} between {booked_from} "
+        f"and {booked_to} is fully booked"
+    )
+
+
+def capacity_response(resource_id, booked_from, booked_to):
+    """ Create response for booking overlapping fully booked slot.
+
+    Args:
+        resource_id (int): resource ID
+        booked_from (datetime): beginning of the booking
+        booked_to (datetime): end of the booking
+
+    Returns:
+        response (flask.Response): Flask response object
+    """
+    return error_response(
+        capacity_error(resource_id, booked_from, booked_to),
+        msg="Slot fully booked",
+        err_code=409,
+    )
+
+
+def invalid_range_response():
+    """ Create response for booking which ends before it starts.
+
+    Returns:
+        response (flask.Response): Flask response object
+    """
+    return error_response(
+        "'booked_to' should be later than 'booked_from'",
+        msg="Invalid input",
+        err_code=406,
+    )
+
+
+def opening_hours_error(resource_id, booked_from, booked_to):
+    """ Check booking against opening hours of the resource.
+
+    Check is done only with BOOKINGS_WITHIN_OPENING_HOURS config option set.
+
+    Args:
+        resource_id (int): resource ID
+        booked_from (datetime): beginning of the booking
+        booked_to (datetime): end of the booking
+
+    Returns:
+        error (str): error message, None if booking is allowed
+    """
+    if not current_app.config["BOOKINGS_WITHIN_OPENING_HOURS"]:
+        return None
+    schedule = resource_schedules.get(resource_id)
+    if schedule is None:
+        return f"Resource with given ID: {resource_id} was not found"
+    if not schedule.is_open_between(booked_from, booked_to):
+        return "Booking is outside of resource opening hours"
+    return None
+
+
 @ns.route("")
 class BookingsEndpoint(Resource):
     """ Bookings endpoint. """
 
+    @conditional_get("bookings")
+    @cached_response("bookings")
     def get(self):
         """ Get bookings data.
 
@@ -132,44 +435,32 @@ class BookingsEndpoint(Resource):
             booking_id = request.args.get("id")
             resource_id = request.args.get("resource-id")
             user_id = request.args.get("user-id")
-            if booking_id and user_id and resource_id is not None:
-                bookings_obj_list = Bookings.query.filter_by(
-                    id=booking_id, user_id=user_id, resource_id=resource_id
-                ).all()
-            elif booking_id is not None:
-                bookings_obj_list = Bookings.query.filter_by(id=booking_id).all()
-            elif user_id is not None:
-                bookings_obj_list = Bookings.query.filter_by(user_id=user_id).all()
-            elif resource_id is not None:
-                bookings_obj_list = Bookings.query.filter_by(
-                    resource_id=resource_id
-                ).all()
-            else:
-                bookings_obj_list = Bookings.query.all()
-
-            bookings_list = list()
-            for booking in bookings_obj_list:
-                booking_dict = {
-                    "id": booking.id,
-                    "resource_id": booking.resource_id,
-                    "user_id": booking.user_id,
-                    "booked_from": booking.booked_from,
-                    "booked_to": booking.booked_to,
-                    "notes": booking.notes,
-                }
-                bookings_list.append(booking_dict)
-            return jsonify(bookings_list)
+            try:
+                limit, after = get_page_args([Bookings.id])
+            except ValueError as err:
+                return error_response(str(err), msg="Invalid input", err_code=406)
+            bookings_query = build_bookings_query(booking_id, resource_id, user_id)
+            if stream_requested():
+                return stream_response(
+                    bookings_query, [Bookings.id], booking_serializer.to_dict, after
+                )
+            rows, next_cursor = paginate(bookings_query, [Bookings.id], limit, after)
+            bookings_list = [booking_serializer.to_dict(row) for row in rows]
+            return page_response(bookings_list, next_cursor)
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("bookings", "slots")
     @validate_schema(post_schema)
-    def post(self):
+    def post(self, request_data):
         """ Add single booking.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
-        request_data = request.get_json()
         try:
             db_data = Bookings(
                 resource_id=request_data.get("resource_id"),
@@ -182,8 +473,29 @@ class BookingsEndpoint(Resource):
                 ),
                 notes=request_data.get("notes"),
             )
+            if db_data.booked_to <= db_data.booked_from:
+                return invalid_range_response()
+            hours_error = opening_hours_error(
+                db_data.resource_id, db_data.booked_from, db_data.booked_to
+            )
+            if hours_error is not None:
+                return error_response(hours_error, msg="Invalid input", err_code=406)
+            index = get_bookings_index()
+            interval = (db_data.resource_id, db_data.booked_from, db_data.booked_to)
+            conflict_id = find_conflict(db.engine, index, *interval)
+            if conflict_id is not None:
+                return conflict_response(conflict_id)
+            begin_immediate(db.session)
+            conflict_id = find_stored_conflict(db.session, *interval)
+            if conflict_id is not None:
+                db.session.rollback()
+                return conflict_response(conflict_id)
+            if not reserve_slots(db.session, *interval):
+                db.session.rollback()
+                return capacity_response(*interval)
             db.session.add(db_data)
             db.session.commit()
+            update_bookings_index(added=[(*interval, db_data.id)])
             return {
                 "success": True,
                 "message": f"Booking of user {request_data.get('resource_id')} "
@@ -194,15 +506,18 @@ class BookingsEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("bookings", "slots")
     @validate_schema(put_schema)
-    def put(self):
+    def put(self, request_data):
         """ Update booking data.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
         try:
-            request_data = request.get_json()
             db_data = Bookings.query.filter_by(id=request_data.get("id")).first()
             if db_data is None:
                 return error_response(
@@ -222,6 +537,9 @@ class BookingsEndpoint(Resource):
                     msg="Invalid input",
                     err_code=406,
                 )
+            index = get_bookings_index()
+            booking_id = db_data.id
+            old_interval = (db_data.resource_id, db_data.booked_from, db_data.booked_to)
             if request_data.get("resource_id"):
                 db_data.resource_id = request_data.get("resource_id")
             if request_data.get("booked_from"):
@@ -232,8 +550,33 @@ class BookingsEndpoint(Resource):
                 db_data.booked_to = datetime.strptime(
                     request_data.get("booked_to"), "%Y-%m-%d %H:%M:%S"
                 )
+            new_interval = (db_data.resource_id, db_data.booked_from, db_data.booked_to)
+            if new_interval[2] <= new_interval[1]:
+                db.session.rollback()
+                return invalid_range_response()
+            hours_error = opening_hours_error(*new_interval)
+            if hours_error is not None:
+                db.session.rollback()
+                return error_response(hours_error, msg="Invalid input", err_code=406)
+            conflict_id = find_conflict(db.engine, index, *new_interval, booking_id)
+            if conflict_id is not None:
+                db.session.rollback()
+                return conflict_response(conflict_id)
+            begin_immediate(db.session)
+            conflict_id = find_stored_conflict(db.session, *new_interval, booking_id)
+            if conflict_id is not None:
+                db.session.rollback()
+                return conflict_response(conflict_id)
+            release_slots(db.session, *old_interval)
+            if not reserve_slots(db.session, *new_interval):
+                db.session.rollback()
+                return capacity_response(*new_interval)
             db.session.commit()
-            return {"success": True, "message": f"Booking with ID {db_data.id} updated"}
+            update_bookings_index(
+                removed=[(old_interval[0], old_interval[1], booking_id)],
+                added=[(*new_interval, booking_id)],
+            )
+            return {"success": True, "message": f"Booking with ID {booking_id} updated"}
         except (KeyError, AttributeError):
             return error_response(
                 "ID is the only supported filter at this moment",
@@ -243,6 +586,7 @@ class BookingsEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("bookings", "slots")
     def delete(self):
         """ Delete given booking using its ID.
 
@@ -272,11 +616,222 @@ class BookingsEndpoint(Resource):
                     msg="Booking not found",
                     err_code=404,
                 )
+            interval_key = (db_data.resource_id, db_data.booked_from, db_data.id)
+            release_slots(
+                db.session, db_data.resource_id, db_data.booked_from, db_data.booked_to
+            )
             db.session.delete(db_data)
             db.session.commit()
+            update_bookings_index(removed=[interval_key])
             response = jsonify(
                 dict(success=True, message=f"Booking with ID {booking_id} removed")
             )
             return response
         except Exception as err:
             return error_response(err.__repr__())
+
+
+@ns.route("/batch")
+class BookingsBatchEndpoint(Resource):
+    """ Bookings batch endpoint. """
+
+    @bumps_versions("bookings", "slots")
+    @validate_schema(batch_schema)
+    def post(self, request_data):
+        """ Add many bookings in single transaction.
+
+        In "all-or-nothing" mode (default) no booking is added if any of them
+        is invalid (409 if any of them is in conflict, 406 otherwise), in
+        "best-effort" mode all valid bookings are added.
+
+        Args:
+            request_data (dict): validated JSON body
+
+        Returns:
+            response (flask.Response): Flask response object
+        """
+        items = request_data["bookings"]
+        mode = request_data.get("mode", "all-or-nothing")
+        max_batch_size = current_app.config["MAX_BATCH_SIZE"]
+        if len(items) > max_batch_size:
+            return error_response(
+                f"Batch can contain at most {max_batch_size} bookings",
+                msg="Invalid input",
+                err_code=406,
+            )
+        try:
+            index = get_bookings_index()
+            results, rows = self.validate_items(items, index)
+            begin_immediate(db.session)
+            rows = self.check_stored_conflicts(rows, results)
+            rows = self.reserve_rows_slots(rows, results)
+            failed = [result for result in results if not result["success"]]
+            if failed and mode == "all-or-nothing":
+                db.session.rollback()
+                if any(result["status"] == 409 for result in failed):
+                    return error_response(results, msg="Booking conflict", err_code=409)
+                return error_response(results, msg="Invalid input", err_code=406)
+            if rows:
+                booking_ids = self.insert_rows(rows)
+                update_bookings_index(
+                    added=[
+                        (
+                            row["resource_id"],
+                            row["booked_from"],
+                            row["booked_to"],
+                            booking_id,
+                        )
+                        for row, booking_id in zip(rows, booking_ids)
+                    ]
+                )
+                for row, booking_id in zip(rows, booking_ids):
+                    results[row.pop("position")]["id"] = booking_id
+            return {
+                "success": not failed,
+                "message": f"{len(rows)} of {len(items)} bookings added",
+                "results": results,
+            }
+        except Exception as err:
+            db.session.rollback()
+            return error_response(err.__repr__())
+
+    @staticmethod
+    def validate_items(items, index):
+        """ Validate all bookings of the batch in one pass.
+
+        Besides JSON schema and date range, every booking is checked against
+        existing bookings and bookings placed earlier in the same batch.
+
+        Args:
+            items (list): list of bookings dictionaries
+            index (IntervalIndex): bookings index
+
+        Returns:
+            validation (tuple): (list of per-item results, list of rows to insert)
+        """
+        batch_index = IntervalIndex()
+        results = list()
+        rows = list()
+        for position, item in enumerate(items):
+            result = {"index": position, "success": False}
+            results.append(result)
+            errors = validate_booking(item)
+            if errors:
+                result.update(status=406, errors=errors)
+                continue
+            try:
+                booked_from = datetime.strptime(
+                    item["booked_from"], "%Y-%m-%d %H:%M:%S"
+                )
+                booked_to = datetime.strptime(item["booked_to"], "%Y-%m-%d %H:%M:%S")
+            except ValueError as err:
+                result.update(status=406, errors=[str(err)])
+                continue
+            if booked_to <= booked_from:
+                result.update(
+                    status=406,
+                    errors=["'booked_to' should be later than 'booked_from'"],
+                )
+                continue
+            resource_id = item["resource_id"]
+            hours_error = opening_hours_error(resource_id, booked_from, booked_to)
+            if hours_error is not None:
+                result.update(status=406, errors=[hours_error])
+                continue
+            conflict_id = find_conflict(
+                db.engine, index, resource_id, booked_from, booked_to
+            )
+            if conflict_id is not None:
+                result.update(status=409, errors=[conflict_error(conflict_id)])
+                continue
+            conflict_position = batch_index.add(
+                resource_id, booked_from, booked_to, position
+            )
+            if conflict_position is not None:
+                result.update(
+                    status=409,
+                    errors=[
+                        f"Booking overlaps booking with index {conflict_position} "
+                        f"of this batch"
+                    ],
+                )
+                continue
+            result.update(success=True, status=200)
+            rows.append(
+                dict(
+                    position=position,
+                    resource_id=resource_id,
+                    user_id=item["user_id"],
+                    booked_from=booked_from,
+                    booked_to=booked_to,
+                    notes=item.get("notes"),
+                )
+            )
+        return results, rows
+
+    @staticmethod
+    def check_stored_conflicts(rows, results):
+        """ Check valid bookings of the batch against the database, with write
+            lock taken.
+
+        Args:
+            rows (list): list of bookings rows
+            results (list): list of per-item results, updated for conflicts
+
+        Returns:
+            rows (list): rows of bookings not overlapping stored ones
+        """
+        checked = list()
+        for row in rows:
+            conflict_id = find_stored_conflict(
+                db.session, row["resource_id"], row["booked_from"], row["booked_to"]
+            )
+            if conflict_id is None:
+                checked.append(row)
+            else:
+                results[row["position"]].update(
+                    success=False, status=409, errors=[conflict_error(conflict_id)]
+                )
+        return checked
+
+    @staticmethod
+    def reserve_rows_slots(rows, results):
+        """ Take places in slots overlapped by valid bookings of the batch.
+
+        Args:
+            rows (list): list of bookings rows
+            results (list): list of per-item results, updated for full slots
+
+        Returns:
+            rows (list): rows of bookings with reserved slots
+        """
+        reserved = list()
+        for row in rows:
+            interval = (row["resource_id"], row["booked_from"], row["booked_to"])
+            if reserve_slots(db.session, *interval):
+                reserved.append(row)
+            else:
+                results[row["position"]].update(
+                    success=False, status=409, errors=[capacity_error(*interval)]
+                )
+        return reserved
+
+    @staticmethod
+    def insert_rows(rows):
+        """ Insert bookings one by one and commit them together.
+
+        Args:
+            rows (list): list of bookings rows
+
+        Returns:
+            booking_ids (list): IDs of inserted bookings, in rows order
+        """
+        insert = Bookings.__table__.insert()
+        booking_ids = [
+            db.session.execute(
+                insert, {key: value for key, value in row.items() if key != "position"}
+            ).inserted_primary_key[0]
+            for row in rows
+        ]
+        db.session.commit()
+        return booking_ids
@@ -0,0 +1,56 @@
+"""
+This file contains all API endpoints implementation connected with diagnostics.
+"""
+from flask_restplus import Resource
+
+from src.api import api
+from src.database import db
+from src.database.db_config import get_sqlite_pragmas, sqlite_profile
+from src.libs.query_stats import query_stats
+from src.libs.response_cache import response_cache
+
+ns = api.namespace("diagnostics", description="Diagnostics endpoint")
+
+
+@ns.route("/cache")
+class ResponseCacheEndpoint(Resource):
+    """ Response cache diagnostics endpoint. """
+
+    def get(self):
+        """ Get response cache size and hit/miss/eviction counters.
+
+        Returns:
+            stats (dict): response cache statistics
+        """
+        return response_cache.stats()
+
+
+@ns.route("/sqlite")
+class SqliteEndpoint(Resource):
+    """ SQLite diagnostics endpoint. """
+
+    def get(self):
+        """ Get active PRAGMA profile and PRAGMA values read from database.
+
+        Returns:
+            pragmas (dict): configured and applied SQLite PRAGMAs
+        """
+        return {
+            "profile": sqlite_profile["name"],
+            "configured": sqlite_profile["pragmas"],
+            "applied": get_sqlite_pragmas(db.session.connection()),
+        }
+
+
+@ns.route("/queries")
+class QueriesEndpoint(Resource):
+    """ SQL queries diagnostics endpoint. """
+
+    def get(self):
+        """ Get execution count and time of SQL statements, the most time
+            consuming first.
+
+        Returns:
+            statements (list): list of statements statistics dictionaries
+        """
+        return query_stats.snapshot()
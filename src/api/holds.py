@@ -0,0 +1,302 @@
+"""
+This file contains all API endpoints implementation connected with holds.
+"""
+from datetime import datetime, timedelta
+from flask import current_app, jsonify, request
+from flask_restplus import Resource
+
+from src.api import api
+from src.api.bookings import (
+    bookings_index,
+    capacity_response,
+    conflict_response,
+    get_bookings_index,
+    invalid_range_response,
+    opening_hours_error,
+    update_bookings_index,
+)
+from src.database.db_config import begin_immediate
+from src.database.models import db, Bookings, Holds
+from src.libs.helpers import validate_schema, error_response
+from src.libs.holds import HoldKey, find_conflict, find_stored_conflict, holds_sweeper
+from src.libs.slot_capacity import release_slots, reserve_slots
+from src.libs.versions import bumps_versions
+
+ns = api.namespace("holds", description="Holds endpoint")
+
+post_schema = {
+    "definitions": {},
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "$id": "http://example.com/root.json",
+    "type": "object",
+    "title": "The Root Schema",
+    "required": ["resource_id", "user_id", "held_from", "held_to"],
+    "properties": {
+        "resource_id": {
+            "$id": "#/properties/resource_id",
+            "type": "integer",
+            "title": "The Resource_id Schema",
+            "default": 0,
+            "examples": [4],
+        },
+        "user_id": {
+            "$id": "#/properties/user_id",
+            "type": "integer",
+            "title": "The User_id Schema",
+            "default": 0,
+            "examples": [12],
+        },
+        "held_from": {
+            "$id": "#/properties/held_from",
+            "type": "string",
+            "format": "date-time",
+            "title": "The Held_from Schema",
+            "default": "",
+            "examples": ["2019-04-10 10:00:00"],
+            "pattern": "^(.*)$",
+        },
+        "held_to": {
+            "$id": "#/properties/held_to",
+            "type": "string",
+            "format": "date-time",
+            "title": "The Held_to Schema",
+            "default": "",
+            "examples": ["2019-04-10 10:15:00"],
+            "pattern": "^(.*)$",
+        },
+        "ttl": {
+            "$id": "#/properties/ttl",
+            "type": "integer",
+            "title": "The Ttl Schema",
+            "default": 300,
+            "examples": [120],
+        },
+    },
+}
+
+confirm_schema = {
+    "definitions": {},
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "$id": "http://example.com/root.json",
+    "type": "object",
+    "title": "The Root Schema",
+    "required": ["id"],
+    "properties": {
+        "id": {
+            "$id": "#/properties/id",
+            "type": "integer",
+            "title": "The Id Schema",
+            "default": 0,
+            "examples": [4],
+        },
+        "notes": {
+            "$id": "#/properties/notes",
+            "type": "string",
+            "title": "The Notes Schema",
+            "default": "",
+            "examples": ["sample note"],
+            "pattern": "^(.*)$",
+        },
+    },
+}
+
+
+def start_holds_sweeper():
+    """ Before first request hook, start background sweeper of expired holds.
+    """
+    holds_sweeper.start(current_app._get_current_object(), bookings_index)
+
+
+def hold_not_found_response(hold_id):
+    """ Create response for missing (confirmed, released or expired) hold.
+
+    Args:
+        hold_id (int): hold ID
+
+    Returns:
+        response (flask.Response): Flask response object
+    """
+    return error_response(
+        f"Hold with given ID: {hold_id} was not found",
+        msg="Hold not found",
+        err_code=404,
+    )
+
+
+@ns.route("")
+class HoldsEndpoint(Resource):
+    """ Holds endpoint. """
+
+    @bumps_versions("holds", "slots")
+    @validate_schema(post_schema)
+    def post(self, request_data):
+        """ Hold resource for a few minutes, e.g. during checkout.
+
+        Hold counts against availability like a booking until it is confirmed,
+        released or expires ('ttl' seconds, HOLD_TTL by default).
+
+        Args:
+            request_data (dict): validated JSON body
+
+        Returns:
+            response (flask.Response): Flask response object
+        """
+        ttl = request_data.get("ttl", current_app.config["HOLD_TTL"])
+        max_ttl = current_app.config["HOLD_MAX_TTL"]
+        if not 0 < ttl <= max_ttl:
+            return error_response(
+                f"'ttl' should be between 1 and {max_ttl} seconds",
+                msg="Invalid input",
+                err_code=406,
+            )
+        try:
+            held_from = datetime.strptime(
+                request_data["held_from"], "%Y-%m-%d %H:%M:%S"
+            )
+            held_to = datetime.strptime(request_data["held_to"], "%Y-%m-%d %H:%M:%S")
+        except ValueError as err:
+            return error_response(str(err), msg="Invalid input", err_code=406)
+        if held_to <= held_from:
+            return invalid_range_response()
+        resource_id = request_data["resource_id"]
+        try:
+            hours_error = opening_hours_error(resource_id, held_from, held_to)
+            if hours_error is not None:
+                return error_response(hours_error, msg="Invalid input", err_code=406)
+            index = get_bookings_index()
+            conflict_id = find_conflict(
+                db.engine, index, resource_id, held_from, held_to
+            )
+            if conflict_id is not None:
+                return conflict_response(conflict_id)
+            begin_immediate(db.session)
+            conflict_id = find_stored_conflict(
+                db.session, resource_id, held_from, held_to
+            )
+            if conflict_id is not None:
+                db.session.rollback()
+                return conflict_response(conflict_id)
+            if not reserve_slots(db.session, resource_id, held_from, held_to):
+                db.session.rollback()
+                return capacity_response(resource_id, held_from, held_to)
+            expires_at = datetime.now() + timedelta(seconds=ttl)
+            hold = Holds(
+                resource_id=resource_id,
+                user_id=request_data["user_id"],
+                held_from=held_from,
+                held_to=held_to,
+                expires_at=expires_at,
+            )
+            db.session.add(hold)
+            # ID is read before commit expires the object, no reload query
+            db.session.flush()
+            hold_key = HoldKey(hold.id, expires_at)
+            db.session.commit()
+            update_bookings_index(added=[(resource_id, held_from, held_to, hold_key)])
+            return {
+                "success": True,
+                "message": f"Hold of resource {resource_id} from {held_from} "
+                f"to {held_to} added",
+                "id": hold_key.id,
+                "expires_at": str(expires_at),
+            }
+        except Exception as err:
+            return error_response(err.__repr__())
+
+    @bumps_versions("holds", "slots")
+    def delete(self):
+        """ Release given hold using its ID.
+
+        Args:
+            id (str): hold ID
+
+        Returns:
+            response (flask.Response): Flask response object
+        """
+        if request.get_json() is not None:
+            return error_response(
+                "JSON body is not accepted in this endpoint",
+                msg="Invalid input",
+                err_code=406,
+            )
+        if request.args.get("id"):
+            hold_id = request.args.get("id")
+        else:
+            return error_response(
+                "Improper URL parameters provided", msg="Invalid input", err_code=406
+            )
+        try:
+            hold = Holds.query.filter_by(id=hold_id).first()
+            if hold is None:
+                return hold_not_found_response(hold_id)
+            hold_key = HoldKey(hold.id, hold.expires_at)
+            interval = (hold.resource_id, hold.held_from, hold.held_to)
+            release_slots(db.session, *interval)
+            db.session.delete(hold)
+            db.session.commit()
+            update_bookings_index(removed=[(interval[0], interval[1], hold_key)])
+            return jsonify(
+                dict(success=True, message=f"Hold with ID {hold_id} removed")
+            )
+        except Exception as err:
+            return error_response(err.__repr__())
+
+
+@ns.route("/confirm")
+class HoldsConfirmEndpoint(Resource):
+    """ Holds confirmation endpoint. """
+
+    @bumps_versions("bookings", "holds")
+    @validate_schema(confirm_schema)
+    def post(self, request_data):
+        """ Turn active hold into booking, slots places taken by the hold are
+            kept by the booking.
+
+        Args:
+            request_data (dict): validated JSON body
+
+        Returns:
+            response (flask.Response): Flask response object
+        """
+        hold_id = request_data["id"]
+        try:
+            hold = Holds.query.filter_by(id=hold_id).first()
+            if hold is None:
+                return hold_not_found_response(hold_id)
+            now = datetime.now()
+            hold_key = HoldKey(hold.id, hold.expires_at)
+            booking = Bookings(
+                resource_id=hold.resource_id,
+                user_id=hold.user_id,
+                booked_from=hold.held_from,
+                booked_to=hold.held_to,
+                notes=request_data.get("notes"),
+            )
+            # hold may be swept by other process in the meantime
+            deleted = Holds.query.filter(
+                Holds.id == hold_id, Holds.expires_at > now
+            ).delete(synchronize_session=False)
+            if not deleted:
+                db.session.rollback()
+                return error_response(
+                    f"Hold with given ID: {hold_id} expired",
+                    msg="Hold expired",
+                    err_code=409,
+                )
+            db.session.add(booking)
+            # ID is read before commit expires the object, no reload query
+            db.session.flush()
+            booking_id = booking.id
+            interval = (booking.resource_id, booking.booked_from, booking.booked_to)
+            db.session.commit()
+            update_bookings_index(
+                removed=[(interval[0], interval[1], hold_key)],
+                added=[(*interval, booking_id)],
+            )
+            return {
+                "success": True,
+                "message": f"Hold with ID {hold_id} confirmed",
+                "id": booking_id,
+            }
+        except Exception as err:
+            return error_response(err.__repr__())
@@ -0,0 +1,23 @@
+"""
+This file contains API endpoint exposing request metrics.
+"""
+from flask import Response
+from flask_restplus import Resource
+
+from src.api import api
+from src.libs.metrics import CONTENT_TYPE, request_metrics
+
+ns = api.namespace("metrics", description="Prometheus metrics endpoint")
+
+
+@ns.route("")
+class MetricsEndpoint(Resource):
+    """ Prometheus metrics endpoint. """
+
+    def get(self):
+        """ Get request latency, status and in-flight metrics.
+
+        Returns:
+            response (flask.Response): metrics in Prometheus text format
+        """
+        return Response(request_metrics.render(), content_type=CONTENT_TYPE)
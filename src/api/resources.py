@@ -4,13 +4,23 @@ This file contains all API endpoints implementation connected with resources.
 from datetime import datetime
 from flask import jsonify, request
 from flask_restplus import Resource
+from sqlalchemy import and_, event
+from sqlalchemy.orm import Session, object_session
 
 from src.api import api
 from src.database.models import db, Resources
 from src.libs.helpers import validate_schema, error_response
+from src.libs.pagination import get_page_args, page_response, paginate
+from src.libs.schedule import ScheduleCache
+from src.libs.response_cache import cached_response
+from src.libs.serialization import RowSerializer, iso_datetime
+from src.libs.streaming import stream_requested, stream_response
+from src.libs.versions import bumps_versions, conditional_get
 
 ns = api.namespace("resources", description="Resources endpoint")
 
+resource_schedules = ScheduleCache(lambda resource_id: Resources.query.get(resource_id))
+
 
 post_schema = {
     "definitions": {},
@@ -57,10 +67,64 @@ put_schema = {
 }
 
 
+@event.listens_for(Resources.__table__, "after_create")
+@event.listens_for(Resources.__table__, "after_drop")
+def reset_resource_schedules(target, connection, **kwargs):
+    """ Drop compiled schedules whenever resources table is (re)created. """
+    resource_schedules.clear()
+
+
+@event.listens_for(Resources, "after_update")
+@event.listens_for(Resources, "after_delete")
+def mark_changed_resource(mapper, connection, target):
+    """ Remember updated or removed resource, its compiled schedule is dropped
+        once the session commits. """
+    object_session(target).info.setdefault("changed_resources", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_resource_schedules(session):
+    """ Drop compiled schedules of resources changed by committed transaction.
+
+    Schedule dropped before commit could be compiled again from the old row
+    by concurrent request and kept until the next change of the resource.
+    """
+    for resource_id in session.info.pop("changed_resources", ()):
+        resource_schedules.invalidate(resource_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_resources(session):
+    """ Keep compiled schedules of resources changed by rolled back
+        transaction. """
+    session.info.pop("changed_resources", None)
+
+
+resource_serializer = RowSerializer(
+    [
+        ("id", Resources.id, None),
+        ("title", Resources.title, None),
+        ("created_at", Resources.created_at, iso_datetime),
+        ("updated_at", Resources.updated_at, iso_datetime),
+        ("active", Resources.active, None),
+        ("intervals", Resources.intervals, None),
+        ("opening_hours_mon", Resources.opening_hours_mon, None),
+        ("opening_hours_tue", Resources.opening_hours_tue, None),
+        ("opening_hours_wed", Resources.opening_hours_wed, None),
+        ("opening_hours_thu", Resources.opening_hours_thu, None),
+        ("opening_hours_fri", Resources.opening_hours_fri, None),
+        ("opening_hours_sat", Resources.opening_hours_sat, None),
+        ("opening_hours_sun", Resources.opening_hours_sun, None),
+    ]
+)
+
+
 @ns.route("")
 class ResourcesEndpoint(Resource):
     """ Resources endpoint. """
 
+    @conditional_get("resources")
+    @cached_response("resources")
     def get(self):
         """ Get all resources.
 
@@ -76,46 +140,40 @@ class ResourcesEndpoint(Resource):
                 )
             resource_id = request.args.get("id")
             title = request.args.get("title")
+            try:
+                limit, after = get_page_args([Resources.id])
+            except ValueError as err:
+                return error_response(str(err), msg="Invalid input", err_code=406)
+            resources_query = resource_serializer.select()
             if resource_id and title is not None:
-                resources_obj_list = Resources.query.filter_by(
-                    id=resource_id, title=title
-                ).all()
+                resources_query = resources_query.where(
+                    and_(Resources.id == resource_id, Resources.title == title)
+                )
             elif resource_id is not None:
-                resources_obj_list = Resources.query.filter_by(id=resource_id).all()
+                resources_query = resources_query.where(Resources.id == resource_id)
             elif title is not None:
-                resources_obj_list = Resources.query.filter_by(title=title).all()
-            else:
-                resources_obj_list = Resources.query.all()
-            resources_list = list()
-            for res in resources_obj_list:
-                res_dict = {
-                    "id": res.id,
-                    "title": res.title,
-                    "created_at": str(res.created_at),
-                    "updated_at": str(res.updated_at),
-                    "active": res.active,
-                    "intervals": res.intervals,
-                    "opening_hours_mon": res.opening_hours_mon,
-                    "opening_hours_tue": res.opening_hours_tue,
-                    "opening_hours_wed": res.opening_hours_wed,
-                    "opening_hours_thu": res.opening_hours_thu,
-                    "opening_hours_fri": res.opening_hours_fri,
-                    "opening_hours_sat": res.opening_hours_sat,
-                    "opening_hours_sun": res.opening_hours_sun,
-                }
-                resources_list.append(res_dict)
-            return jsonify(resources_list)
+                resources_query = resources_query.where(Resources.title == title)
+            if stream_requested():
+                return stream_response(
+                    resources_query, [Resources.id], resource_serializer.to_dict, after
+                )
+            rows, next_cursor = paginate(resources_query, [Resources.id], limit, after)
+            resources_list = [resource_serializer.to_dict(row) for row in rows]
+            return page_response(resources_list, next_cursor)
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("resources")
     @validate_schema(post_schema)
-    def post(self):
+    def post(self, request_data):
         """ Add single resource.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
-        request_data = request.get_json()
         try:
             db_data = Resources(
                 title=request_data.get("title"),
@@ -140,15 +198,18 @@ class ResourcesEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("resources")
     @validate_schema(put_schema)
-    def put(self):
+    def put(self, request_data):
         """ Update resource data.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
         try:
-            request_data = request.get_json()
             db_data = Resources.query.filter_by(id=request_data.get("id")).first()
             if db_data is None:
                 return error_response(
@@ -171,6 +232,7 @@ class ResourcesEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("resources")
     def delete(self):
         """ Delete given resource using its ID.
 
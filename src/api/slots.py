@@ -1,21 +1,89 @@
 """
 This file contains all API endpoints implementation connected with slots.
 """
-from flask import jsonify, request
+from flask import request
 from flask_restplus import Resource
-from sqlalchemy import and_, func
+from sqlalchemy import and_
 
 from src.api import api
 from src.database.models import Slots
-from src.libs.helpers import error_response
+from src.libs.helpers import day_range, error_response
+from src.libs.pagination import get_page_args, page_response, paginate
+from src.libs.response_cache import cached_response
+from src.libs.serialization import RowSerializer, iso_datetime
+from src.libs.streaming import stream_requested, stream_response
+from src.libs.versions import conditional_get
 
 ns = api.namespace("slots", description="Slots endpoint")
 
+# slots are paginated in chronological order, served by ix_slots_timestamp
+SLOTS_KEY = [Slots.timestamp, Slots.id]
+
+
+slot_serializer = RowSerializer(
+    [
+        ("id", Slots.id, None),
+        ("timestamp", Slots.timestamp, iso_datetime),
+        ("timestamp_end", Slots.timestamp_end, iso_datetime),
+        ("formatted_timestamp", Slots.formatted_timestamp, None),
+        ("formatted_timestamp_end", Slots.formatted_timestamp_end, None),
+        ("free", Slots.free, None),
+        ("available_resources", Slots.available_resources, None),
+        ("maximum_capacity", Slots.maximum_capacity, None),
+    ]
+)
+
+
+def build_slots_query(from_date, to_date, resources):
+    """ Build slots select for given URL filters.
+
+    Date filters are half-open ranges on raw timestamp columns, so they are
+    served by ix_slots_timestamp / ix_slots_timestamp_end indexes.
+
+    Args:
+        from_date (str): first day of slots (YYYY-MM-DD)
+        to_date (str): last day of slots (YYYY-MM-DD)
+        resources (str): available resources
+
+    Returns:
+        slots_query (sqlalchemy.sql.Select): slots select
+    """
+    query = slot_serializer.select()
+    if from_date and to_date and resources is not None:
+        return query.where(
+            and_(
+                Slots.timestamp == from_date,
+                Slots.timestamp_end == to_date,
+                Slots.available_resources == resources,
+            )
+        )
+    elif from_date and to_date is not None:
+        range_start, _ = day_range(from_date)
+        _, range_end = day_range(to_date)
+        return query.where(
+            and_(Slots.timestamp >= range_start, Slots.timestamp < range_end)
+        )
+    elif from_date is not None:
+        range_start, range_end = day_range(from_date)
+        return query.where(
+            and_(Slots.timestamp >= range_start, Slots.timestamp < range_end)
+        )
+    elif to_date is not None:
+        range_start, range_end = day_range(to_date)
+        return query.where(
+            and_(Slots.timestamp_end >= range_start, Slots.timestamp_end < range_end)
+        )
+    elif resources is not None:
+        return query.where(Slots.available_resources.in_(resources))
+    return query
+
 
 @ns.route("")
 class SlotsEndpoint(Resource):
     """ Slots endpoint. """
 
+    @conditional_get("slots")
+    @cached_response("slots")
     def get(self):
         """ Get slots endpoint.
 
@@ -32,45 +100,24 @@ class SlotsEndpoint(Resource):
             from_date = request.args.get("from")
             to_date = request.args.get("to")
             resources = request.args.get("resources")
-            if from_date and to_date and resources is not None:
-                slots_obj_list = Slots.query.filter_by(
-                    timestamp=from_date,
-                    timestamp_end=to_date,
-                    available_resources=resources,
-                ).all()
-            elif from_date and to_date is not None:
-                slots_obj_list = Slots.query.filter(
-                    and_(func.date(Slots.timestamp) >= from_date),
-                    func.date(Slots.timestamp) <= to_date,
-                ).all()
-            elif from_date is not None:
-                slots_obj_list = Slots.query.filter(
-                    func.date(Slots.timestamp) == from_date
-                ).all()
-            elif to_date is not None:
-                slots_obj_list = Slots.query.filter(
-                    func.date(Slots.timestamp_end) == to_date
-                ).all()
-            elif resources is not None:
-                slots_obj_list = Slots.query.filter(
-                    Slots.available_resources.in_(resources)
-                ).all()
-            else:
-                slots_obj_list = Slots.query.all()
-
-            slots_list = list()
-            for slot in slots_obj_list:
-                slot_dict = {
-                    "id": slot.id,
-                    "timestamp": str(slot.timestamp),
-                    "timestamp_end": str(slot.timestamp_end),
-                    "formatted_timestamp": str(slot.formatted_timestamp),
-                    "formatted_timestamp_end": str(slot.formatted_timestamp_end),
-                    "free": slot.free,
-                    "available_resources": slot.available_resources,
-                    "maximum_capacity": slot.maximum_capacity,
-                }
-                slots_list.append(slot_dict)
-            return jsonify(slots_list)
+            try:
+                slots_query = build_slots_query(from_date, to_date, resources)
+            except ValueError:
+                return error_response(
+                    "Dates should be provided in YYYY-MM-DD format",
+                    msg="Invalid input",
+                    err_code=406,
+                )
+            try:
+                limit, after = get_page_args(SLOTS_KEY)
+            except ValueError as err:
+                return error_response(str(err), msg="Invalid input", err_code=406)
+            if stream_requested():
+                return stream_response(
+                    slots_query, SLOTS_KEY, slot_serializer.to_dict, after
+                )
+            rows, next_cursor = paginate(slots_query, SLOTS_KEY, limit, after)
+            slots_list = [slot_serializer.to_dict(row) for row in rows]
+            return page_response(slots_list, next_cursor)
         except Exception as err:
             return error_response(err.__repr__())
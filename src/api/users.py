@@ -4,10 +4,16 @@ This file contains all API endpoints implementation connected with resources.
 from datetime import datetime
 from flask import jsonify, request
 from flask_restplus import Resource
+from sqlalchemy import and_
 
 from src.api import api
 from src.database.models import db, Users
 from src.libs.helpers import validate_schema, error_response
+from src.libs.pagination import get_page_args, page_response, paginate
+from src.libs.response_cache import cached_response
+from src.libs.serialization import RowSerializer, iso_datetime
+from src.libs.streaming import stream_requested, stream_response
+from src.libs.versions import bumps_versions, conditional_get
 
 ns = api.namespace("users", description="Users endpoint")
 
@@ -90,10 +96,24 @@ put_schema = {
 }
 
 
+user_serializer = RowSerializer(
+    [
+        ("id", Users.id, None),
+        ("name", Users.name, None),
+        ("created_at", Users.created_at, iso_datetime),
+        ("updated_at", Users.updated_at, iso_datetime),
+        ("email", Users.email, None),
+        ("phonenumber", Users.phonenumber, None),
+    ]
+)
+
+
 @ns.route("")
 class UsersEndpoint(Resource):
     """ Users endpoint. """
 
+    @conditional_get("users")
+    @cached_response("users")
     def get(self):
         """ Get users endpoint.
 
@@ -109,38 +129,40 @@ class UsersEndpoint(Resource):
                 )
             user_id = request.args.get("id")
             name = request.args.get("name")
+            try:
+                limit, after = get_page_args([Users.id])
+            except ValueError as err:
+                return error_response(str(err), msg="Invalid input", err_code=406)
+            users_query = user_serializer.select()
             if user_id and name is not None:
-                users_obj_list = Users.query.filter_by(id=user_id, name=name).all()
+                users_query = users_query.where(
+                    and_(Users.id == user_id, Users.name == name)
+                )
             elif user_id is not None:
-                users_obj_list = Users.query.filter_by(id=user_id).all()
+                users_query = users_query.where(Users.id == user_id)
             elif name is not None:
-                users_obj_list = Users.query.filter_by(name=name).all()
-            else:
-                users_obj_list = Users.query.all()
-
-            users_list = list()
-            for user in users_obj_list:
-                user_dict = {
-                    "id": user.id,
-                    "name": user.name,
-                    "created_at": str(user.created_at),
-                    "updated_at": str(user.updated_at),
-                    "email": user.email,
-                    "phonenumber": user.phonenumber,
-                }
-                users_list.append(user_dict)
-            return jsonify(users_list)
+                users_query = users_query.where(Users.name == name)
+            if stream_requested():
+                return stream_response(
+                    users_query, [Users.id], user_serializer.to_dict, after
+                )
+            rows, next_cursor = paginate(users_query, [Users.id], limit, after)
+            users_list = [user_serializer.to_dict(row) for row in rows]
+            return page_response(users_list, next_cursor)
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("users")
     @validate_schema(post_schema)
-    def post(self):
+    def post(self, request_data):
         """ Add single user.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
-        request_data = request.get_json()
         try:
             db_data = Users(
                 name=request_data.get("name"),
@@ -158,15 +180,18 @@ class UsersEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("users")
     @validate_schema(put_schema)
-    def put(self):
+    def put(self, request_data):
         """ Update user data.
 
+        Args:
+            request_data (dict): validated JSON body
+
         Returns:
             response (flask.Response): Flask response object
         """
         try:
-            request_data = request.get_json()
             db_data = Users.query.filter_by(id=request_data.get("id")).first()
             if db_data is None:
                 return error_response(
@@ -202,6 +227,7 @@ class UsersEndpoint(Resource):
         except Exception as err:
             return error_response(err.__repr__())
 
+    @bumps_versions("users")
     def delete(self):
         """ Delete given user using his ID.
 
@@ -0,0 +1,205 @@
+"""
+This file contains ASGI serving mode of the application.
+
+AsgiApp wraps Flask (WSGI) application into ASGI application, so it can be
+served by asyncio server (e.g. uvicorn), which keeps thousands of idle
+keep-alive connections on single event loop. Requests are handled by the same
+Flask application, in bounded pool of worker threads, so slow database work
+never blocks the event loop and request/response contracts are the same as in
+WSGI mode.
+
+Usage (from main repository directory):
+    uvicorn bookings_api:asgi_app
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Event
+
+# number of response messages buffered between worker thread and event loop
+RESPONSE_QUEUE_SIZE = 8
+
+
+class ClientDisconnected(Exception):
+    """ Raised in worker thread when response can not be sent anymore. """
+
+
+def build_environ(scope, body):
+    """ Build WSGI environment of ASGI HTTP request.
+
+    Args:
+        scope (dict): ASGI connection scope
+        body (bytes): request body
+
+    Returns:
+        environ (dict): WSGI environment
+    """
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": "HTTP/{}".format(scope.get("http_version", "1.1")),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"]
+        environ["REMOTE_PORT"] = str(environ["REMOTE_PORT"])
+    for name, value in scope["headers"]:
+        name = name.decode("latin1").upper().replace("-", "_")
+        value = value.decode("latin1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+class AsgiApp:
+    """ ASGI application running WSGI application in worker threads. """
+
+    def __init__(self, wsgi_app, max_workers):
+        """
+        Args:
+            wsgi_app (callable): WSGI application
+            max_workers (int): maximum number of concurrently handled requests
+        """
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def lifespan(self, receive, send):
+        """ Handle server startup and shutdown, wait for running requests. """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self.executor.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        """ Read request, run WSGI application in worker thread and send its
+            response messages.
+
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive coroutine
+            send (callable): ASGI send coroutine
+        """
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(maxsize=RESPONSE_QUEUE_SIZE)
+        disconnected = Event()
+        worker = loop.run_in_executor(
+            self.executor,
+            self.run_wsgi_app,
+            build_environ(scope, bytes(body)),
+            loop,
+            queue,
+            disconnected,
+        )
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await send(message)
+        except BaseException:
+            # release worker thread waiting for free place in the queue
+            disconnected.set()
+            while not queue.empty():
+                queue.get_nowait()
+            raise
+        finally:
+            await asyncio.wait([worker])
+        worker.result()
+
+    def run_wsgi_app(self, environ, loop, queue, disconnected):
+        """ Run WSGI application and pass its response messages to event loop,
+            called in worker thread.
+
+        Streamed responses are iterated in this single thread, so request
+        context of the stream stays in thread which created it.
+
+        Args:
+            environ (dict): WSGI environment
+            loop (asyncio.AbstractEventLoop): event loop of the connection
+            queue (asyncio.Queue): queue of response messages
+            disconnected (threading.Event): set when response can not be sent
+        """
+
+        def put(message):
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        status_headers = list()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None:
+                raise exc_info[1].with_traceback(exc_info[2])
+            status_headers[:] = [status, headers]
+
+        def response_start():
+            status, headers = status_headers
+            return {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin1"), value.encode("latin1"))
+                    for name, value in headers
+                ],
+            }
+
+        try:
+            result = self.wsgi_app(environ, start_response)
+            started = False
+            try:
+                for chunk in result:
+                    if not chunk:
+                        continue
+                    if not started:
+                        put(response_start())
+                        started = True
+                    put(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+            if not started:
+                put(response_start())
+            put({"type": "http.response.body", "body": b"", "more_body": False})
+        except ClientDisconnected:
+            pass
+        finally:
+            if not disconnected.is_set():
+                put(None)
@@ -2,9 +2,14 @@
 This file contains additional commands added to flask CLI.
 """
 import os
+from datetime import date, timedelta
 from subprocess import run
 
+import click
+
 from src.database import db
+from src.database.db_config import configure_sqlite_pragmas
+from src.database.migrations import upgrade_schema
 
 cwd = os.path.dirname(os.path.abspath(__file__))
 DB_ENGINE = db.create_engine("sqlite:////{}/test.db".format(cwd))
@@ -25,8 +30,96 @@ def register_cli_commands(app):
         connection = DB_ENGINE.connect()
         connection.close()
         db.create_all()
+        upgrade_schema(db.engine)
         app.logger.info("Database initialized")
 
+    @app.cli.command("migratedb")
+    def migrate_db_command():
+        """Apply pending database schema migrations. """
+        db.init_app(app)
+        applied = upgrade_schema(db.engine)
+        for version, description in applied:
+            app.logger.info(f"Applied migration {version}: {description}")
+        if not applied:
+            app.logger.info("Database schema is up to date")
+
+    @app.cli.group("slots")
+    def slots_group():
+        """Manage slots. """
+
+    @slots_group.command("generate")
+    @click.option(
+        "--from",
+        "date_from",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        help="First day of generated slots (default: today).",
+    )
+    @click.option(
+        "--to",
+        "date_to",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        help="Last day of generated slots (default: 90 days from today).",
+    )
+    @click.option("--workers", default=1, help="Number of processes generating slots.")
+    @click.option(
+        "--force", is_flag=True, help="Ignore watermarks, fill whole days range."
+    )
+    def generate_slots_command(date_from, date_to, workers, force):
+        """Generate missing slots of all resources. """
+        # slots generation job imports DB_ENGINE from this module
+        from src.cron.add_slots_every_day import (
+            SLOTS_HORIZON_DAYS,
+            format_timing_report,
+            generate_missing_slots,
+        )
+
+        db.init_app(app)
+        date_from = date_from.date() if date_from else date.today()
+        date_to = (
+            date_to.date()
+            if date_to
+            else date.today() + timedelta(days=SLOTS_HORIZON_DAYS)
+        )
+        report = generate_missing_slots(db.engine, date_from, date_to, workers, force)
+        app.logger.info(format_timing_report(report))
+
+    @app.cli.command("seed")
+    @click.option("--resources", default=1000, help="Number of resources.")
+    @click.option("--users", default=10000, help="Number of users.")
+    @click.option("--bookings", default=100000, help="Number of bookings.")
+    @click.option("--slot-days", default=0, help="Number of days of slots.")
+    @click.option("--seed", default=0, help="Seed of random number generator.")
+    @click.option("--chunk-size", default=50000, help="Rows inserted at once.")
+    @click.confirmation_option(prompt="All data will be dropped. Continue?")
+    def seed_command(resources, users, bookings, slot_days, seed, chunk_size):
+        """Recreate the database filled with synthetic data. """
+        # seeding generates slots with job importing DB_ENGINE from this module
+        from src.database.seeding import seed_database
+
+        db.init_app(app)
+        # connections opened from now on use relaxed PRAGMAs
+        configure_sqlite_pragmas(dict(app.config, SQLITE_PRAGMA_PROFILE="bulk"))
+        db.engine.dispose()
+        try:
+            db.drop_all()
+            db.create_all()
+            upgrade_schema(db.engine)
+            report = seed_database(
+                db.engine,
+                resources,
+                users,
+                bookings,
+                slot_days=slot_days,
+                seed=seed,
+                chunk_size=chunk_size,
+            )
+        finally:
+            configure_sqlite_pragmas(app.config)
+            db.engine.dispose()
+        app.logger.info(
+            ", ".join(f"{name}: {value:.2f}" for name, value in report.items())
+        )
+
     @app.cli.command("dropdb")
     def drop_db_command():
         """Drop the database. """
@@ -1,20 +1,40 @@
 """
-This file contains
+This file contains slots generation job, launched once a day by cron.
 """
-from datetime import datetime, timedelta
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import MetaData
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from math import ceil
+from time import perf_counter
 from sqlalchemy import select
-from datetimerange import DateTimeRange
-from dateutil.relativedelta import relativedelta
+import numpy as np
 import subprocess
 
-from src.database.models import Resources, Slots
+from src.database.models import Resources, Slots, SlotsWatermarks
+from src.libs.schedule import Schedule
+from src.libs.slot_capacity import SLOT_CAPACITY, reserved_periods, take_reserved_places
+from src.libs.timeslots import format_timestamps
+from src.libs.versions import table_versions
 from src.cli import DB_ENGINE
 
-connection = DB_ENGINE.connect()
-Session = sessionmaker(bind=DB_ENGINE)
-session = Session()
+SLOTS_HORIZON_DAYS = 90
+
+# resources columns needed to generate slots, picklable for worker processes
+ResourceHours = namedtuple(
+    "ResourceHours",
+    [
+        "id",
+        "intervals",
+        "opening_hours_mon",
+        "opening_hours_tue",
+        "opening_hours_wed",
+        "opening_hours_thu",
+        "opening_hours_fri",
+        "opening_hours_sat",
+        "opening_hours_sun",
+    ],
+)
 
 
 def ensure_cron_service_is_running():
@@ -33,114 +53,241 @@ def ensure_cron_service_is_running():
             print("Cannot start cron service. Error: ", err)
 
 
-def generate_timeslots_dict(work_hours_list, interval):
-    """
+def build_slot_rows(resource_data, first_day, last_day):
+    """ Build slots table rows of given resource for given days range, all
+        places of built slots are free. Slots are built for opening windows
+        only, breaks and closing hours have no rows.
 
     Args:
-        work_hours_list:
-        interval:
+        resource_data (ResourceHours): resource opening hours and intervals
+        first_day (date): first day of generated slots
+        last_day (date): last day of generated slots
 
     Returns:
-
+        slot_rows (list): list of slots table rows dictionaries
     """
-    timeslots_dict = dict()
-    if len(work_hours_list) == 1:
-        time_range = DateTimeRange(work_hours_list[0], work_hours_list[-1])
-        timeslots_dict = {
-            value: 1
-            for value in time_range.range(relativedelta(minutes=+int(interval)))
-        }
-    elif len(work_hours_list) == 4:
-        first_time_range = DateTimeRange(work_hours_list[0], work_hours_list[1])
-        first_timeslots_dict = {
-            value: 1
-            for value in first_time_range.range(relativedelta(minutes=+int(interval)))
-        }
-        second_time_range = DateTimeRange(work_hours_list[1], work_hours_list[2])
-        second_timeslots_dict = {
-            value: 0
-            for value in second_time_range.range(relativedelta(minutes=+int(interval)))
-        }
-        third_time_range = DateTimeRange(work_hours_list[2], work_hours_list[3])
-        third_timeslots_dict = {
-            value: 1
-            for value in third_time_range.range(relativedelta(minutes=+int(interval)))
-        }
-        timeslots_dict.update(first_timeslots_dict)
-        timeslots_dict.update(second_timeslots_dict)
-        timeslots_dict.update(third_timeslots_dict)
-    return timeslots_dict
-
-
-def resultproxy_to_dict_list(sql_alchemy_rowset):
-    """ Convert ResultProxy SQLAlchemy object to list of dictionaries.
+    days = np.arange(np.datetime64(first_day, "D"), np.datetime64(last_day, "D") + 1)
+    starts, ends = Schedule.from_resource(resource_data).timeslots(days)
+    return [
+        dict(
+            resource_id=resource_data.id,
+            timestamp=timestamp,
+            timestamp_end=timestamp_end,
+            formatted_timestamp=formatted_timestamp,
+            formatted_timestamp_end=formatted_timestamp_end,
+            free=SLOT_CAPACITY,
+            available_resources=str(resource_data.id),
+            maximum_capacity=SLOT_CAPACITY,
+        )
+        for timestamp, timestamp_end, formatted_timestamp, formatted_timestamp_end in zip(
+            starts.tolist(),
+            ends.tolist(),
+            format_timestamps(starts),
+            format_timestamps(ends),
+        )
+    ]
+
+
+def build_tasks_slot_rows(tasks):
+    """ Build slots table rows of given generation tasks.
 
     Args:
-        sql_alchemy_rowset (ResultProxy): ResultProxy query result object
+        tasks (list): list of (ResourceHours, first day, last day) tuples
 
     Returns:
+        slot_rows (list): list of slots table rows dictionaries
+    """
+    slot_rows = list()
+    for resource_data, first_day, last_day in tasks:
+        slot_rows.extend(build_slot_rows(resource_data, first_day, last_day))
+    return slot_rows
+
 
+def generate_slot_rows(tasks, workers=1):
+    """ Build slots table rows of all generation tasks.
+
+    With more than one worker tasks list is split into consecutive chunks
+    processed by a pool of processes. Chunks results are joined in tasks
+    order, so generated rows do not depend on number of workers.
+
+    Args:
+        tasks (list): list of (ResourceHours, first day, last day) tuples
+        workers (int): number of worker processes
+
+    Returns:
+        slot_rows (list): list of slots table rows dictionaries
     """
-    return [
-        {tuple[0]: tuple[1] for tuple in rowproxy.items()}
-        for rowproxy in sql_alchemy_rowset
+    if workers <= 1 or len(tasks) < 2:
+        return build_tasks_slot_rows(tasks)
+    # few chunks per worker keep workers busy when some tasks are heavier
+    chunk_size = ceil(len(tasks) / (workers * 4))
+    chunks = [
+        tasks[start : start + chunk_size] for start in range(0, len(tasks), chunk_size)
     ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks_rows = executor.map(build_tasks_slot_rows, chunks)
+        return [slot_row for chunk_rows in chunks_rows for slot_row in chunk_rows]
 
 
-def add_slots_every_day():
-    """ Add slots to the database once a day. """
-    ensure_cron_service_is_running()
-    meta = MetaData(DB_ENGINE, reflect=True)
-    resources_table = meta.tables["resources"]
-    s = select([resources_table])
-    resources_query_result = connection.execute(s)
-    base = datetime.today()
-    end = base + timedelta(days=90)
-    end_str = end.strftime("%Y-%m-%d")
-    day_name = end.strftime("%A")
-    resources_num = len(resultproxy_to_dict_list(resources_query_result))
-    resources_query_result = connection.execute(s)
-    for resource_data in resources_query_result:
-        days_culumns_dict = {
-            "Monday": resource_data.opening_hours_mon,
-            "Tuesday": resource_data.opening_hours_tue,
-            "Wednesday": resource_data.opening_hours_wed,
-            "Thursday": resource_data.opening_hours_thu,
-            "Friday": resource_data.opening_hours_fri,
-            "Saturday": resource_data.opening_hours_sat,
-            "Sunday": resource_data.opening_hours_sun,
-        }
-        dash_count = days_culumns_dict[day_name].count("-")
-        hours = days_culumns_dict[day_name].split("-")
-
-        # do nothing when dash_count == 0, resource does not work this day
-        if dash_count != 0:
-            dates = [
-                datetime.strptime(end_str + " " + hour + ":00", "%Y-%m-%d %H:%M:%S")
-                for hour in hours
-            ]
-            timeslots_dict = generate_timeslots_dict(dates, resource_data.intervals)
-
-            # TODO: get available resources and check if given slot exists
-            for timestamp, free in timeslots_dict.items():
-                # TODO: bug, last slot should not be added
-                timestamp_end = timestamp + timedelta(
-                    minutes=int(resource_data.intervals)
+def plan_generation(resources, watermarks, date_from, date_to, force=False):
+    """ Find days range which has to be generated for every resource.
+
+    Watermark is the last day up to which slots of resource were generated.
+    Only days after watermark are generated, unless force is used. Watermark
+    is moved only when generated range is adjacent to it, so it never jumps
+    over days without slots.
+
+    Args:
+        resources (list): list of ResourceHours tuples
+        watermarks (dict): generated through dates, by resource ID
+        date_from (date): first day of requested range
+        date_to (date): last day of requested range
+        force (bool): generate whole requested range, ignore watermarks
+
+    Returns:
+        plan (tuple): (list of tasks, dict of new watermarks) tuple
+    """
+    tasks = list()
+    new_watermarks = dict()
+    for resource_data in resources:
+        watermark = watermarks.get(resource_data.id)
+        first_day = date_from
+        if watermark is not None and not force:
+            first_day = max(date_from, watermark + timedelta(days=1))
+        if first_day > date_to:
+            continue
+        tasks.append((resource_data, first_day, date_to))
+        if watermark is None:
+            new_watermarks[resource_data.id] = date_to
+        elif first_day <= watermark + timedelta(days=1) and date_to > watermark:
+            new_watermarks[resource_data.id] = date_to
+    return tasks, new_watermarks
+
+
+def generate_missing_slots(engine, date_from, date_to, workers=1, force=False):
+    """ Generate slots of all resources missing in given days range.
+
+    Everything is done in single transaction, which takes database write lock
+    before anything is read (pysqlite begins transaction only before first
+    write statement), so bookings and holds can not be committed between
+    reading their periods and inserting slots. Slots are inserted with
+    INSERT OR IGNORE, so thanks to unique (resource_id, timestamp) index
+    running generation again for the same range does not add anything.
+    Bookings and holds written before slots were generated take their places
+    in generated slots, the same way as if slots existed at booking time.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+        date_from (date): first day of generated slots
+        date_to (date): last day of generated slots
+        workers (int): number of processes generating slots
+        force (bool): generate whole range, ignore watermarks
+
+    Returns:
+        report (dict): numbers of resources and slots and timings in seconds
+    """
+    started = perf_counter()
+    columns = [getattr(Resources, field) for field in ResourceHours._fields]
+    watermarks_table = SlotsWatermarks.__table__
+    with engine.begin() as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        resources = [
+            ResourceHours(*row)
+            for row in connection.execute(select(columns).order_by(Resources.id))
+        ]
+        watermarks = dict(
+            connection.execute(
+                select(
+                    [
+                        watermarks_table.c.resource_id,
+                        watermarks_table.c.generated_through,
+                    ]
                 )
-                db_data = Slots(
-                    timestamp=timestamp,
-                    timestamp_end=timestamp_end,
-                    formatted_timestamp=timestamp.strftime("%A, %B, %d, %Y, %H:%M %p"),
-                    formatted_timestamp_end=timestamp_end.strftime(
-                        "%A, %B, %d, %Y, %H:%M %p"
+            ).fetchall()
+        )
+        tasks, new_watermarks = plan_generation(
+            resources, watermarks, date_from, date_to, force
+        )
+        slot_rows = generate_slot_rows(tasks, workers)
+        if slot_rows:
+            take_reserved_places(
+                slot_rows,
+                reserved_periods(
+                    connection,
+                    datetime.combine(min(task[1] for task in tasks), time.min),
+                    datetime.combine(
+                        max(task[2] for task in tasks) + timedelta(days=1), time.min
                     ),
-                    free=free,
-                    available_resources="2",
-                    maximum_capacity=resources_num,
-                )
-                session.add(db_data)
-                session.commit()
+                ),
+            )
+        generated = perf_counter()
+        inserted = 0
+        if slot_rows:
+            inserted = connection.execute(
+                Slots.__table__.insert().prefix_with("OR IGNORE"), slot_rows
+            ).rowcount
+        if new_watermarks:
+            connection.execute(
+                watermarks_table.insert().prefix_with("OR REPLACE"),
+                [
+                    dict(resource_id=resource_id, generated_through=generated_through)
+                    for resource_id, generated_through in new_watermarks.items()
+                ],
+            )
+        if inserted:
+            table_versions.bump(connection, "slots")
+    finished = perf_counter()
+    return {
+        "workers": workers,
+        "resources": len(tasks),
+        "slots": inserted,
+        "generation_time": generated - started,
+        "insert_time": finished - generated,
+        "total_time": finished - started,
+    }
+
+
+def add_slots_every_day(workers=1):
+    """ Add missing slots of the next SLOTS_HORIZON_DAYS days, once a day.
+
+    Args:
+        workers (int): number of processes generating slots
+
+    Returns:
+        report (dict): numbers of resources and slots and timings in seconds
+    """
+    ensure_cron_service_is_running()
+    today = date.today()
+    return generate_missing_slots(
+        DB_ENGINE, today, today + timedelta(days=SLOTS_HORIZON_DAYS), workers
+    )
+
+
+def format_timing_report(report):
+    """ Format slots generation report.
+
+    Args:
+        report (dict): report returned by generate_missing_slots
+
+    Returns:
+        report_str (str): human readable report
+    """
+    return (
+        "Generated {slots} slots for {resources} resources in {total_time:.3f}s "
+        "using {workers} worker(s) "
+        "(generation: {generation_time:.3f}s, insert: {insert_time:.3f}s)".format(
+            **report
+        )
+    )
 
 
 if __name__ == "__main__":
-    add_slots_every_day()
+    parser = argparse.ArgumentParser(description="Generate slots for all resources.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes generating slots (default: 1)",
+    )
+    args = parser.parse_args()
+    print(format_timing_report(add_slots_every_day(args.workers)))
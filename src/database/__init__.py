@@ -1,3 +1,3 @@
-from flask_sqlalchemy import SQLAlchemy
+from src.database.routing import RoutingSQLAlchemy
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
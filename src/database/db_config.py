@@ -1,19 +1,193 @@
 """
-This file contains SQLite database configuration.
+This file contains SQLite database configuration and SQL query profiling.
+
+Every new SQLite connection gets PRAGMAs of the active profile, selected with
+SQLITE_PRAGMA_PROFILE config option. Values of single PRAGMAs of the profile
+can be overridden with SQLITE_PRAGMAS config option.
+
+Every executed statement is timed and aggregated in query_stats, statements
+taking at least SLOW_QUERY_THRESHOLD seconds are written to the slow query log
+with their parameters and query plan.
 """
+import sqlite3
+from time import perf_counter
+
+from flask import g, has_request_context
 from sqlalchemy.engine import Engine
 from sqlalchemy import event
 
+from config import Config
+from src.libs.query_stats import query_stats
+from src.logger import slow_query_logger
+
+# busy_timeout goes first, so that switching journal mode waits for locks
+PRAGMA_NAMES = (
+    "busy_timeout",
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "foreign_keys",
+)
+
+# PRAGMAs writing to database file, never applied to read-only connections
+FILE_PRAGMA_NAMES = ("journal_mode",)
+
+# name and PRAGMAs of the profile applied to new connections
+sqlite_profile = dict(name=None, pragmas=dict())
+# query profiling options
+query_profile = dict(slow_query_threshold=None)
+
+
+def configure_sqlite_pragmas(config):
+    """ Select PRAGMAs applied to new SQLite connections.
+
+    Args:
+        config (dict): application config
+
+    Raises:
+        ValueError: unknown profile, PRAGMA or improper PRAGMA value
+    """
+    profile_name = config["SQLITE_PRAGMA_PROFILE"]
+    try:
+        pragmas = dict(config["SQLITE_PRAGMA_PROFILES"][profile_name])
+    except KeyError:
+        raise ValueError(f"Unknown SQLite PRAGMA profile: {profile_name}")
+    pragmas.update(config.get("SQLITE_PRAGMAS", dict()))
+    for name, value in pragmas.items():
+        if name not in PRAGMA_NAMES:
+            raise ValueError(f"Unsupported SQLite PRAGMA: {name}")
+        if not str(value).lstrip("-").isalnum():
+            raise ValueError(f"Improper value of SQLite PRAGMA {name}: {value}")
+    sqlite_profile["name"] = profile_name
+    sqlite_profile["pragmas"] = pragmas
+
+
+class ReadOnlyConnection(sqlite3.Connection):
+    """ SQLite connection of database opened with mode=ro URI. """
+
+
+def begin_immediate(session):
+    """ Take SQLite write lock for the rest of session transaction.
+
+    pysqlite begins transaction only before the first data-changing statement,
+    queries executed earlier read snapshot which other processes can change
+    before the write. After BEGIN IMMEDIATE everything read in the transaction
+    stays valid until commit. Nothing is done if transaction already writes.
+
+    Args:
+        session (sqlalchemy.orm.Session): session of the write transaction
+    """
+    if not session.connection().connection.in_transaction:
+        session.execute("BEGIN IMMEDIATE")
+
+
+def get_sqlite_pragmas(connection):
+    """ Read values of supported PRAGMAs from the database.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+
+    Returns:
+        pragmas (dict): PRAGMA values, by name
+    """
+    return {
+        name: connection.execute(f"PRAGMA {name}").scalar() for name in PRAGMA_NAMES
+    }
+
 
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
-    """ Listen for SQLAlchemy engine connection and set foreign keys support
-        for SQLite.
+    """ Listen for SQLAlchemy engine connection and apply PRAGMAs of active
+        profile to SQLite connection. Journal mode is not switched by read-only
+        connections, it is set by connections of primary engine.
 
     Args:
         dbapi_connection (object): database connection object
         connection_record (object):
     """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    pragmas = sqlite_profile["pragmas"]
+    read_only = isinstance(dbapi_connection, ReadOnlyConnection)
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for name in PRAGMA_NAMES:
+        if read_only and name in FILE_PRAGMA_NAMES:
+            continue
+        if name in pragmas:
+            cursor.execute(f"PRAGMA {name}={pragmas[name]}")
     cursor.close()
+
+
+def configure_query_profiling(config):
+    """ Set threshold of slow query log.
+
+    Args:
+        config (dict): application config
+    """
+    query_profile["slow_query_threshold"] = config["SLOW_QUERY_THRESHOLD"]
+
+
+def explain_query_plan(cursor, statement, parameters):
+    """ Get query plan of executed statement.
+
+    Args:
+        cursor (sqlite3.Cursor): cursor which executed the statement
+        statement (str): SQL statement
+        parameters (tuple): statement parameters
+
+    Returns:
+        plan (list): list of query plan steps descriptions
+    """
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in explain_cursor.fetchall()]
+    except sqlite3.Error as err:
+        return [f"EXPLAIN QUERY PLAN failed: {err}"]
+    finally:
+        explain_cursor.close()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    """ Listen for statement execution start and count query of request.
+
+    Start time is kept in execution context of the statement, so nothing is
+    left behind when statement fails.
+    """
+    if context is not None:
+        context.query_start = perf_counter()
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    """ Listen for statement execution end, record its time and write it to
+        slow query log if it took too long.
+    """
+    query_start = getattr(context, "query_start", None)
+    if query_start is None:
+        return
+    duration = perf_counter() - query_start
+    query_stats.record(statement, duration)
+    threshold = query_profile["slow_query_threshold"]
+    if threshold is None or duration < threshold:
+        return
+    if executemany or not isinstance(cursor, sqlite3.Cursor):
+        plan = list()
+    else:
+        plan = explain_query_plan(cursor, statement, parameters)
+    slow_query_logger.warning(
+        "Slow query (%.3f s): %s; parameters: %r; plan: %s",
+        duration,
+        " ".join(statement.split()),
+        parameters,
+        " | ".join(plan),
+    )
+
+
+configure_sqlite_pragmas(vars(Config))
+configure_query_profiling(vars(Config))
@@ -0,0 +1,146 @@
+"""
+This file contains versioned database schema migrations.
+
+Schema version of SQLite database is kept in PRAGMA user_version. Every
+migration is a (version, description, statements) tuple, statements are
+applied in order and have to be idempotent, because database created with
+db.create_all() already contains schema defined in models. Statement is
+either SQL string or function called with database connection.
+"""
+
+
+def add_column(table, column, definition):
+    """ Create migration step adding column unless table already has it.
+
+    Args:
+        table (str): table name
+        column (str): column name
+        definition (str): column type and constraints
+
+    Returns:
+        step (function): function adding column, called with connection
+    """
+
+    def step(connection):
+        columns = [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    return step
+
+
+MIGRATIONS = [
+    (
+        1,
+        "Add indexes used by bookings and slots range queries",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_bookings_resource_id_booked_from_booked_to "
+            "ON bookings (resource_id, booked_from, booked_to)",
+            "CREATE INDEX IF NOT EXISTS ix_bookings_user_id ON bookings (user_id)",
+            "CREATE INDEX IF NOT EXISTS ix_bookings_booked_from "
+            "ON bookings (booked_from)",
+            "CREATE INDEX IF NOT EXISTS ix_slots_timestamp ON slots (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_slots_timestamp_end "
+            "ON slots (timestamp_end)",
+        ],
+    ),
+    (
+        2,
+        "Add slots resource_id and per-resource slots generation watermarks",
+        [
+            add_column(
+                "slots",
+                "resource_id",
+                "INTEGER REFERENCES resources (id) ON DELETE CASCADE",
+            ),
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_slots_resource_id_timestamp "
+            "ON slots (resource_id, timestamp)",
+            "CREATE TABLE IF NOT EXISTS slots_watermarks ("
+            "resource_id INTEGER NOT NULL, "
+            "generated_through DATE NOT NULL, "
+            "PRIMARY KEY (resource_id), "
+            "FOREIGN KEY(resource_id) REFERENCES resources (id) ON DELETE CASCADE)",
+        ],
+    ),
+    (
+        3,
+        "Add temporary holds with expiry index",
+        [
+            "CREATE TABLE IF NOT EXISTS holds ("
+            "id INTEGER NOT NULL, "
+            "resource_id INTEGER NOT NULL, "
+            "user_id INTEGER NOT NULL, "
+            "held_from DATETIME NOT NULL, "
+            "held_to DATETIME NOT NULL, "
+            "expires_at DATETIME NOT NULL, "
+            "PRIMARY KEY (id), "
+            "FOREIGN KEY(resource_id) REFERENCES resources (id), "
+            "FOREIGN KEY(user_id) REFERENCES users (id))",
+            "CREATE INDEX IF NOT EXISTS ix_holds_expires_at ON holds (expires_at)",
+        ],
+    ),
+    (
+        4,
+        "Add table versions shared by all processes",
+        [
+            "CREATE TABLE IF NOT EXISTS table_versions ("
+            "name VARCHAR NOT NULL, "
+            "version INTEGER NOT NULL, "
+            "PRIMARY KEY (name))"
+        ],
+    ),
+    (
+        5,
+        "Add holds index used by overlap checks",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_holds_resource_id_held_from_held_to "
+            "ON holds (resource_id, held_from, held_to)"
+        ],
+    ),
+    (
+        6,
+        "Store ETags epoch in table versions",
+        [
+            "INSERT OR IGNORE INTO table_versions (name, version) "
+            "VALUES ('__epoch__', abs(random()) % 2147483648)"
+        ],
+    ),
+]
+
+
+def get_schema_version(connection):
+    """ Get schema version of the database.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+
+    Returns:
+        version (int): current schema version, 0 for not migrated database
+    """
+    return connection.execute("PRAGMA user_version").scalar()
+
+
+def upgrade_schema(engine):
+    """ Apply all pending migrations.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+
+    Returns:
+        applied (list): list of applied (version, description) tuples
+    """
+    applied = list()
+    with engine.connect() as connection:
+        current_version = get_schema_version(connection)
+        for version, description, statements in MIGRATIONS:
+            if version <= current_version:
+                continue
+            with connection.begin():
+                for statement in statements:
+                    if callable(statement):
+                        statement(connection)
+                    else:
+                        connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {version}")
+            applied.append((version, description))
+    return applied
@@ -9,6 +9,17 @@ from src.database import db
 class Bookings(db.Model):
     """ Create bookings database table. """
 
+    __table_args__ = (
+        db.Index(
+            "ix_bookings_resource_id_booked_from_booked_to",
+            "resource_id",
+            "booked_from",
+            "booked_to",
+        ),
+        db.Index("ix_bookings_user_id", "user_id"),
+        db.Index("ix_bookings_booked_from", "booked_from"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     resource_id = db.Column(db.Integer, db.ForeignKey("resources.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -21,10 +32,48 @@ class Bookings(db.Model):
         return "<Booking: {}>" % self.notes
 
 
+class Holds(db.Model):
+    """ Create temporary holds database table. """
+
+    # expired holds are swept in expiry order, without scanning the table
+    __table_args__ = (
+        db.Index("ix_holds_expires_at", "expires_at"),
+        db.Index(
+            "ix_holds_resource_id_held_from_held_to",
+            "resource_id",
+            "held_from",
+            "held_to",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    resource_id = db.Column(db.Integer, db.ForeignKey("resources.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    held_from = db.Column(db.DateTime, nullable=False)
+    held_to = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return "<Hold of resource {} from {} to {} expiring at {}>".format(
+            self.resource_id, self.held_from, self.held_to, self.expires_at
+        )
+
+
 class Slots(db.Model):
     """ Create slots database table. """
 
+    __table_args__ = (
+        db.Index("ix_slots_timestamp", "timestamp"),
+        db.Index("ix_slots_timestamp_end", "timestamp_end"),
+        db.Index(
+            "uq_slots_resource_id_timestamp", "resource_id", "timestamp", unique=True
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    resource_id = db.Column(
+        db.Integer, db.ForeignKey("resources.id", ondelete="CASCADE")
+    )
     timestamp = db.Column(db.DateTime, nullable=False)
     timestamp_end = db.Column(db.DateTime, nullable=False)
     formatted_timestamp = db.Column(db.String, nullable=False)
@@ -39,6 +88,35 @@ class Slots(db.Model):
         )
 
 
+class SlotsWatermarks(db.Model):
+    """ Create slots generation watermarks database table. """
+
+    resource_id = db.Column(
+        db.Integer,
+        db.ForeignKey("resources.id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    generated_through = db.Column(db.Date, nullable=False)
+
+    def __repr__(self):
+        return "<Slots of resource {} generated through {}>".format(
+            self.resource_id, self.generated_through
+        )
+
+
+class Versions(db.Model):
+    """ Create table versions database table. """
+
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return "<Version of table {}: {}>".format(self.name, self.version)
+
+
 class Resources(db.Model):
     """ Create resources database table. """
 
@@ -0,0 +1,90 @@
+"""
+This file contains routing of database sessions between primary and read-only
+engines.
+
+Queries of GET (and HEAD) requests are sent to a separate read-only engine
+with its own connection pool, SQLite database is opened there with mode=ro
+URI. With WAL journal readers never take locks needed by writers, so long
+reads do not delay booking commits. Everything else (writes, CLI commands,
+code running outside of request) uses primary engine.
+"""
+import os
+import sqlite3
+from threading import Lock
+
+from flask import has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import create_engine, orm
+from sqlalchemy.pool import QueuePool
+
+from src.database.db_config import ReadOnlyConnection
+
+READ_METHODS = ("GET", "HEAD")
+
+read_engines = dict()
+read_engines_lock = Lock()
+
+
+def get_read_engine(app, primary_engine):
+    """ Get read-only engine of the application, create it on first use.
+
+    Args:
+        app (flask.Flask): Flask application object
+        primary_engine (sqlalchemy.engine.Engine): primary engine
+
+    Returns:
+        engine (sqlalchemy.engine.Engine): read-only engine, primary engine
+                                           if database can not be opened
+                                           read-only (in-memory or not SQLite)
+    """
+    url = primary_engine.url
+    if url.drivername != "sqlite" or url.database in (None, "", ":memory:"):
+        return primary_engine
+    key = (app, url.database)
+    with read_engines_lock:
+        engine = read_engines.get(key)
+        if engine is None:
+            # connections of primary engine switch journal mode of database
+            # file (e.g. to WAL) when opened, read-only connections can not
+            primary_engine.raw_connection().close()
+            # realpath drops extra leading slashes, taken as URI authority
+            uri = f"file:{os.path.realpath(url.database)}?mode=ro"
+            engine = create_engine(
+                "sqlite://",
+                creator=lambda: sqlite3.connect(
+                    uri, uri=True, check_same_thread=False, factory=ReadOnlyConnection
+                ),
+                poolclass=QueuePool,
+                pool_size=app.config["READ_POOL_SIZE"],
+                max_overflow=app.config["READ_MAX_OVERFLOW"],
+                pool_timeout=app.config["READ_POOL_TIMEOUT"],
+            )
+            read_engines[key] = engine
+    return engine
+
+
+class RoutingSession(SignallingSession):
+    """ Session sending queries of read requests to read-only engine. """
+
+    def get_bind(self, mapper=None, clause=None):
+        if (
+            self.app.config["READ_ONLY_ENGINE"]
+            and not self._flushing
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            return get_read_engine(self.app, self.bind)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """ Flask-SQLAlchemy extension using RoutingSession. """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, info, options):
+        super().apply_driver_hacks(app, info, options)
+        # pysqlite uses NullPool for database files, pool size needs a queue
+        if options.get("pool_size") and "poolclass" not in options:
+            options["poolclass"] = QueuePool
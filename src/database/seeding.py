@@ -0,0 +1,271 @@
+"""
+This file contains generation of synthetic data for scale testing.
+
+Rows are generated from seeded random number generator, so the same seed and
+volumes give the same database. Resources get opening hours and intervals
+picked from typical weekly schedules, bookings of every resource follow each
+other with random gaps and durations, so they never overlap.
+
+Rows are written with raw DB-API executemany() in chunks, one transaction per
+table, and indexes of the table are created after all rows are inserted.
+Relaxed PRAGMAs ("bulk" profile) should be active during seeding.
+"""
+import itertools
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+
+from src.cron.add_slots_every_day import generate_missing_slots
+from src.database.models import Bookings, Resources, Users
+from src.libs.versions import table_versions
+
+SEED_START = datetime(2019, 6, 17, 8, 0)
+SEED_CHUNK_SIZE = 50000
+
+# weekly opening hours, None for closed days
+OPENING_HOURS_TEMPLATES = (
+    ("08:00-16:00",) * 5 + (None, None),
+    ("08:00-12:00-12:30-16:00",) * 5 + (None, None),
+    ("07:00-19:00",) * 5 + ("09:00-14:00", None),
+    ("10:00-22:00",) * 7,
+    ("09:00-13:00-14:00-18:00",) * 4 + ("09:00-15:00", "10:00-14:00", None),
+)
+INTERVALS = ("15", "30", "60")
+# bookings durations and gaps between bookings of resource, in minutes
+BOOKING_DURATIONS = (30, 60, 60, 90, 120)
+BOOKING_GAPS = (0, 0, 30, 60, 120, 960)
+
+
+def sqlite_datetimes(values):
+    """ Format datetimes the way SQLAlchemy stores them in SQLite.
+
+    Args:
+        values (numpy.ndarray): datetime64 values
+
+    Returns:
+        formatted (list): list of "YYYY-MM-DD HH:MM:SS.ffffff" strings
+    """
+    return [
+        value.replace("T", " ")
+        for value in np.datetime_as_string(values, unit="us").tolist()
+    ]
+
+
+def chunked(rows, chunk_size):
+    """ Split rows into lists of at most chunk_size rows. """
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resource_chunks(count, rng, created_at, chunk_size):
+    """ Generate resources rows.
+
+    Args:
+        count (int): number of resources
+        rng (numpy.random.RandomState): random number generator
+        created_at (datetime): creation time of resources
+        chunk_size (int): maximum number of rows in chunk
+
+    Returns:
+        chunks (generator): lists of resources rows tuples
+    """
+    timestamp = sqlite_datetimes(np.array([created_at], dtype="datetime64[us]"))[0]
+    templates = rng.randint(len(OPENING_HOURS_TEMPLATES), size=count).tolist()
+    intervals = rng.randint(len(INTERVALS), size=count).tolist()
+    rows = (
+        (f"Resource {number}", timestamp, timestamp, 1, INTERVALS[interval])
+        + OPENING_HOURS_TEMPLATES[template]
+        for number, template, interval in zip(range(1, count + 1), templates, intervals)
+    )
+    return chunked(rows, chunk_size)
+
+
+def user_chunks(count, rng, created_at, chunk_size):
+    """ Generate users rows.
+
+    Args:
+        count (int): number of users
+        rng (numpy.random.RandomState): random number generator
+        created_at (datetime): creation time of users
+        chunk_size (int): maximum number of rows in chunk
+
+    Returns:
+        chunks (generator): lists of users rows tuples
+    """
+    timestamp = sqlite_datetimes(np.array([created_at], dtype="datetime64[us]"))[0]
+    phonenumbers = rng.randint(10 ** 9, size=count).tolist()
+    rows = (
+        (
+            timestamp,
+            timestamp,
+            f"User {number}",
+            f"user{number}@example.com",
+            "%09d" % phone,
+        )
+        for number, phone in zip(range(1, count + 1), phonenumbers)
+    )
+    return chunked(rows, chunk_size)
+
+
+def booking_chunks(count, resources_num, users_num, rng, start, chunk_size):
+    """ Generate non-overlapping bookings rows, spread over all resources.
+
+    Chunks hold whole rounds of bookings (one booking of every resource), times
+    of all bookings of chunk are computed at once as cumulative sums of random
+    gaps and durations, starting from ends of previous bookings.
+
+    Args:
+        count (int): number of bookings
+        resources_num (int): number of resources
+        users_num (int): number of users
+        rng (numpy.random.RandomState): random number generator
+        start (datetime): start of the first booking of every resource
+        chunk_size (int): maximum number of rows in chunk (at least one round)
+
+    Returns:
+        chunks (generator): lists of bookings rows tuples
+    """
+    start = np.datetime64(start, "m")
+    rounds = max(1, chunk_size // resources_num)
+    # end of the last booking of every resource, in minutes from start
+    ends = np.zeros(resources_num, dtype=np.int64)
+    resource_ids = np.arange(1, resources_num + 1)
+    for first in range(0, count, rounds * resources_num):
+        rows_num = min(rounds * resources_num, count - first)
+        chunk_rounds = -(-rows_num // resources_num)
+        gaps = rng.choice(BOOKING_GAPS, size=(chunk_rounds, resources_num))
+        durations = rng.choice(BOOKING_DURATIONS, size=(chunk_rounds, resources_num))
+        booked_to = ends + np.cumsum(gaps + durations, axis=0)
+        booked_from = booked_to - durations
+        ends = booked_to[-1]
+        # bookings times repeat a lot, every distinct time is formatted once
+        times, positions = np.unique(
+            np.concatenate(
+                [booked_from.ravel()[:rows_num], booked_to.ravel()[:rows_num]]
+            ),
+            return_inverse=True,
+        )
+        formatted = np.array(sqlite_datetimes(start + times), dtype=object)[positions]
+        yield list(
+            zip(
+                np.tile(resource_ids, chunk_rounds)[:rows_num].tolist(),
+                rng.randint(1, users_num + 1, size=rows_num).tolist(),
+                formatted[:rows_num].tolist(),
+                formatted[rows_num:].tolist(),
+                itertools.repeat(None),
+            )
+        )
+
+
+def bulk_insert(connection, table, columns, chunks):
+    """ Insert rows into table in single transaction, create table indexes
+        after the rows are inserted.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+        table (sqlalchemy.Table): table
+        columns (tuple): names of columns, in order of rows values
+        chunks (iterable): lists of rows tuples
+
+    Returns:
+        inserted (int): number of inserted rows
+    """
+    statement = "INSERT INTO {} ({}) VALUES ({})".format(
+        table.name, ", ".join(columns), ", ".join("?" * len(columns))
+    )
+    inserted = 0
+    with connection.begin():
+        for index in table.indexes:
+            index.drop(connection)
+        cursor = connection.connection.cursor()
+        try:
+            for chunk in chunks:
+                cursor.executemany(statement, chunk)
+                inserted += len(chunk)
+        finally:
+            cursor.close()
+        for index in table.indexes:
+            index.create(connection)
+        if inserted:
+            table_versions.bump(connection, table.name)
+    return inserted
+
+
+def seed_database(
+    engine,
+    resources,
+    users,
+    bookings,
+    slot_days=0,
+    seed=0,
+    start=SEED_START,
+    chunk_size=SEED_CHUNK_SIZE,
+):
+    """ Fill empty database with synthetic data.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+        resources (int): number of resources
+        users (int): number of users
+        bookings (int): number of bookings
+        slot_days (int): number of days of generated slots, from start day
+        seed (int): seed of random number generator
+        start (datetime): creation time of rows and start of first bookings
+        chunk_size (int): number of rows passed to single executemany()
+
+    Returns:
+        report (dict): numbers of inserted rows and timings in seconds
+    """
+    rng = np.random.RandomState(seed)
+    report = dict()
+    started = perf_counter()
+    with engine.connect() as connection:
+        tables = (
+            (
+                Resources.__table__,
+                (
+                    "title",
+                    "created_at",
+                    "updated_at",
+                    "active",
+                    "intervals",
+                    "opening_hours_mon",
+                    "opening_hours_tue",
+                    "opening_hours_wed",
+                    "opening_hours_thu",
+                    "opening_hours_fri",
+                    "opening_hours_sat",
+                    "opening_hours_sun",
+                ),
+                resource_chunks(resources, rng, start, chunk_size),
+            ),
+            (
+                Users.__table__,
+                ("created_at", "updated_at", "name", "email", "phonenumber"),
+                user_chunks(users, rng, start, chunk_size),
+            ),
+            (
+                Bookings.__table__,
+                ("resource_id", "user_id", "booked_from", "booked_to", "notes"),
+                booking_chunks(bookings, resources, users, rng, start, chunk_size)
+                if resources and users
+                else (),
+            ),
+        )
+        for table, columns, chunks in tables:
+            table_started = perf_counter()
+            report[table.name] = bulk_insert(connection, table, columns, chunks)
+            report[f"{table.name}_time"] = perf_counter() - table_started
+    if slot_days:
+        slots_report = generate_missing_slots(
+            engine, start.date(), start.date() + timedelta(days=slot_days - 1)
+        )
+        report["slots"] = slots_report["slots"]
+        report["slots_time"] = slots_report["total_time"]
+    report["total_time"] = perf_counter() - started
+    return report
@@ -0,0 +1,36 @@
+"""
+This file contains free time windows computation used by availability endpoint.
+"""
+
+
+def free_windows(open_windows, busy, min_duration):
+    """ Subtract busy intervals from opening windows in single sweep.
+
+    Both lists have to be sorted by start. Busy interval spanning many
+    opening windows (e.g. booking over the lunch break) cuts all of them.
+
+    Args:
+        open_windows (list): (open, close) datetime tuples
+        busy (list): (start, end, ...) tuples, e.g. bookings intervals
+        min_duration (timedelta): shortest returned free window
+
+    Returns:
+        windows (list): free (start, end) datetime tuples
+    """
+    windows = list()
+    first_busy = 0
+    for window_open, window_close in open_windows:
+        # busy intervals ending before this window do not affect next ones
+        while first_busy < len(busy) and busy[first_busy][1] <= window_open:
+            first_busy += 1
+        cursor = window_open
+        position = first_busy
+        while position < len(busy) and busy[position][0] < window_close:
+            busy_start, busy_end = busy[position][0], busy[position][1]
+            if busy_start > cursor and busy_start - cursor >= min_duration:
+                windows.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            position += 1
+        if window_close > cursor and window_close - cursor >= min_duration:
+            windows.append((cursor, window_close))
+    return windows
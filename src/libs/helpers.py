@@ -1,23 +1,29 @@
+from datetime import datetime, timedelta
+
 from flask import jsonify, request
-from jsonschema import Draft4Validator
+
+from src.libs.validation import compile_schema
 
 
 def validate_schema(schema):
     """ Validate JSON schema decorator, applicable on all REST API methods.
 
+    Schema is compiled once, when decorator is applied. Request body is parsed
+    once and passed to the decorated method as request_data argument.
+
     Args:
         schema (dict): expected JSON schema
 
     Returns:
         wrapper: JSON validator
     """
-    validator = Draft4Validator(schema)
+    validate = compile_schema(schema)
 
     def wrapper(fn):
         def validate_json(*args, **kwargs):
             """ Validate given JSON schema from HTTP request. """
             request_data = request.get_json(force=True)
-            errors = [error.message for error in validator.iter_errors(request_data)]
+            errors = validate(request_data)
             if errors:
                 response = jsonify(
                     dict(success=False, message="Invalid input", errors=errors)
@@ -25,7 +31,7 @@ def validate_schema(schema):
                 response.status_code = 406
                 return response
             else:
-                return fn(*args, **kwargs)
+                return fn(*args, request_data, **kwargs)
 
         return validate_json
 
@@ -44,3 +50,19 @@ def error_response(err, msg="Internal server error", err_code=500):
     response = jsonify(dict(success=False, message=msg, errors=err))
     response.status_code = err_code
     return response
+
+
+def day_range(date_str):
+    """ Convert date into half-open datetime range covering whole day.
+
+    Comparing raw column against range bounds (instead of wrapping column
+    in date() function) lets database use index on that column.
+
+    Args:
+        date_str (str): date in YYYY-MM-DD format
+
+    Returns:
+        day_range (tuple): (day start, next day start) datetime tuple
+    """
+    day_start = datetime.strptime(date_str, "%Y-%m-%d")
+    return day_start, day_start + timedelta(days=1)
@@ -0,0 +1,307 @@
+"""
+This file contains expiry of temporary holds and overlap checks of bookings
+and holds.
+
+Hold takes places in slots and is stored in bookings interval index (under
+HoldKey item ID), so it counts against availability like a booking until it
+expires. Expired holds are swept in batches ordered by ix_holds_expires_at
+index: hold row is deleted and its slots places are given back in the same
+transaction, only when the delete matched the row, so holds swept by many
+processes at once are never released twice. Expired hold does not block new
+bookings, it is swept as soon as one overlaps it.
+
+Interval index is a per-process fast path of overlap checks. Every write
+checks for overlaps in the database again (find_stored_conflict) under
+SQLite write lock, which is the only check seeing writes of other processes.
+"""
+from collections import namedtuple
+from datetime import datetime
+from threading import Event, Lock, Thread
+
+from sqlalchemy import and_, select
+
+from src.database.models import Bookings, Holds, db
+from src.libs.slot_capacity import release_slots
+from src.libs.versions import table_versions
+
+bookings_table = Bookings.__table__
+holds_table = Holds.__table__
+
+# item ID of hold stored in bookings interval index
+HoldKey = namedtuple("HoldKey", ["id", "expires_at"])
+
+
+def is_expired(item_id, now):
+    """ Check if interval index item is a hold expired before now. """
+    return isinstance(item_id, HoldKey) and item_id.expires_at <= now
+
+
+def active_intervals(intervals, now=None):
+    """ Skip intervals of expired holds not swept yet.
+
+    Args:
+        intervals (list): (start, end, item_id) tuples of interval index
+        now (datetime): current time
+
+    Returns:
+        intervals (list): intervals of bookings and active holds
+    """
+    now = now or datetime.now()
+    return [interval for interval in intervals if not is_expired(interval[2], now)]
+
+
+def expire_holds(connection, rows, now):
+    """ Delete expired holds and give back their slots places.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+        rows (list): (id, resource_id, held_from, held_to) rows of holds
+        now (datetime): current time, holds expiring later are kept
+
+    Returns:
+        expired (int): number of deleted holds
+    """
+    expired = 0
+    with connection.begin():
+        for hold_id, resource_id, held_from, held_to in rows:
+            deleted = connection.execute(
+                holds_table.delete().where(
+                    and_(holds_table.c.id == hold_id, holds_table.c.expires_at <= now)
+                )
+            ).rowcount
+            if deleted:
+                release_slots(connection, resource_id, held_from, held_to)
+                expired += 1
+        if expired:
+            table_versions.bump(connection, "holds", "slots")
+    return expired
+
+
+def find_stored_conflict(connection, resource_id, start, end, item_id=None):
+    """ Find booking or active hold overlapping given period in the database.
+
+    Result is up to date only if connection holds SQLite write lock, see
+    begin_immediate.
+
+    Args:
+        connection (sqlalchemy.orm.Session): session or database connection
+        resource_id (int): resource ID
+        start (datetime): beginning of checked period
+        end (datetime): end of checked period
+        item_id (int or HoldKey): ID of checked booking or hold, skipped
+
+    Returns:
+        item_id (int or HoldKey): ID of overlapping item, None if there is none
+    """
+    query = select([bookings_table.c.id]).where(
+        and_(
+            bookings_table.c.resource_id == resource_id,
+            bookings_table.c.booked_from < end,
+            bookings_table.c.booked_to > start,
+        )
+    )
+    if item_id is not None and not isinstance(item_id, HoldKey):
+        query = query.where(bookings_table.c.id != item_id)
+    booking_id = connection.execute(query.limit(1)).scalar()
+    if booking_id is not None:
+        return booking_id
+    query = select([holds_table.c.id, holds_table.c.expires_at]).where(
+        and_(
+            holds_table.c.resource_id == resource_id,
+            holds_table.c.held_from < end,
+            holds_table.c.held_to > start,
+            holds_table.c.expires_at > datetime.now(),
+        )
+    )
+    if isinstance(item_id, HoldKey):
+        query = query.where(holds_table.c.id != item_id.id)
+    hold = connection.execute(query.limit(1)).first()
+    return HoldKey(*hold) if hold is not None else None
+
+
+def stored_intervals(connection, resource_id, start=None, end=None):
+    """ Get bookings and holds of given resource from the database.
+
+    Args:
+        connection (sqlalchemy.orm.Session): session or database connection
+        resource_id (int): resource ID
+        start (datetime): beginning of range, whole history if not given
+        end (datetime): end of range (exclusive), whole future if not given
+
+    Returns:
+        intervals (list): (start, end, item_id) tuples sorted by start, item
+                          ID of hold is HoldKey
+    """
+    intervals = list()
+    for table, from_column, to_column, columns in (
+        (bookings_table, "booked_from", "booked_to", ["id"]),
+        (holds_table, "held_from", "held_to", ["id", "expires_at"]),
+    ):
+        interval_from = table.c[from_column]
+        interval_to = table.c[to_column]
+        conditions = [table.c.resource_id == resource_id]
+        if start is not None:
+            conditions.append(interval_to > start)
+        if end is not None:
+            conditions.append(interval_from < end)
+        query = select(
+            [interval_from, interval_to] + [table.c[column] for column in columns]
+        ).where(and_(*conditions))
+        for row in connection.execute(query):
+            item_id = row[2] if table is bookings_table else HoldKey(*row[2:])
+            intervals.append((row[0], row[1], item_id))
+    return sorted(intervals, key=lambda interval: interval[0])
+
+
+def find_conflict(engine, index, resource_id, start, end, item_id=None):
+    """ Find booking or active hold overlapping given period in bookings
+        index, expired holds in the way are swept first.
+
+    Conflict found in the index is confirmed in the database, intervals of
+    resource are reloaded from the database if index is outdated. Nothing is
+    checked until index is loaded, write has to check the database anyway.
+    Index lock is held only while index is read or changed.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+        index (IntervalIndex): bookings index
+        resource_id (int): resource ID
+        start (datetime): beginning of checked period
+        end (datetime): end of checked period
+        item_id (int or HoldKey): ID of moved booking, skipped
+
+    Returns:
+        item_id (int or HoldKey): ID of overlapping item, None if there is none
+    """
+    now = datetime.now()
+    expired_query = select(
+        [
+            holds_table.c.id,
+            holds_table.c.resource_id,
+            holds_table.c.held_from,
+            holds_table.c.held_to,
+            holds_table.c.expires_at,
+        ]
+    ).where(
+        and_(
+            holds_table.c.resource_id == resource_id,
+            holds_table.c.held_from < end,
+            holds_table.c.held_to > start,
+            holds_table.c.expires_at <= now,
+        )
+    )
+    with engine.connect() as connection:
+        expired = connection.execute(expired_query).fetchall()
+        if expired:
+            expire_holds(connection, [row[:4] for row in expired], now)
+            with index.lock:
+                for hold_id, _, held_from, _, expires_at in expired:
+                    index.remove(resource_id, held_from, HoldKey(hold_id, expires_at))
+        with index.lock:
+            if not index.loaded:
+                return None
+            conflict_id = index.find_overlap(resource_id, start, end)
+        if conflict_id is None:
+            return None
+        stored_id = find_stored_conflict(connection, resource_id, start, end, item_id)
+        if stored_id is None and conflict_id != item_id:
+            # e.g. booking deleted or hold swept by other process
+            index.load_resource(resource_id, stored_intervals(connection, resource_id))
+        return stored_id
+
+
+def sweep_expired_holds(engine, index, batch_size, now=None):
+    """ Expire all holds expired before now, in batches.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database engine
+        index (IntervalIndex): bookings index
+        batch_size (int): number of holds expired in single transaction
+        now (datetime): current time
+
+    Returns:
+        expired (int): number of deleted holds
+    """
+    now = now or datetime.now()
+    expired = 0
+    query = (
+        select(
+            [
+                holds_table.c.id,
+                holds_table.c.resource_id,
+                holds_table.c.held_from,
+                holds_table.c.held_to,
+                holds_table.c.expires_at,
+            ]
+        )
+        .where(holds_table.c.expires_at <= now)
+        .order_by(holds_table.c.expires_at)
+        .limit(batch_size)
+    )
+    with engine.connect() as connection:
+        while True:
+            rows = connection.execute(query).fetchall()
+            if not rows:
+                break
+            expired += expire_holds(connection, [row[:4] for row in rows], now)
+            with index.lock:
+                # holds deleted by other process are dropped from index as well
+                for hold_id, resource_id, held_from, _, expires_at in rows:
+                    index.remove(resource_id, held_from, HoldKey(hold_id, expires_at))
+            if len(rows) < batch_size:
+                break
+    return expired
+
+
+class HoldsSweeper:
+    """ Background thread expiring holds every few seconds. """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app, index):
+        """ Start sweeping thread, unless it is running or disabled.
+
+        Args:
+            app (flask.Flask): Flask application
+            index (IntervalIndex): bookings index
+        """
+        interval = app.config["HOLDS_SWEEP_INTERVAL"]
+        with self._lock:
+            if not interval or self.running:
+                return
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self.run,
+                args=(app, index, interval),
+                name="holds-sweeper",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def run(self, app, index, interval):
+        with app.app_context():
+            while not self._stopped.wait(interval):
+                try:
+                    sweep_expired_holds(
+                        db.engine, index, app.config["HOLDS_SWEEP_BATCH_SIZE"]
+                    )
+                except Exception:
+                    app.logger.exception("Sweeping expired holds failed")
+
+    def stop(self):
+        """ Stop sweeping thread and wait for it. """
+        with self._lock:
+            self._stopped.set()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+
+holds_sweeper = HoldsSweeper()
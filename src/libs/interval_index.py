@@ -0,0 +1,273 @@
+"""
+This file contains in-memory interval index used to detect overlapping bookings.
+
+Index lives in memory of the process and is kept in sync only by writes done
+by this process. It is a fast path only: every booking and hold write checks
+for overlaps in the database as well, inside its write transaction, so many
+worker processes can not accept overlapping bookings. Conflicts found in the
+index are confirmed in the database before the request is rejected.
+
+Index is built in background thread (see start_loading), writes done while it
+is loaded are recorded in a journal and replayed on the loaded rows.
+"""
+from bisect import bisect_left
+from threading import RLock
+
+
+def build_intervals(rows):
+    """ Sort intervals per resource, keep overlapping ones aside.
+
+    Args:
+        rows (iterable): (resource_id, start, end, item_id) tuples
+
+    Returns:
+        intervals (tuple): starts, intervals and overlapping intervals
+                           dictionaries keyed by resource ID
+    """
+    starts = dict()
+    intervals = dict()
+    overlapping = dict()
+    # the latest end of intervals of current resource in sorted lists
+    max_end = None
+    current_resource = None
+    for resource_id, start, end, item_id in sorted(
+        rows, key=lambda row: (row[0], row[1])
+    ):
+        if end <= start:
+            continue
+        if resource_id != current_resource:
+            current_resource = resource_id
+            max_end = None
+        if max_end is not None and start < max_end:
+            overlapping.setdefault(resource_id, list()).append((start, end, item_id))
+            continue
+        max_end = end
+        starts.setdefault(resource_id, list()).append(start)
+        intervals.setdefault(resource_id, list()).append((start, end, item_id))
+    return starts, intervals, overlapping
+
+
+class IntervalIndex:
+    """ Per-resource index of half-open [start, end) intervals.
+
+    Intervals of every resource are kept in lists sorted by start time. Index
+    never accepts interval overlapping already stored one, so end times are
+    sorted as well and the only candidate for overlap with [start, end) is the
+    last interval starting before end. Overlap check is a single bisection.
+
+    Table loaded into index may already contain overlapping rows (written
+    before conflicts were detected). Such rows are kept aside in short
+    per-resource lists checked linearly, so sorted lists stay overlap-free.
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.loaded = False
+        self._starts = dict()
+        self._intervals = dict()
+        self._overlapping = dict()
+        # writes done while index is loaded, None when it is not being loaded
+        self._journal = None
+        # changed by every clear(), load started before is dropped
+        self._generation = 0
+
+    @property
+    def loading(self):
+        return self._journal is not None
+
+    def clear(self):
+        """ Remove all intervals and mark index as not loaded. """
+        with self.lock:
+            self._starts = dict()
+            self._intervals = dict()
+            self._overlapping = dict()
+            self._journal = None
+            self._generation += 1
+            self.loaded = False
+
+    def start_loading(self):
+        """ Start recording writes, call before rows of load() are read.
+
+        Returns:
+            generation (int): token passed to load()
+        """
+        with self.lock:
+            self._journal = list()
+            return self._generation
+
+    def stop_loading(self, generation):
+        """ Stop recording writes after failed load.
+
+        Args:
+            generation (int): token returned by start_loading()
+        """
+        with self.lock:
+            if generation == self._generation:
+                self._journal = None
+
+    def load(self, rows, generation=None):
+        """ Rebuild index from scratch, replay writes recorded since
+            start_loading().
+
+        Args:
+            rows (iterable): (resource_id, start, end, item_id) tuples
+            generation (int): token returned by start_loading(), rows are
+                dropped if index was cleared in the meantime
+        """
+        starts, intervals, overlapping = build_intervals(rows)
+        with self.lock:
+            if generation is not None and generation != self._generation:
+                return
+            journal = self._journal or list()
+            self._journal = None
+            self._starts = starts
+            self._intervals = intervals
+            self._overlapping = overlapping
+            self.loaded = True
+            for method, args in journal:
+                method(*args)
+
+    def load_resource(self, resource_id, rows):
+        """ Rebuild intervals of single resource, e.g. changed by other process.
+
+        Args:
+            resource_id (int): resource ID
+            rows (iterable): (start, end, item_id) tuples of the resource
+        """
+        starts, intervals, overlapping = build_intervals(
+            (resource_id, start, end, item_id) for start, end, item_id in rows
+        )
+        with self.lock:
+            if not self.loaded:
+                return
+            for current, loaded in (
+                (self._starts, starts),
+                (self._intervals, intervals),
+                (self._overlapping, overlapping),
+            ):
+                current.pop(resource_id, None)
+                current.update(loaded)
+
+    @property
+    def overlapping_count(self):
+        """ Number of loaded intervals overlapping other intervals. """
+        return sum(len(intervals) for intervals in self._overlapping.values())
+
+    def find_overlap(self, resource_id, start, end):
+        """ Find interval of given resource overlapping [start, end).
+
+        Args:
+            resource_id (int): resource ID
+            start (datetime): beginning of checked interval
+            end (datetime): end of checked interval (exclusive)
+
+        Returns:
+            item_id (int): ID of overlapping interval, None if there is none
+        """
+        if end <= start:
+            return None
+        for other_start, other_end, item_id in self._overlapping.get(resource_id, ()):
+            if other_start < end and other_end > start:
+                return item_id
+        starts = self._starts.get(resource_id)
+        if not starts:
+            return None
+        position = bisect_left(starts, end)
+        if position == 0:
+            return None
+        _, prev_end, item_id = self._intervals[resource_id][position - 1]
+        if prev_end > start:
+            return item_id
+        return None
+
+    def overlapping(self, resource_id, start, end):
+        """ Get intervals of given resource overlapping [start, end).
+
+        Args:
+            resource_id (int): resource ID
+            start (datetime): beginning of checked range
+            end (datetime): end of checked range (exclusive)
+
+        Returns:
+            intervals (list): (start, end, item_id) tuples sorted by start
+        """
+        with self.lock:
+            if end <= start:
+                return list()
+            extra = [
+                interval
+                for interval in self._overlapping.get(resource_id, ())
+                if interval[0] < end and interval[1] > start
+            ]
+            starts = self._starts.get(resource_id)
+            if not starts:
+                return extra
+            first = max(bisect_left(starts, start) - 1, 0)
+            last = bisect_left(starts, end)
+            intervals = [
+                interval
+                for interval in self._intervals[resource_id][first:last]
+                if interval[1] > start
+            ]
+            if extra:
+                intervals = sorted(intervals + extra, key=lambda interval: interval[0])
+            return intervals
+
+    def add(self, resource_id, start, end, item_id):
+        """ Add interval to the index unless it overlaps existing one.
+
+        Args:
+            resource_id (int): resource ID
+            start (datetime): beginning of interval
+            end (datetime): end of interval (exclusive)
+            item_id (int): ID of stored item, e.g. booking ID
+
+        Returns:
+            conflict_id (int): ID of overlapping interval, None if interval
+                               was added
+        """
+        with self.lock:
+            if self._journal is not None:
+                self._journal.append((self.add, (resource_id, start, end, item_id)))
+                return None
+            conflict_id = self.find_overlap(resource_id, start, end)
+            if conflict_id is not None or end <= start:
+                return conflict_id
+            starts = self._starts.setdefault(resource_id, list())
+            position = bisect_left(starts, start)
+            starts.insert(position, start)
+            self._intervals.setdefault(resource_id, list()).insert(
+                position, (start, end, item_id)
+            )
+            return None
+
+    def remove(self, resource_id, start, item_id):
+        """ Remove interval from the index.
+
+        Args:
+            resource_id (int): resource ID
+            start (datetime): beginning of interval
+            item_id (int): ID of stored item
+
+        Returns:
+            removed (bool): False if interval was not found
+        """
+        with self.lock:
+            if self._journal is not None:
+                self._journal.append((self.remove, (resource_id, start, item_id)))
+                return True
+            overlapping = self._overlapping.get(resource_id, list())
+            for position, interval in enumerate(overlapping):
+                if interval[0] == start and interval[2] == item_id:
+                    del overlapping[position]
+                    return True
+            starts = self._starts.get(resource_id, list())
+            intervals = self._intervals.get(resource_id, list())
+            position = bisect_left(starts, start)
+            while position < len(starts) and starts[position] == start:
+                if intervals[position][2] == item_id:
+                    del starts[position]
+                    del intervals[position]
+                    return True
+                position += 1
+            return False
@@ -0,0 +1,225 @@
+"""
+This file contains request metrics exposed in Prometheus text format.
+
+Request hooks registered in initialize_app record latency histogram, histogram
+of SQL queries executed by request, count of responses by status and number of
+requests in flight, labelled by HTTP method and URL rule of the endpoint (not
+the URL itself, so number of series stays bounded). Recording takes single
+lock and two bisects per request.
+"""
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+from flask import g, request
+
+from src.logger import log_request
+
+# upper bounds of latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# upper bounds of histogram buckets of SQL queries executed by request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+# route label of requests not matching any endpoint
+UNMATCHED_ROUTE = "unmatched"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value):
+    """ Escape label value of Prometheus text format. """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels):
+    """ Format labels as {name="value",...}. """
+    return "{%s}" % ",".join(
+        f'{name}="{escape_label(str(value))}"' for name, value in labels.items()
+    )
+
+
+def observe(histograms, key, buckets, value):
+    """ Add value to histogram, histograms are [counts of buckets and +Inf, sum]
+        lists.
+    """
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = [[0] * (len(buckets) + 1), 0]
+    histogram[0][bisect_left(buckets, value)] += 1
+    histogram[1] += value
+
+
+def render_histograms(name, description, buckets, histograms):
+    """ Render histograms in Prometheus text exposition format.
+
+    Args:
+        name (str): metric name
+        description (str): metric help text
+        buckets (tuple): upper bounds of buckets
+        histograms (dict): histograms by (method, route) labels
+
+    Returns:
+        lines (list): lines of metrics text
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    bounds = [repr(bound) for bound in buckets] + ["+Inf"]
+    for (method, route), (counts, total) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            labels = format_labels(method=method, route=route, le=bound)
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = format_labels(method=method, route=route)
+        lines.append(f"{name}_sum{labels} {total!r}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+    return lines
+
+
+class RequestMetrics:
+    """ Latency and query count histograms, status counters and in-flight
+        gauges of requests.
+    """
+
+    def __init__(self, buckets, query_buckets=QUERY_COUNT_BUCKETS):
+        """
+        Args:
+            buckets (tuple): sorted upper bounds of latency buckets in seconds
+            query_buckets (tuple): sorted upper bounds of query count buckets
+        """
+        self.buckets = buckets
+        self.query_buckets = query_buckets
+        self._lock = Lock()
+        # (method, route) -> [counts of buckets and +Inf, sum of latencies]
+        self._latencies = dict()
+        # (method, route) -> [counts of buckets and +Inf, sum of queries]
+        self._queries = dict()
+        # (method, route, status) -> count
+        self._statuses = dict()
+        # (method, route) -> number of requests being handled
+        self._in_flight = dict()
+
+    def start(self, method, route):
+        """ Count request as being handled. """
+        key = (method, route)
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def finish(self, method, route, status=None, duration=None, queries=None):
+        """ Count request as finished, record its status, latency and number
+            of executed SQL queries.
+
+        Args:
+            method (str): HTTP method
+            route (str): URL rule of the endpoint
+            status (int): response status code, None if there is no response
+            duration (float): request latency in seconds
+            queries (int): number of executed SQL queries
+        """
+        key = (method, route)
+        with self._lock:
+            self._in_flight[key] -= 1
+            if status is None:
+                return
+            status_key = (method, route, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+            observe(self._latencies, key, self.buckets, duration)
+            if queries is not None:
+                observe(self._queries, key, self.query_buckets, queries)
+
+    def render(self):
+        """ Render metrics in Prometheus text exposition format.
+
+        Returns:
+            text (str): metrics text
+        """
+        with self._lock:
+            latencies = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._latencies.items()
+            }
+            queries = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._queries.items()
+            }
+            statuses = dict(self._statuses)
+            in_flight = dict(self._in_flight)
+        lines = render_histograms(
+            "http_request_duration_seconds",
+            "Latency of handled requests.",
+            self.buckets,
+            latencies,
+        )
+        lines.extend(
+            render_histograms(
+                "http_request_db_queries",
+                "SQL queries executed by handled requests.",
+                self.query_buckets,
+                queries,
+            )
+        )
+        lines.extend(
+            [
+                "# HELP http_requests_total Handled requests by response status.",
+                "# TYPE http_requests_total counter",
+            ]
+        )
+        for (method, route, status), count in sorted(statuses.items()):
+            labels = format_labels(method=method, route=route, status=status)
+            lines.append(f"http_requests_total{labels} {count}")
+        lines.extend(
+            [
+                "# HELP http_requests_in_flight Requests being handled.",
+                "# TYPE http_requests_in_flight gauge",
+            ]
+        )
+        for (method, route), count in sorted(in_flight.items()):
+            labels = format_labels(method=method, route=route)
+            lines.append(f"http_requests_in_flight{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics(LATENCY_BUCKETS)
+
+
+def request_route():
+    """ Get route label of current request. """
+    if request.url_rule is None:
+        return UNMATCHED_ROUTE
+    return request.url_rule.rule
+
+
+def start_request_timer():
+    """ Before request hook, count request in flight and start its timer. """
+    g.metrics_start = perf_counter()
+    g.query_count = 0
+    g.metrics_route = request_route()
+    request_metrics.start(request.method, g.metrics_route)
+
+
+def observe_request(response):
+    """ After request hook, record latency and status of the response and
+        write access log record.
+
+    Args:
+        response (flask.Response): Flask response object
+
+    Returns:
+        response (flask.Response): the same response object
+    """
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        duration = perf_counter() - start
+        queries = g.pop("query_count", 0)
+        request_metrics.finish(
+            request.method, g.metrics_route, response.status_code, duration, queries
+        )
+        log_request(g.metrics_route, response.status_code, duration, queries)
+    return response
+
+
+def end_request_timer(error=None):
+    """ Teardown request hook, count request without response as finished.
+
+    Args:
+        error (Exception): unhandled exception, if any
+    """
+    if g.pop("metrics_start", None) is not None:
+        request_metrics.finish(request.method, g.metrics_route)
@@ -0,0 +1,161 @@
+"""
+This file contains keyset (cursor) pagination used by GET collection endpoints.
+
+Page is selected with "WHERE key > last_seen_key ORDER BY key LIMIT n", so
+cost of fetching a page depends on the page size and not on its position in
+the table. Cursor of the next page is returned in X-Next-Cursor header.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+from sqlalchemy import DateTime, and_, or_
+
+from src.database import db
+
+CURSOR_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values):
+    """ Encode key values of last returned row into opaque cursor.
+
+    Args:
+        values (list): key values of last returned row
+
+    Returns:
+        cursor (str): URL safe cursor
+    """
+    values = [
+        value.strftime(CURSOR_DATETIME_FORMAT) if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, key_columns):
+    """ Decode cursor created by encode_cursor.
+
+    Args:
+        cursor (str): URL safe cursor
+        key_columns (list): columns the cursor was created for
+
+    Raises:
+        ValueError: cursor is malformed
+
+    Returns:
+        values (list): key values of last returned row
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise ValueError("Improper 'after' cursor provided")
+    if not isinstance(values, list) or len(values) != len(key_columns):
+        raise ValueError("Improper 'after' cursor provided")
+    decoded = list()
+    for column, value in zip(key_columns, values):
+        try:
+            if isinstance(column.type, DateTime):
+                value = datetime.strptime(value, CURSOR_DATETIME_FORMAT)
+            elif not isinstance(value, int):
+                raise TypeError
+        except (TypeError, ValueError):
+            raise ValueError("Improper 'after' cursor provided")
+        decoded.append(value)
+    return decoded
+
+
+def get_page_args(key_columns):
+    """ Read and validate pagination URL parameters: limit and after.
+
+    Limit defaults to PAGE_SIZE and is capped at MAX_PAGE_SIZE from config.
+
+    Args:
+        key_columns (list): columns used as pagination key
+
+    Raises:
+        ValueError: improper pagination parameters
+
+    Returns:
+        page_args (tuple): (limit, decoded cursor or None) tuple
+    """
+    limit = request.args.get("limit")
+    if limit is None:
+        limit = current_app.config["PAGE_SIZE"]
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("'limit' should be a positive integer")
+        if limit < 1:
+            raise ValueError("'limit' should be a positive integer")
+    limit = min(limit, current_app.config["MAX_PAGE_SIZE"])
+    after = request.args.get("after")
+    if after is not None:
+        after = decode_cursor(after, key_columns)
+    return limit, after
+
+
+def keyset_filter(key_columns, values):
+    """ Create filter selecting rows placed after given key in key order.
+
+    Args:
+        key_columns (list): columns used as pagination key
+        values (list): key values of last returned row
+
+    Returns:
+        expression (sqlalchemy.sql.elements.BooleanClauseList): filter
+    """
+    first_column, first_value = key_columns[0], values[0]
+    if len(key_columns) == 1:
+        return first_column > first_value
+    # leading ">=" lets database seek in index on the first key column
+    return and_(
+        first_column >= first_value,
+        or_(
+            first_column > first_value,
+            and_(
+                first_column == first_value, keyset_filter(key_columns[1:], values[1:])
+            ),
+        ),
+    )
+
+
+def paginate(query, key_columns, limit, after=None):
+    """ Fetch single page of query results.
+
+    Args:
+        query (sqlalchemy.sql.Select): filtered select, selecting key columns
+        key_columns (list): unique, ordered columns used as pagination key
+        limit (int): page size
+        after (list): key values of last row of previous page
+
+    Returns:
+        page (tuple): (list of rows, next page cursor or None) tuple
+    """
+    if after is not None:
+        query = query.where(keyset_filter(key_columns, after))
+    rows = db.session.execute(query.order_by(*key_columns).limit(limit + 1)).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][column.key] for column in key_columns])
+    return rows, next_cursor
+
+
+def page_response(data, next_cursor):
+    """ Create JSON response with single page of results.
+
+    Args:
+        data (list): list of serialized rows
+        next_cursor (str): next page cursor, None for the last page
+
+    Returns:
+        response (flask.Response): Flask response object
+    """
+    response = jsonify(data)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
@@ -0,0 +1,85 @@
+"""
+This file contains aggregation of executed SQL statements statistics.
+
+Statements are aggregated by normalized SQL text: whitespace is collapsed,
+literals are replaced with "?" and lists of parameters (e.g. IN (?, ?, ?)) are
+replaced with "(...)", so the same query with different arguments is counted
+once.
+"""
+import re
+from functools import lru_cache
+from threading import Lock
+
+WHITESPACE = re.compile(r"\s+")
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PARAMETER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement):
+    """ Normalize SQL statement text.
+
+    Args:
+        statement (str): SQL statement
+
+    Returns:
+        normalized (str): statement without literals and repeated parameters
+    """
+    statement = WHITESPACE.sub(" ", statement).strip()
+    statement = LITERALS.sub("?", statement)
+    return PARAMETER_LISTS.sub("(...)", statement)
+
+
+class QueryStats:
+    """ Execution count and time of statements, by normalized SQL text. """
+
+    def __init__(self):
+        self._lock = Lock()
+        # normalized statement -> [count, total time, maximum time]
+        self._statements = dict()
+
+    def record(self, statement, duration):
+        """ Record single execution of statement.
+
+        Args:
+            statement (str): SQL statement
+            duration (float): execution time in seconds
+        """
+        key = normalize_statement(statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                self._statements[key] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                if duration > stats[2]:
+                    stats[2] = duration
+
+    def snapshot(self):
+        """ Get statistics of all statements, the most time consuming first.
+
+        Returns:
+            statements (list): list of statements statistics dictionaries
+        """
+        with self._lock:
+            items = [(key, list(stats)) for key, stats in self._statements.items()]
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                "statement": statement,
+                "count": count,
+                "total": total,
+                "mean": total / count,
+                "max": maximum,
+            }
+            for statement, (count, total, maximum) in items
+        ]
+
+    def clear(self):
+        """ Drop all statistics. """
+        with self._lock:
+            self._statements.clear()
+
+
+query_stats = QueryStats()
@@ -0,0 +1,173 @@
+"""
+This file contains in-process LRU cache of GET responses.
+
+Entries are keyed by normalized URL (path and sorted query string) and hold
+response body with headers, together with versions of tables read by the
+endpoint. Versions are read from database, so entry is never served after
+write of any process to one of its tables. Bumping table version in this
+process also drops entries reading that table right away, entries are also
+limited by RESPONSE_CACHE_SIZE and expire after RESPONSE_CACHE_TTL seconds.
+"""
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from time import monotonic
+
+from flask import Response, current_app, request
+
+from src.libs.versions import normalized_url, table_versions
+
+CACHED_HEADERS = ("X-Next-Cursor",)
+
+
+class ResponseCache:
+    """ LRU cache of serialized responses with hit/miss/eviction counters. """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, versions):
+        """ Get cached entry, count hit or miss.
+
+        Args:
+            key (str): normalized URL
+            versions (tuple): current versions of tables read by the endpoint
+
+        Returns:
+            entry (tuple): (body, mimetype, headers) tuple, None on miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, entry_versions, _, response_data = entry
+                if expires <= monotonic():
+                    del self._entries[key]
+                    self.expirations += 1
+                elif entry_versions == versions:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response_data
+            self.misses += 1
+            return None
+
+    def put(self, key, versions, tables, response_data, max_size, ttl):
+        """ Store entry, evict least recently used ones above max_size.
+
+        Args:
+            key (str): normalized URL
+            versions (tuple): versions of tables the response was built from
+            tables (frozenset): names of tables read by the endpoint
+            response_data (tuple): (body, mimetype, headers) tuple
+            max_size (int): maximum number of entries
+            ttl (float): entry time to live in seconds
+        """
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, versions, tables, response_data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """ Drop entries reading any of given tables.
+
+        Args:
+            tables (tuple): names of modified tables
+        """
+        with self._lock:
+            stale_keys = [
+                key
+                for key, (_, _, entry_tables, _) in self._entries.items()
+                if not entry_tables.isdisjoint(tables)
+            ]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+
+    def clear(self):
+        """ Drop all entries and reset counters. """
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = self.misses = self.evictions = 0
+            self.expirations = self.invalidations = 0
+
+    def stats(self):
+        """ Get cache counters.
+
+        Returns:
+            stats (dict): cache size and counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
+table_versions.subscribe(response_cache.invalidate)
+
+
+def cached_response(*tables):
+    """ Response cache decorator, applicable on GET REST API methods.
+
+    Only successful, not streamed responses are cached. Response is stored
+    only if tables were not modified while it was built.
+
+    Args:
+        tables (str): names of tables read by the endpoint
+
+    Returns:
+        wrapper: cached GET handler
+    """
+    tables_set = frozenset(tables)
+
+    def wrapper(fn):
+        @wraps(fn)
+        def handle_cached_get(*args, **kwargs):
+            """ Serve response from cache or build and store it. """
+            config = current_app.config
+            # requests with body are rejected by endpoints, never serve them
+            if not config["RESPONSE_CACHE_SIZE"] or request.content_length:
+                return fn(*args, **kwargs)
+            key = normalized_url()
+            versions = table_versions.get_many(tables)
+            response_data = response_cache.get(key, versions)
+            if response_data is not None:
+                body, mimetype, headers = response_data
+                return Response(body, mimetype=mimetype, headers=headers)
+            response = fn(*args, **kwargs)
+            if (
+                isinstance(response, Response)
+                and response.status_code == 200
+                and not response.is_streamed
+                and versions == table_versions.get_many(tables)
+            ):
+                headers = {
+                    header: response.headers[header]
+                    for header in CACHED_HEADERS
+                    if header in response.headers
+                }
+                response_cache.put(
+                    key,
+                    versions,
+                    tables_set,
+                    (response.get_data(), response.mimetype, headers),
+                    config["RESPONSE_CACHE_SIZE"],
+                    config["RESPONSE_CACHE_TTL"],
+                )
+            return response
+
+        return handle_cached_get
+
+    return wrapper
@@ -0,0 +1,207 @@
+"""
+This file contains compiled opening hours schedules of resources.
+
+Opening hours strings are parsed once per resource into a sorted array of
+open intervals, expressed in minutes of the week (Monday 00:00 is 0). Every
+weekday has at most few windows, so bisecting this array makes "is resource
+open" checks effectively constant time.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from math import ceil
+
+from src.libs.timeslots import expand_offsets, parse_opening_windows, window_offsets
+
+MINUTES_PER_DAY = 24 * 60
+WEEKDAY_COLUMNS = [
+    "opening_hours_mon",
+    "opening_hours_tue",
+    "opening_hours_wed",
+    "opening_hours_thu",
+    "opening_hours_fri",
+    "opening_hours_sat",
+    "opening_hours_sun",
+]
+
+
+def minute_of_week(moment):
+    """ Get number of minutes since Monday 00:00 of given moment's week.
+
+    Args:
+        moment (datetime): point in time
+
+    Returns:
+        minute (int): minute of the week
+    """
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+class Schedule:
+    """ Compiled weekly opening hours of a resource. """
+
+    def __init__(self, weekly_windows, interval):
+        """
+        Args:
+            weekly_windows (list): 7 lists of (open, close) minutes of day
+                                   tuples, Monday first
+            interval (int): slot length in minutes, None if resource has no
+                            slots
+        """
+        self.weekly_windows = weekly_windows
+        self.interval = interval
+        self.opens = list()
+        self.closes = list()
+        for weekday, windows in enumerate(weekly_windows):
+            for open_minute, close_minute in sorted(windows):
+                self.opens.append(weekday * MINUTES_PER_DAY + open_minute)
+                self.closes.append(weekday * MINUTES_PER_DAY + close_minute)
+        self.weekly_offsets = [
+            window_offsets(windows if interval else list(), interval)
+            for windows in weekly_windows
+        ]
+
+    @classmethod
+    def from_resource(cls, resource):
+        """ Compile schedule of resource.
+
+        Args:
+            resource (object): object with intervals and opening_hours_*
+                               attributes, e.g. Resources model
+
+        Returns:
+            schedule (Schedule): compiled schedule
+        """
+        return cls(
+            [
+                parse_opening_windows(getattr(resource, column))
+                for column in WEEKDAY_COLUMNS
+            ],
+            int(resource.intervals) if resource.intervals else None,
+        )
+
+    def _window_close(self, minute):
+        """ Get end of opening window containing given minute of the week.
+
+        Args:
+            minute (int): minute of the week
+
+        Returns:
+            close (int): close minute of the week, None if resource is closed
+        """
+        position = bisect_right(self.opens, minute) - 1
+        if position >= 0 and minute < self.closes[position]:
+            return self.closes[position]
+        return None
+
+    def is_open_at(self, moment):
+        """ Check if resource is open at given moment.
+
+        Args:
+            moment (datetime): point in time
+
+        Returns:
+            is_open (bool): True if resource is open
+        """
+        return self._window_close(minute_of_week(moment)) is not None
+
+    def is_open_between(self, start, end):
+        """ Check if resource is open during whole [start, end) range.
+
+        Args:
+            start (datetime): beginning of the range
+            end (datetime): end of the range
+
+        Returns:
+            is_open (bool): True if range fits in single opening window
+        """
+        if end <= start:
+            return False
+        start_minute = minute_of_week(start)
+        close_minute = self._window_close(start_minute)
+        if close_minute is None:
+            return False
+        duration = ceil((end - start).total_seconds() / 60 + start.second / 60)
+        return start_minute + duration <= close_minute
+
+    def open_windows(self, start, end):
+        """ Get opening windows of given range, in chronological order.
+
+        Windows are clipped to the range, windows touching each other (e.g.
+        over midnight) are merged into one.
+
+        Args:
+            start (datetime): beginning of the range
+            end (datetime): end of the range (exclusive)
+
+        Returns:
+            windows (list): list of (open, close) datetime tuples
+        """
+        windows = list()
+        day = datetime.combine(start.date(), datetime.min.time())
+        while day < end:
+            for open_minute, close_minute in sorted(self.weekly_windows[day.weekday()]):
+                window_open = max(start, day + timedelta(minutes=open_minute))
+                window_close = min(end, day + timedelta(minutes=close_minute))
+                if window_close <= window_open:
+                    continue
+                if windows and windows[-1][1] >= window_open:
+                    windows[-1] = (windows[-1][0], max(windows[-1][1], window_close))
+                else:
+                    windows.append((window_open, window_close))
+            day += timedelta(days=1)
+        return windows
+
+    def timeslots(self, days):
+        """ Generate slots of given days.
+
+        Args:
+            days (list): list of dates (or numpy datetime64[D] array)
+
+        Returns:
+            timeslots (tuple): (starts, ends) numpy datetime64[m] arrays
+        """
+        return expand_offsets(days, self.weekly_offsets, self.interval or 0)
+
+
+class ScheduleCache:
+    """ Cache of compiled schedules, by resource ID. """
+
+    def __init__(self, loader):
+        """
+        Args:
+            loader (function): function returning resource of given ID
+                               or None
+        """
+        self._loader = loader
+        self._schedules = dict()
+
+    def get(self, resource_id):
+        """ Get compiled schedule of resource, compile it on first use.
+
+        Args:
+            resource_id (int): resource ID
+
+        Returns:
+            schedule (Schedule): compiled schedule, None if there is no such
+                                 resource
+        """
+        schedule = self._schedules.get(resource_id)
+        if schedule is None:
+            resource = self._loader(resource_id)
+            if resource is None:
+                return None
+            schedule = Schedule.from_resource(resource)
+            self._schedules[resource_id] = schedule
+        return schedule
+
+    def invalidate(self, resource_id):
+        """ Drop compiled schedule of resource.
+
+        Args:
+            resource_id (int): resource ID
+        """
+        self._schedules.pop(resource_id, None)
+
+    def clear(self):
+        """ Drop all compiled schedules. """
+        self._schedules = dict()
@@ -0,0 +1,84 @@
+"""
+This file contains serialization of GET responses rows.
+
+Endpoints select only columns they return, with Core select(), and rows tuples
+are mapped straight into output dictionaries, without building ORM objects.
+All datetime values are encoded here, with encoders listed below.
+"""
+from sqlalchemy import select
+
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_NAMES = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def iso_datetime(value):
+    """ Encode datetime as "2019-04-10 10:00:00". """
+    return str(value)
+
+
+def http_datetime(value):
+    """ Encode datetime as "Wed, 10 Apr 2019 10:00:00 GMT".
+
+    It is the format used by Flask JSON encoder for datetime objects, built
+    without locale dependent strftime().
+    """
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        WEEKDAY_NAMES[value.weekday()],
+        value.day,
+        MONTH_NAMES[value.month - 1],
+        value.year,
+        value.hour,
+        value.minute,
+        value.second,
+    )
+
+
+class RowSerializer:
+    """ Columns selected by endpoint and their output names and encoders. """
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields (list): list of (output name, column, encoder) tuples,
+                           encoder is None for values returned as they are
+        """
+        self.columns = [column for _, column, _ in fields]
+        self.names = [name for name, _, _ in fields]
+        self.encoded = [(name, encode) for name, _, encode in fields if encode]
+
+    def select(self):
+        """ Create select of serialized columns.
+
+        Returns:
+            query (sqlalchemy.sql.Select): Core select statement
+        """
+        return select(self.columns)
+
+    def to_dict(self, row):
+        """ Convert row into output dictionary.
+
+        Args:
+            row (tuple): row of select() created by this serializer
+
+        Returns:
+            row_dict (dict): output dictionary
+        """
+        row_dict = dict(zip(self.names, row))
+        for name, encode in self.encoded:
+            value = row_dict[name]
+            if value is not None:
+                row_dict[name] = encode(value)
+        return row_dict
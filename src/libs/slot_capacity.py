@@ -0,0 +1,143 @@
+"""
+This file contains slots capacity accounting of bookings.
+
+Booking takes one place in every slot of its resource it overlaps. Places are
+taken and given back with single conditional UPDATE executed in transaction of
+the booking write, never by reading free places first, so concurrent requests
+(also from other processes) cannot overbook slot: SQLite evaluates WHERE clause
+of UPDATE under write lock. Slots are taken all or none: UPDATE does not match
+any row if one of overlapping slots is full.
+
+Free places of every slot are its capacity minus bookings and holds
+overlapping it. Slots generated after the booking was written count it when
+they are built, so every slot overlapping a booking holds exactly one of its
+places and deleting (or moving) the booking gives back exactly those places.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from sqlalchemy import and_, exists, select
+
+from src.database.models import Bookings, Holds, Slots
+
+# one resource can be booked once at a time
+SLOT_CAPACITY = 1
+
+slots_table = Slots.__table__
+full_slots = slots_table.alias("full_slots")
+reserving_tables = (
+    (Bookings.__table__, "booked_from", "booked_to"),
+    (Holds.__table__, "held_from", "held_to"),
+)
+
+
+def overlapping(table, resource_id, booked_from, booked_to):
+    """ Build condition matching slots of resource overlapping given period. """
+    return and_(
+        table.c.resource_id == resource_id,
+        table.c.timestamp < booked_to,
+        table.c.timestamp_end > booked_from,
+    )
+
+
+def reserve_slots(session, resource_id, booked_from, booked_to):
+    """ Take one place in every slot overlapped by the booking.
+
+    Args:
+        session (sqlalchemy.orm.Session): session of the booking transaction
+        resource_id (int): resource ID
+        booked_from (datetime): beginning of the booking
+        booked_to (datetime): end of the booking
+
+    Returns:
+        reserved (bool): False if any of overlapped slots is full
+    """
+    any_full = exists(
+        select([full_slots.c.id]).where(
+            and_(
+                overlapping(full_slots, resource_id, booked_from, booked_to),
+                full_slots.c.free <= 0,
+            )
+        )
+    )
+    result = session.execute(
+        slots_table.update()
+        .where(
+            and_(
+                overlapping(slots_table, resource_id, booked_from, booked_to),
+                slots_table.c.free > 0,
+                ~any_full,
+            )
+        )
+        .values(free=slots_table.c.free - 1)
+    )
+    if result.rowcount:
+        return True
+    # nothing updated: either booking is outside of generated slots (also in
+    # a break of opening hours, breaks have no slots) or full
+    return not session.execute(select([any_full])).scalar()
+
+
+def release_slots(session, resource_id, booked_from, booked_to):
+    """ Give back places taken by the booking in every slot it overlaps.
+
+    Args:
+        session (sqlalchemy.orm.Session): session of the booking transaction
+        resource_id (int): resource ID
+        booked_from (datetime): beginning of the booking
+        booked_to (datetime): end of the booking
+
+    Returns:
+        released (int): number of slots given place back
+    """
+    return session.execute(
+        slots_table.update()
+        .where(overlapping(slots_table, resource_id, booked_from, booked_to))
+        .values(free=slots_table.c.free + 1)
+    ).rowcount
+
+
+def reserved_periods(connection, start, end):
+    """ Get periods of bookings and holds overlapping given period.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection
+        start (datetime): beginning of the period
+        end (datetime): end of the period
+
+    Returns:
+        periods (dict): lists of (from, to) tuples, by resource ID
+    """
+    periods = defaultdict(list)
+    for table, from_column, to_column in reserving_tables:
+        period_from = table.c[from_column]
+        period_to = table.c[to_column]
+        rows = connection.execute(
+            select([table.c.resource_id, period_from, period_to]).where(
+                and_(period_from < end, period_to > start)
+            )
+        )
+        for resource_id, row_from, row_to in rows:
+            periods[resource_id].append((row_from, row_to))
+    return periods
+
+
+def take_reserved_places(slot_rows, periods):
+    """ Take places of bookings and holds in slots rows built before insert.
+
+    Args:
+        slot_rows (list): slots table rows dictionaries, ordered by timestamp
+            within every resource
+        periods (dict): lists of (from, to) tuples, by resource ID
+    """
+    resource_rows = defaultdict(list)
+    for slot_row in slot_rows:
+        if slot_row["resource_id"] in periods:
+            resource_rows[slot_row["resource_id"]].append(slot_row)
+    for resource_id, rows in resource_rows.items():
+        starts = [row["timestamp"] for row in rows]
+        ends = [row["timestamp_end"] for row in rows]
+        for period_from, period_to in periods[resource_id]:
+            first = bisect_right(ends, period_from)
+            for row in rows[first : bisect_left(starts, period_to, first)]:
+                row["free"] -= 1
@@ -0,0 +1,51 @@
+"""
+This file contains streaming JSON responses used to export whole collections.
+
+Rows are fetched from the database in batches of STREAM_CHUNK_SIZE and encoded
+into JSON array chunks on the fly, so memory usage does not depend on the
+number of exported rows and first bytes of the response are sent immediately.
+"""
+from flask import Response, current_app, json, request, stream_with_context
+
+from src.database import db
+from src.libs.pagination import keyset_filter
+
+
+def stream_requested():
+    """ Check if client asked for streaming response (stream URL parameter).
+
+    Returns:
+        requested (bool): True if response should be streamed
+    """
+    return request.args.get("stream", "").lower() in ("true", "1")
+
+
+def stream_response(query, key_columns, serialize, after=None):
+    """ Create response streaming all query results as JSON array.
+
+    Args:
+        query (sqlalchemy.sql.Select): filtered select
+        key_columns (list): unique, ordered columns defining rows order
+        serialize (function): function converting row into dictionary
+        after (list): key values of row after which streaming starts
+
+    Returns:
+        response (flask.Response): streamed Flask response object
+    """
+    if after is not None:
+        query = query.where(keyset_filter(key_columns, after))
+    query = query.order_by(*key_columns)
+    chunk_size = current_app.config["STREAM_CHUNK_SIZE"]
+
+    def generate():
+        yield "["
+        separator = ""
+        result = db.session.execute(query)
+        rows = result.fetchmany(chunk_size)
+        while rows:
+            yield separator + ",".join(json.dumps(serialize(row)) for row in rows)
+            separator = ","
+            rows = result.fetchmany(chunk_size)
+        yield "]\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
@@ -0,0 +1,135 @@
+"""
+This file contains vectorized timeslots generation based on NumPy datetime64.
+
+Opening hours are stored as "HH:MM-HH:MM[-HH:MM-HH:MM...]" strings, every
+consecutive pair of hours is one opening window. Slots are generated for all
+days and all windows at once: slot offsets (in minutes) are computed once per
+weekday and broadcast over days falling on that weekday.
+
+Slots cover opening windows only. DateTimeRange based generator used before
+00.13.00 also generated slots of breaks between windows (with free=0) and a
+slot starting at closing hour of every day. Now breaks and closing hours have
+no slots, so booking overlapping a break is not rejected by slots capacity
+check, only by opening hours check (BOOKINGS_WITHIN_OPENING_HOURS).
+"""
+from datetime import datetime
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+TIMESTAMP_DAY_FORMAT = "%A, %B, %d, %Y, "
+TIMESTAMP_TIME_FORMAT = "%H:%M %p"
+
+
+def parse_opening_windows(opening_hours):
+    """ Parse opening hours string into list of opening windows.
+
+    Args:
+        opening_hours (str): opening hours, e.g. "08:00-12:00-12:30-16:00"
+
+    Returns:
+        windows (list): list of (open, close) minutes of day tuples,
+                        e.g. [(480, 720), (750, 960)]
+    """
+    if not opening_hours:
+        return list()
+    minutes = list()
+    for hour in opening_hours.split("-"):
+        hours, mins = hour.split(":")
+        minutes.append(int(hours) * 60 + int(mins))
+    return list(zip(minutes[0::2], minutes[1::2]))
+
+
+def window_offsets(windows, interval):
+    """ Get starts of all slots fitting in given opening windows. Slot ends
+        at closing hour of its window at the latest, breaks get no slots.
+
+    Args:
+        windows (list): list of (open, close) minutes of day tuples
+        interval (int): slot length in minutes
+
+    Returns:
+        offsets (numpy.ndarray): slots starts in minutes of day
+    """
+    offsets = [
+        np.arange(open_minute, close_minute - interval + 1, interval, dtype=np.int64)
+        for open_minute, close_minute in windows
+    ]
+    if not offsets:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(offsets)
+
+
+def generate_timeslots(days, weekly_windows, interval):
+    """ Generate slots of all given days in one vectorized call.
+
+    Args:
+        days (list): list of dates (or numpy datetime64[D] array)
+        weekly_windows (list): 7 lists of opening windows, Monday first
+        interval (int): slot length in minutes
+
+    Returns:
+        timeslots (tuple): (starts, ends) numpy datetime64[m] arrays sorted
+                           by start
+    """
+    weekly_offsets = [window_offsets(windows, interval) for windows in weekly_windows]
+    return expand_offsets(days, weekly_offsets, interval)
+
+
+def expand_offsets(days, weekly_offsets, interval):
+    """ Generate slots of given days from slots starts precomputed per weekday,
+        see window_offsets.
+
+    Args:
+        days (list): list of dates (or numpy datetime64[D] array)
+        weekly_offsets (list): 7 arrays of slots starts in minutes of day,
+                               Monday first
+        interval (int): slot length in minutes
+
+    Returns:
+        timeslots (tuple): (starts, ends) numpy datetime64[m] arrays sorted
+                           by start
+    """
+    days = np.asarray(days, dtype="datetime64[D]")
+    # 1970-01-01 (day 0 of datetime64) was Thursday
+    weekdays = (days.astype(np.int64) + 3) % 7
+    day_minutes = days.astype("datetime64[m]").astype(np.int64)
+    starts = list()
+    for weekday, offsets in enumerate(weekly_offsets):
+        selected = day_minutes[weekdays == weekday]
+        if offsets.size and selected.size:
+            starts.append((selected[:, None] + offsets[None, :]).ravel())
+    if starts:
+        starts = np.sort(np.concatenate(starts))
+    else:
+        starts = np.empty(0, dtype=np.int64)
+    starts = starts.astype("datetime64[m]")
+    return starts, starts + np.timedelta64(interval, "m")
+
+
+def format_timestamps(timestamps):
+    """ Format timestamps in batch, as "Monday, June, 17, 2019, 08:00 AM".
+
+    Every distinct day and every distinct time of day is formatted only once.
+
+    Args:
+        timestamps (numpy.ndarray): datetime64[m] array
+
+    Returns:
+        formatted (list): list of formatted timestamps
+    """
+    minutes = timestamps.astype(np.int64)
+    days, day_index = np.unique(minutes // MINUTES_PER_DAY, return_inverse=True)
+    times, time_index = np.unique(minutes % MINUTES_PER_DAY, return_inverse=True)
+    day_strings = [
+        day.strftime(TIMESTAMP_DAY_FORMAT)
+        for day in days.astype("datetime64[D]").tolist()
+    ]
+    time_strings = [
+        datetime(2000, 1, 1, minute // 60, minute % 60).strftime(TIMESTAMP_TIME_FORMAT)
+        for minute in times.tolist()
+    ]
+    return [
+        day_strings[day] + time_strings[time]
+        for day, time in zip(day_index.tolist(), time_index.tolist())
+    ]
@@ -0,0 +1,150 @@
+"""
+This file contains JSON schema compiler used to validate request bodies.
+
+Schema is compiled once into a tree of specialized Python check functions, so
+valid request is accepted with a few isinstance calls and dictionary lookups
+instead of walking the schema dynamically. Error messages are collected
+lazily, by jsonschema Draft4Validator, only for invalid requests.
+"""
+import re
+
+from jsonschema import Draft4Validator
+
+# keywords which do not validate anything (or are ignored by Draft4Validator
+# without format checker)
+ANNOTATION_KEYWORDS = {
+    "$id",
+    "$schema",
+    "definitions",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "format",
+}
+
+JSON_TYPES = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+
+def compile_type(types):
+    """ Compile "type" keyword.
+
+    Args:
+        types (str): JSON type name or list of names
+
+    Returns:
+        check (function): function returning True for value of given type
+    """
+    if isinstance(types, str):
+        return JSON_TYPES[types]
+    checks = [JSON_TYPES[json_type] for json_type in types]
+    return lambda value: any(check(value) for check in checks)
+
+
+def compile_check(schema):
+    """ Compile schema into single check function.
+
+    Args:
+        schema (dict): JSON schema
+
+    Returns:
+        check (function): function returning True for valid value, None if
+                          schema uses keywords not supported by compiler
+    """
+    checks = list()
+    for keyword, argument in schema.items():
+        if keyword in ANNOTATION_KEYWORDS:
+            continue
+        elif keyword == "type":
+            checks.append(compile_type(argument))
+        elif keyword == "enum":
+            checks.append(lambda value, enum=argument: value in enum)
+        elif keyword == "pattern":
+            search = re.compile(argument).search
+            checks.append(
+                lambda value, search=search: not isinstance(value, str)
+                or search(value) is not None
+            )
+        elif keyword == "minItems":
+            checks.append(
+                lambda value, minimum=argument: not isinstance(value, list)
+                or len(value) >= minimum
+            )
+        elif keyword == "required":
+            checks.append(
+                lambda value, required=tuple(argument): not isinstance(value, dict)
+                or all(key in value for key in required)
+            )
+        elif keyword == "properties":
+            properties = list()
+            for name, subschema in argument.items():
+                property_check = compile_check(subschema)
+                if property_check is None:
+                    return None
+                properties.append((name, property_check))
+            checks.append(
+                lambda value, properties=properties: check_properties(value, properties)
+            )
+        elif keyword == "items" and isinstance(argument, dict):
+            item_check = compile_check(argument)
+            if item_check is None:
+                return None
+            checks.append(
+                lambda value, item_check=item_check: not isinstance(value, list)
+                or all(item_check(item) for item in value)
+            )
+        else:
+            return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: all(check(value) for check in checks)
+
+
+def check_properties(value, properties):
+    """ Check properties of JSON object.
+
+    Args:
+        value (object): validated value
+        properties (list): list of (property name, check function) tuples
+
+    Returns:
+        is_valid (bool): True if all present properties are valid
+    """
+    if not isinstance(value, dict):
+        return True
+    for name, check in properties:
+        if name in value and not check(value[name]):
+            return False
+    return True
+
+
+def compile_schema(schema):
+    """ Compile JSON schema into validation function.
+
+    Args:
+        schema (dict): JSON schema
+
+    Returns:
+        validate (function): function returning list of error messages of
+                             given value, empty for valid one
+    """
+    validator = Draft4Validator(schema)
+    check = compile_check(schema)
+    if check is None:
+        check = validator.is_valid
+
+    def validate(value):
+        if check(value):
+            return list()
+        return [error.message for error in validator.iter_errors(value)]
+
+    return validate
@@ -0,0 +1,210 @@
+"""
+This file contains table version counters used for conditional GET requests.
+
+Every table has monotonically increasing version, stored in table_versions
+table and bumped in the same transaction as every write: by endpoints when
+their session is committed, by slots generation, holds expiry and seeding on
+their own connections. Versions are shared by all processes using the
+database, so writes of cron or CLI commands change ETags of the server as
+well. ETag of GET response is derived from versions of tables it reads and
+from normalized query string, so matching If-None-Match header is answered
+with 304 Not Modified after single primary key lookup, before any query of
+the endpoint is built.
+
+Random epoch, stored in table_versions when the table is created, is part of
+every ETag, so ETags issued for database recreated in the meantime (with all
+versions starting from zero again) are never matched. Epoch is the same in all
+processes, so ETag issued by one of them is matched by the others.
+"""
+from functools import wraps
+from hashlib import sha1
+from random import getrandbits
+from urllib.parse import urlencode
+
+from flask import Response, request
+from sqlalchemy import Table, event, select
+from sqlalchemy.orm import Session
+
+from src.database.models import Versions, db
+
+# table_versions row holding epoch of the database instead of version
+EPOCH_NAME = "__epoch__"
+
+versions_table = Versions.__table__
+
+
+class TableVersions:
+    """ Version counters of database tables, stored in database. """
+
+    def __init__(self):
+        self._subscribers = list()
+
+    def subscribe(self, callback):
+        """ Register function called with names of bumped tables.
+
+        Args:
+            callback (function): function called after every bump
+        """
+        self._subscribers.append(callback)
+
+    def get_many(self, tables):
+        """ Get current versions of given tables, committed by any process.
+
+        Args:
+            tables (tuple): table names
+
+        Returns:
+            versions (tuple): tables versions, in order of tables
+        """
+        versions = dict(
+            db.session.execute(
+                select([versions_table.c.name, versions_table.c.version]).where(
+                    versions_table.c.name.in_(tables)
+                )
+            ).fetchall()
+        )
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def get(self, table):
+        """ Get current version of the table.
+
+        Args:
+            table (str): table name
+
+        Returns:
+            version (int): table version
+        """
+        return self.get_many((table,))[0]
+
+    def bump(self, connection, *tables):
+        """ Increase versions of given tables in transaction of the write.
+
+        Args:
+            connection (sqlalchemy.engine.Connection): connection (or session)
+                of the write transaction
+            tables (str): table names
+        """
+        connection.execute(
+            versions_table.insert().prefix_with("OR IGNORE"),
+            [dict(name=table, version=0) for table in tables],
+        )
+        connection.execute(
+            versions_table.update()
+            .where(versions_table.c.name.in_(tables))
+            .values(version=versions_table.c.version + 1)
+        )
+        self.notify(tables)
+
+    def notify(self, tables):
+        """ Call subscribers of this process with names of modified tables.
+
+        Args:
+            tables (tuple): table names
+        """
+        for callback in self._subscribers:
+            callback(tables)
+
+
+table_versions = TableVersions()
+
+
+@event.listens_for(Table, "after_create")
+@event.listens_for(Table, "after_drop")
+def notify_recreated_table(target, connection, **kwargs):
+    """ Notify subscribers about every (re)created or dropped table. """
+    table_versions.notify((target.name,))
+
+
+@event.listens_for(versions_table, "after_create")
+def store_epoch(target, connection, **kwargs):
+    """ Store random epoch of newly created table versions. """
+    connection.execute(
+        versions_table.insert(), dict(name=EPOCH_NAME, version=getrandbits(31))
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def bump_committed_tables(session):
+    """ Bump versions of tables marked as modified by the session. """
+    tables = session.info.get("bumped_tables")
+    if tables:
+        table_versions.bump(session, *tables)
+
+
+def normalized_url():
+    """ Get path and query string of current request, with sorted parameters.
+
+    Returns:
+        url (str): normalized URL
+    """
+    return f"{request.path}?{urlencode(sorted(request.args.items(multi=True)))}"
+
+
+def request_etag(tables):
+    """ Compute ETag of current GET request.
+
+    Args:
+        tables (tuple): names of tables read by the endpoint
+
+    Returns:
+        etag (str): ETag value (without quotes)
+    """
+    epoch, *versions = table_versions.get_many((EPOCH_NAME,) + tables)
+    versions = "-".join(str(version) for version in versions)
+    query_hash = sha1(normalized_url().encode()).hexdigest()[:16]
+    return f"{epoch:x}-{versions}-{query_hash}"
+
+
+def conditional_get(*tables):
+    """ Conditional GET decorator, applicable on GET REST API methods.
+
+    Args:
+        tables (str): names of tables read by the endpoint
+
+    Returns:
+        wrapper: conditional GET handler
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def handle_conditional_get(*args, **kwargs):
+            """ Answer with 304 if client already has current response. """
+            etag = request_etag(tables)
+            if etag in request.if_none_match:
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            response = fn(*args, **kwargs)
+            if getattr(response, "status_code", None) == 200:
+                response.set_etag(etag)
+            return response
+
+        return handle_conditional_get
+
+    return wrapper
+
+
+def bumps_versions(*tables):
+    """ Decorator bumping table versions when write request commits session.
+
+    Args:
+        tables (str): names of tables modified by the endpoint
+
+    Returns:
+        wrapper: write request handler
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def mark_bumped_tables(*args, **kwargs):
+            """ Mark tables bumped by commit of the request session. """
+            session_info = db.session().info
+            session_info["bumped_tables"] = tables
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                session_info.pop("bumped_tables", None)
+
+        return mark_bumped_tables
+
+    return wrapper
@@ -1,7 +1,140 @@
+"""
+This file contains logging configuration.
+
+Loggers of the application only put records into in-memory queue (QueueHandler),
+records are formatted and written by background thread of QueueListener, so
+request threads never do file I/O or rotation. Records are written as JSON
+lines into LOG_FILE, slow queries into SLOW_QUERY_LOG_FILE. Access log records
+of successful requests are sampled with LOG_SUCCESS_SAMPLE_RATE.
+"""
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import Queue
+
+from flask import current_app, request
+
+from config import Config
+
+# attributes of every LogRecord, other attributes come from extra argument
+RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """ Format record as single JSON line with fields passed in extra. """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def file_handler(path, level, log_filter=None):
+    """ Create rotating file handler writing JSON lines.
+
+    Args:
+        path (str): log file path
+        level (int): minimum level of written records
+        log_filter (callable): filter of written records
+
+    Returns:
+        handler (logging.Handler): file handler, file is opened on first record
+    """
+    new_handler = RotatingFileHandler(
+        path,
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        delay=True,
+    )
+    new_handler.setLevel(level)
+    new_handler.setFormatter(JsonFormatter())
+    if log_filter is not None:
+        new_handler.addFilter(log_filter)
+    return new_handler
+
 
-handler = RotatingFileHandler("server.log", maxBytes=10000, backupCount=1)
+def is_slow_query(record):
+    return record.name == "slow_queries"
+
+
+def is_not_slow_query(record):
+    return record.name != "slow_queries"
+
+
+console_handler = logging.StreamHandler(sys.stderr)
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(
+    logging.Formatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s")
+)
+console_handler.addFilter(is_not_slow_query)
+
+log_queue = Queue()
+listener = QueueListener(
+    log_queue,
+    file_handler(Config.LOG_FILE, logging.DEBUG, is_not_slow_query),
+    file_handler(Config.SLOW_QUERY_LOG_FILE, logging.WARNING, is_slow_query),
+    console_handler,
+    respect_handler_level=True,
+)
+listener.start()
+atexit.register(listener.stop)
+
+# handler of all application loggers
+handler = QueueHandler(log_queue)
 handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
+
+slow_query_logger = logging.getLogger("slow_queries")
+slow_query_logger.setLevel(logging.WARNING)
+slow_query_logger.addHandler(handler)
+
+access_logger = logging.getLogger("access")
+access_logger.setLevel(logging.INFO)
+access_logger.addHandler(handler)
+
+
+def log_request(route, status, duration, queries):
+    """ Write access log record of finished request, records of successful
+        requests are sampled.
+
+    Args:
+        route (str): URL rule of the endpoint
+        status (int): response status code
+        duration (float): request latency in seconds
+        queries (int): number of executed SQL queries
+    """
+    if (
+        status < 400
+        and random.random() >= current_app.config["LOG_SUCCESS_SAMPLE_RATE"]
+    ):
+        return
+    access_logger.log(
+        logging.INFO if status < 500 else logging.ERROR,
+        "%s %s %s",
+        request.method,
+        request.full_path.rstrip("?"),
+        status,
+        extra={
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "queries": queries,
+            "remote_addr": request.remote_addr,
+        },
+    )
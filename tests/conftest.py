@@ -0,0 +1,18 @@
+from tests.helpers import AsgiTestClient
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--serving-mode",
+        choices=("wsgi", "asgi"),
+        default="wsgi",
+        help="send test client requests straight to Flask (wsgi) "
+        "or through ASGI application (asgi)",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("serving_mode") == "asgi":
+        from bookings_api import app
+
+        app.test_client_class = AsgiTestClient
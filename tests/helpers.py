@@ -1,10 +1,15 @@
 """
 This file contains functions / classes helpful in testing an applicaiton.
 """
+import asyncio
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from src.database.models import db
+from flask.testing import FlaskClient
+from werkzeug.http import HTTP_STATUS_CODES
+from werkzeug.test import run_wsgi_app
+
+from src.database.models import db, Slots
 
 
 def insert_test_data_into_db_table(table_obj):
@@ -74,5 +79,141 @@ def insert_test_data_into_db_table(table_obj):
             db.session.commit()
 
 
+def explain_query_plan(query):
+    """ Get SQLite query plan of given query.
+
+    Args:
+        query (sqlalchemy.sql.Select): ORM query or Core select
+
+    Returns:
+        plan (list): list of query plan steps descriptions
+    """
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + str(compiled), params)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def insert_slots(resource_id, start, count, free=1, minutes=30):
+    """ Insert consecutive slots of the resource.
+
+    Args:
+        resource_id (int): resource ID
+        start (datetime): beginning of the first slot
+        count (int): number of slots
+        free (int): free places (and maximum capacity) of every slot
+        minutes (int): length of slot
+
+    Returns:
+        slot_ids (list): IDs of inserted slots
+    """
+    slots = list()
+    for number in range(count):
+        timestamp = start + timedelta(minutes=minutes * number)
+        timestamp_end = timestamp + timedelta(minutes=minutes)
+        slots.append(
+            Slots(
+                resource_id=resource_id,
+                timestamp=timestamp,
+                timestamp_end=timestamp_end,
+                formatted_timestamp=str(timestamp),
+                formatted_timestamp_end=str(timestamp_end),
+                free=free,
+                available_resources=str(resource_id),
+                maximum_capacity=free,
+            )
+        )
+    db.session.add_all(slots)
+    db.session.commit()
+    return [slot.id for slot in slots]
+
+
+def free_places(slot_ids):
+    """ Get current free places of given slots. """
+    db.session.remove()
+    return [Slots.query.get(slot_id).free for slot_id in slot_ids]
+
+
 def str2bool(str_var):
     return str_var.lower() in ("true", "1")
+
+
+def asgi_to_wsgi(asgi_app):
+    """ Wrap ASGI application into WSGI application, so it can be called by
+        Werkzeug test client.
+
+    Args:
+        asgi_app (callable): ASGI application
+
+    Returns:
+        wsgi_app (callable): WSGI application
+    """
+
+    def wsgi_app(environ, start_response):
+        body = environ["wsgi.input"].read()
+        headers = [
+            (key[5:].replace("_", "-").lower().encode("latin1"), value.encode("latin1"))
+            for key, value in environ.items()
+            if key.startswith("HTTP_")
+            and key not in ("HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH")
+        ]
+        for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(key):
+                name = key.replace("_", "-").lower().encode("latin1")
+                headers.append((name, environ[key].encode("latin1")))
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "root_path": environ["SCRIPT_NAME"].encode("latin1").decode("utf8"),
+            "path": environ["PATH_INFO"].encode("latin1").decode("utf8"),
+            "query_string": environ["QUERY_STRING"].encode("latin1"),
+            "headers": headers,
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+            "client": (environ.get("REMOTE_ADDR", "127.0.0.1"), 0),
+        }
+        messages = list()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(asgi_app(scope, receive, send))
+        finally:
+            loop.close()
+        status = messages[0]["status"]
+        start_response(
+            f"{status} {HTTP_STATUS_CODES.get(status, 'UNKNOWN')}",
+            [
+                (name.decode("latin1"), value.decode("latin1"))
+                for name, value in messages[0]["headers"]
+            ],
+        )
+        return [message["body"] for message in messages[1:]]
+
+    return wsgi_app
+
+
+class AsgiTestClient(FlaskClient):
+    """ Flask test client sending requests through ASGI serving mode. """
+
+    def run_wsgi_app(self, environ, buffered=False):
+        from bookings_api import asgi_app
+
+        if self.cookie_jar is not None:
+            self.cookie_jar.inject_wsgi(environ)
+        rv = run_wsgi_app(asgi_to_wsgi(asgi_app), environ, buffered=buffered)
+        if self.cookie_jar is not None:
+            self.cookie_jar.extract_wsgi(environ, rv[2])
+        return rv
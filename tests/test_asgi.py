@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+from src.asgi import AsgiApp
+from src.database.models import db, Bookings, Users
+from bookings_api import app, asgi_app
+from tests import helpers
+
+
+def http_scope(path, query_string=b""):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "query_string": query_string,
+        "headers": [(b"host", b"127.0.0.1:5000")],
+        "server": ("127.0.0.1", 5000),
+        "client": ("127.0.0.1", 40000),
+    }
+
+
+async def call(application, scope, send=None):
+    messages = list()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def append(message):
+        messages.append(message)
+
+    await application(scope, receive, send or append)
+    return messages
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsgi:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Bookings)
+            helpers.insert_test_data_into_db_table(Users)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_streamed_response(self, client):
+        """ Streamed response is sent in many body messages. """
+        chunk_size = app.config["STREAM_CHUNK_SIZE"]
+        app.config["STREAM_CHUNK_SIZE"] = 2
+        try:
+            messages = run(call(asgi_app, http_scope("/bookings", b"stream=true")))
+        finally:
+            app.config["STREAM_CHUNK_SIZE"] = chunk_size
+        assert messages[0]["type"] == "http.response.start"
+        assert messages[0]["status"] == 200
+        bodies = messages[1:]
+        assert len(bodies) > 2
+        assert all(message["more_body"] for message in bodies[:-1])
+        assert not bodies[-1]["more_body"]
+        streamed = json.loads(b"".join(message["body"] for message in bodies))
+        assert streamed == client.get("/bookings?stream=true").json
+
+    def test_concurrent_requests(self, client):
+        """ Requests are handled concurrently by worker threads. """
+
+        async def get_users():
+            return await asyncio.gather(
+                *[call(asgi_app, http_scope("/users")) for _ in range(10)]
+            )
+
+        responses = run(get_users())
+        assert [messages[0]["status"] for messages in responses] == [200] * 10
+        bodies = {messages[1]["body"] for messages in responses}
+        assert len(bodies) == 1
+
+    def test_client_disconnect_releases_worker(self, client):
+        """ Worker thread of stream is released when sending fails. """
+        single_worker_app = AsgiApp(app, max_workers=1)
+        chunk_size = app.config["STREAM_CHUNK_SIZE"]
+        app.config["STREAM_CHUNK_SIZE"] = 1
+
+        async def disconnect(message):
+            if message["type"] == "http.response.body":
+                raise ConnectionResetError()
+
+        try:
+            with pytest.raises(ConnectionResetError):
+                run(
+                    call(
+                        single_worker_app,
+                        http_scope("/users", b"stream=true"),
+                        disconnect,
+                    )
+                )
+        finally:
+            app.config["STREAM_CHUNK_SIZE"] = chunk_size
+        messages = run(call(single_worker_app, http_scope("/users")))
+        assert messages[0]["status"] == 200
+
+    def test_lifespan(self):
+        """ Startup and shutdown are confirmed, shutdown stops workers. """
+        lifespan_app = AsgiApp(app, max_workers=1)
+        events = ["lifespan.startup", "lifespan.shutdown"]
+        sent = list()
+
+        async def receive():
+            return {"type": events.pop(0)}
+
+        async def send(message):
+            sent.append(message["type"])
+
+        run(lifespan_app({"type": "lifespan"}, receive, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        with pytest.raises(RuntimeError):
+            lifespan_app.executor.submit(print)
+
+    def test_unsupported_scope(self):
+        """ Websocket connections are not supported. """
+        with pytest.raises(ValueError) as err:
+            run(call(asgi_app, {"type": "websocket"}))
+        assert str(err.value) == "Unsupported ASGI scope type: websocket"
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
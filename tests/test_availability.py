@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.models import db, Bookings, Resources
+from src.libs.availability import free_windows
+from src.libs.schedule import Schedule
+from src.libs.timeslots import parse_opening_windows
+from bookings_api import app
+from tests import helpers
+
+
+class TestAvailability:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_free_windows_sweep(self):
+        """ Subtract bookings, including one spanning two windows. """
+        day = datetime(2019, 6, 17)
+        open_windows = [
+            (day + timedelta(hours=8), day + timedelta(hours=12)),
+            (day + timedelta(hours=13), day + timedelta(hours=16)),
+        ]
+        busy = [
+            (day + timedelta(hours=7), day + timedelta(hours=8, minutes=30), 1),
+            (day + timedelta(hours=9), day + timedelta(hours=9, minutes=15), 2),
+            (day + timedelta(hours=11), day + timedelta(hours=14), 3),
+        ]
+        assert free_windows(open_windows, busy, timedelta(0)) == [
+            (day + timedelta(hours=8, minutes=30), day + timedelta(hours=9)),
+            (day + timedelta(hours=9, minutes=15), day + timedelta(hours=11)),
+            (day + timedelta(hours=14), day + timedelta(hours=16)),
+        ]
+        assert free_windows(open_windows, busy, timedelta(minutes=60)) == [
+            (day + timedelta(hours=9, minutes=15), day + timedelta(hours=11)),
+            (day + timedelta(hours=14), day + timedelta(hours=16)),
+        ]
+
+    def test_open_windows_merged_over_midnight(self):
+        """ Windows touching at midnight are merged into one. """
+        schedule = Schedule([parse_opening_windows("20:00-24:00-00:00-02:00")] * 7, 60)
+        day = datetime(2019, 6, 17)
+        assert schedule.open_windows(day, day + timedelta(days=2)) == [
+            (day, day + timedelta(hours=2)),
+            (day + timedelta(hours=20), day + timedelta(days=1, hours=2)),
+            (day + timedelta(days=1, hours=20), day + timedelta(days=2)),
+        ]
+
+    def test_get_availability(self, client):
+        """ Get free windows of a day with a booking. """
+        get_response = client.get(
+            "/availability?resource-id=1&from=2019-04-10&to=2019-04-10"
+        )
+        assert get_response.status_code == 200
+        assert get_response.json == [
+            {
+                "from": "2019-04-10 08:00:00",
+                "to": "2019-04-10 10:00:00",
+                "duration": 120,
+            },
+            {
+                "from": "2019-04-10 10:15:00",
+                "to": "2019-04-10 12:00:00",
+                "duration": 105,
+            },
+            {
+                "from": "2019-04-10 12:30:00",
+                "to": "2019-04-10 16:00:00",
+                "duration": 210,
+            },
+        ]
+
+    def test_get_availability_minimum_duration(self, client):
+        """ Skip windows shorter than given duration. """
+        get_response = client.get(
+            "/availability?resource-id=1&from=2019-04-10&to=2019-04-10&duration=110"
+        )
+        assert [window["from"] for window in get_response.json] == [
+            "2019-04-10 08:00:00",
+            "2019-04-10 12:30:00",
+        ]
+
+    def test_get_availability_after_booking(self, client):
+        """ Booking over the break cuts both opening windows. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from="2019-04-15 11:30:00",
+                booked_to="2019-04-15 13:00:00",
+            ),
+        )
+        assert post_response.status_code == 200
+        get_response = client.get(
+            "/availability?resource-id=1&from=2019-04-13&to=2019-04-15"
+        )
+        assert get_response.json == [
+            {
+                "from": "2019-04-15 08:00:00",
+                "to": "2019-04-15 11:30:00",
+                "duration": 210,
+            },
+            {
+                "from": "2019-04-15 13:00:00",
+                "to": "2019-04-15 16:00:00",
+                "duration": 180,
+            },
+        ]
+
+    def test_get_availability_90_days(self, client):
+        """ Get free windows of 90 days of resource opened on weekends. """
+        get_response = client.get(
+            "/availability?resource-id=3&from=2019-06-17&to=2019-09-14"
+        )
+        assert get_response.status_code == 200
+        assert len(get_response.json) == 13 + 12
+        assert get_response.json[0] == {
+            "from": "2019-06-22 08:00:00",
+            "to": "2019-06-22 16:00:00",
+            "duration": 480,
+        }
+
+    @pytest.mark.parametrize(
+        "query, status_code, errors",
+        [
+            (
+                "resource-id=1&from=2019-04-10",
+                406,
+                "'resource-id', 'from' and 'to' URL parameters should be provided",
+            ),
+            (
+                "resource-id=1&from=2019-04-10&to=2019-04-10&duration=-5",
+                406,
+                "'duration' should be a non-negative integer",
+            ),
+            (
+                "resource-id=1&from=10-04-2019&to=2019-04-10",
+                406,
+                "Dates should be provided in YYYY-MM-DD format "
+                "and resource ID should be an integer",
+            ),
+            (
+                "resource-id=1&from=2019-04-10&to=2019-04-09",
+                406,
+                "'to' should be between 'from' and 366 days later",
+            ),
+            (
+                "resource-id=10&from=2019-04-10&to=2019-04-10",
+                404,
+                "Resource with given ID: 10 was not found",
+            ),
+        ],
+    )
+    def test_get_availability_invalid(self, client, query, status_code, errors):
+        """ Try to get availability with improper URL parameters. """
+        get_response = client.get(f"/availability?{query}")
+        assert get_response.status_code == status_code
+        assert get_response.json["errors"] == errors
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
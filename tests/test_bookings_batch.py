@@ -0,0 +1,175 @@
+import pytest
+
+from src.database.models import db, Bookings
+from bookings_api import app
+from tests import helpers
+
+
+class TestBookingsBatch:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_add_batch_all_or_nothing(self, client):
+        """ Add valid batch of bookings in default mode. """
+        post_response = client.post(
+            "/bookings/batch",
+            json=dict(
+                bookings=[
+                    dict(
+                        resource_id=1,
+                        user_id=1,
+                        booked_from="2019-05-01 10:00:00",
+                        booked_to="2019-05-01 11:00:00",
+                        notes="first",
+                    ),
+                    dict(
+                        resource_id=1,
+                        user_id=2,
+                        booked_from="2019-05-01 11:00:00",
+                        booked_to="2019-05-01 12:00:00",
+                    ),
+                ]
+            ),
+        )
+        assert post_response.status_code == 200
+        assert post_response.json["success"] is True
+        assert post_response.json["message"] == "2 of 2 bookings added"
+        assert [result["id"] for result in post_response.json["results"]] == [4, 5]
+        get_response = client.get("/bookings?id=4")
+        assert get_response.json[0]["notes"] == "first"
+        assert get_response.json[0]["booked_from"] == "Wed, 01 May 2019 10:00:00 GMT"
+        get_response = client.get("/bookings?id=5")
+        assert get_response.json[0]["user_id"] == 2
+
+    def test_reject_whole_batch(self, client):
+        """ Invalid booking rejects whole batch in all-or-nothing mode. """
+        post_response = client.post(
+            "/bookings/batch",
+            json=dict(
+                mode="all-or-nothing",
+                bookings=[
+                    dict(
+                        resource_id=2,
+                        user_id=1,
+                        booked_from="2019-05-02 10:00:00",
+                        booked_to="2019-05-02 11:00:00",
+                    ),
+                    dict(resource_id=2, user_id=1),
+                ],
+            ),
+        )
+        assert post_response.status_code == 406
+        assert post_response.json["success"] is False
+        assert post_response.json["errors"][0]["success"] is True
+        assert post_response.json["errors"][1]["status"] == 406
+        assert post_response.json["errors"][1]["errors"] == [
+            "'booked_from' is a required property",
+            "'booked_to' is a required property",
+        ]
+        assert client.get("/bookings?resource-id=2").json[-1]["id"] == 2
+
+    def test_reject_whole_batch_with_conflict(self, client):
+        """ Overlapping booking rejects whole batch with conflict status. """
+        post_response = client.post(
+            "/bookings/batch",
+            json=dict(
+                bookings=[
+                    dict(
+                        resource_id=2,
+                        user_id=1,
+                        booked_from="2019-05-02 10:00:00",
+                        booked_to="2019-05-02 11:00:00",
+                    ),
+                    dict(
+                        resource_id=1,
+                        user_id=1,
+                        booked_from="2019-05-01 10:30:00",
+                        booked_to="2019-05-01 11:30:00",
+                    ),
+                    dict(resource_id=2, user_id=1),
+                ]
+            ),
+        )
+        assert post_response.status_code == 409
+        assert post_response.json["message"] == "Booking conflict"
+        assert [result["status"] for result in post_response.json["errors"]] == [
+            200,
+            409,
+            406,
+        ]
+        assert client.get("/bookings?resource-id=2").json[-1]["id"] == 2
+
+    def test_add_batch_best_effort(self, client):
+        """ Add only valid bookings in best-effort mode. """
+        post_response = client.post(
+            "/bookings/batch",
+            json=dict(
+                mode="best-effort",
+                bookings=[
+                    dict(
+                        resource_id=1,
+                        user_id=1,
+                        booked_from="2019-05-01 10:30:00",
+                        booked_to="2019-05-01 10:45:00",
+                    ),
+                    dict(
+                        resource_id=2,
+                        user_id=1,
+                        booked_from="2019-05-03 10:00:00",
+                        booked_to="2019-05-03 11:00:00",
+                    ),
+                    dict(
+                        resource_id=2,
+                        user_id=3,
+                        booked_from="2019-05-03 10:30:00",
+                        booked_to="2019-05-03 12:00:00",
+                    ),
+                    dict(
+                        resource_id=2,
+                        user_id=3,
+                        booked_from="2019-05-04 12:00:00",
+                        booked_to="2019-05-04 10:00:00",
+                    ),
+                ],
+            ),
+        )
+        assert post_response.status_code == 200
+        assert post_response.json["success"] is False
+        assert post_response.json["message"] == "1 of 4 bookings added"
+        results = post_response.json["results"]
+        assert [result["success"] for result in results] == [False, True, False, False]
+        assert results[0]["errors"] == ["Booking overlaps existing booking with ID: 4"]
+        assert results[1]["id"] == 6
+        assert results[2]["errors"] == [
+            "Booking overlaps booking with index 1 of this batch"
+        ]
+        assert results[3]["errors"] == [
+            "'booked_to' should be later than 'booked_from'"
+        ]
+
+    def test_add_empty_batch(self, client):
+        """ Try to add batch without bookings. """
+        post_response = client.post("/bookings/batch", json=dict(bookings=[]))
+        assert post_response.status_code == 406
+        assert post_response.json["message"] == "Invalid input"
+        assert post_response.json["errors"] == ["[] is too short"]
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
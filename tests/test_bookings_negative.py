@@ -1,5 +1,9 @@
+import time
+from datetime import datetime
+
 import pytest
 
+from src.api.bookings import get_bookings_index
 from src.database.models import db, Bookings
 from bookings_api import app
 from tests import helpers
@@ -79,6 +83,21 @@ class TestBookingsNegative:
         assert response.status_code == 200
         assert response.json == exp_json
 
+    def test_get_bookings_with_improper_limit(self, client):
+        """ Use page size which is not a positive integer. """
+        for limit in ("0", "-3", "ten"):
+            response = client.get(f"/bookings?limit={limit}")
+            assert response.status_code == 406
+            assert response.json["message"] == "Invalid input"
+            assert response.json["errors"] == "'limit' should be a positive integer"
+
+    def test_get_bookings_with_improper_cursor(self, client):
+        """ Use cursor which was not returned by the API. """
+        response = client.get("/bookings?after=not-a-cursor")
+        assert response.status_code == 406
+        assert response.json["message"] == "Invalid input"
+        assert response.json["errors"] == "Improper 'after' cursor provided"
+
     def test_improper_key_when_adding_booking(self, client):
         """ Use improper JSON key in POST request. """
         post_response = client.post("/bookings", json=dict(asd="Janusz"))
@@ -92,6 +111,113 @@ class TestBookingsNegative:
             "'booked_to' is a required property",
         ]
 
+    def test_add_overlapping_booking(self, client):
+        """ Try to add booking overlapping existing booking of the resource. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=3,
+                booked_from="2019-04-10 10:10:00",
+                booked_to="2019-04-10 10:20:00",
+            ),
+        )
+        assert post_response.status_code == 409
+        assert post_response.json["message"] == "Booking conflict"
+        assert post_response.json["success"] is False
+        assert (
+            post_response.json["errors"]
+            == "Booking overlaps existing booking with ID: 1"
+        )
+
+    def test_add_booking_overlapping_booking_of_other_process(self, client):
+        """ Booking written by other process is missing in bookings index,
+            database check still rejects overlapping booking. """
+        booking_id = db.engine.execute(
+            Bookings.__table__.insert().values(
+                resource_id=2,
+                user_id=1,
+                booked_from=datetime(2019, 4, 20, 10, 0),
+                booked_to=datetime(2019, 4, 20, 11, 0),
+            )
+        ).inserted_primary_key[0]
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=2,
+                user_id=3,
+                booked_from="2019-04-20 10:30:00",
+                booked_to="2019-04-20 11:30:00",
+            ),
+        )
+        assert post_response.status_code == 409
+        assert post_response.json["errors"] == (
+            f"Booking overlaps existing booking with ID: {booking_id}"
+        )
+
+    def test_add_booking_deleted_by_other_process(self, client):
+        """ Booking deleted by other process stays in bookings index, it does
+            not block new booking of its period. """
+        index = get_bookings_index()
+        for _ in range(100):
+            if index.loaded:
+                break
+            time.sleep(0.05)
+        assert index.loaded
+        booking = dict(
+            resource_id=2,
+            user_id=3,
+            booked_from="2019-04-21 10:00:00",
+            booked_to="2019-04-21 11:00:00",
+        )
+        assert client.post("/bookings", json=booking).status_code == 200
+        db.engine.execute(
+            Bookings.__table__.delete().where(
+                Bookings.booked_from == datetime(2019, 4, 21, 10, 0)
+            )
+        )
+        assert client.post("/bookings", json=booking).status_code == 200
+
+    def test_add_booking_ending_before_start(self, client):
+        """ Try to add booking which ends before it starts. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=3,
+                booked_from="2019-04-12 10:00:00",
+                booked_to="2019-04-12 09:00:00",
+            ),
+        )
+        assert post_response.status_code == 406
+        assert post_response.json["message"] == "Invalid input"
+        assert post_response.json["success"] is False
+        assert (
+            post_response.json["errors"]
+            == "'booked_to' should be later than 'booked_from'"
+        )
+
+    def test_update_booking_to_overlapping_range(self, client):
+        """ Try to move booking onto time range of another booking. """
+        put_response = client.put(
+            "/bookings",
+            json=dict(
+                id=2,
+                resource_id=1,
+                booked_from="2019-04-10 09:30:00",
+                booked_to="2019-04-10 10:05:00",
+            ),
+        )
+        assert put_response.status_code == 409
+        assert put_response.json["message"] == "Booking conflict"
+        assert (
+            put_response.json["errors"]
+            == "Booking overlaps existing booking with ID: 1"
+        )
+        get_response = client.get("/bookings?id=2")
+        assert get_response.json[0]["resource_id"] == 2
+        assert get_response.json[0]["booked_from"] == "Thu, 11 Apr 2019 12:30:00 GMT"
+
     def test_update_non_existent_booking(self, client):
         """ Update non existent booking. """
         booking_id = 671
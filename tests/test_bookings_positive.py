@@ -157,6 +157,41 @@ class TestBookingsPositive:
         assert get_response.json == []
         assert get_response.status_code == 200
 
+    def test_add_adjacent_booking(self, client):
+        """ Add booking starting exactly when another booking ends. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=3,
+                booked_from="2019-04-10 10:15:00",
+                booked_to="2019-04-10 10:30:00",
+            ),
+        )
+        assert post_response.status_code == 200
+        assert post_response.json["success"] is True
+
+    def test_add_booking_in_place_of_removed_one(self, client):
+        """ Book time range released by removed booking. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=3,
+                user_id=1,
+                booked_from="2019-04-19 13:00:00",
+                booked_to="2019-04-19 14:00:00",
+            ),
+        )
+        assert post_response.status_code == 200
+        assert post_response.json["success"] is True
+
+    def test_stream_bookings(self, client):
+        """ Streamed response should contain the same bookings as regular one. """
+        response = client.get("/bookings?stream=true")
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.json == client.get("/bookings").json
+
     @classmethod
     def teardown_class(cls):
         with app.app_context():
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.database.models import db, Bookings, Resources, Users
+from src.libs.versions import table_versions
+from bookings_api import app
+from tests import helpers
+
+
+class TestConditionalGet:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+            helpers.insert_test_data_into_db_table(Users)
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/resources",
+            "/users?id=1",
+            "/bookings?resource-id=1",
+            "/slots",
+            "/availability?resource-id=1&from=2019-04-10&to=2019-04-10",
+        ],
+    )
+    def test_not_modified(self, client, url):
+        """ Get 304 response for current ETag. """
+        get_response = client.get(url)
+        assert get_response.status_code == 200
+        etag = get_response.headers["ETag"]
+        get_response = client.get(url, headers={"If-None-Match": etag})
+        assert get_response.status_code == 304
+        assert get_response.data == b""
+        assert get_response.headers["ETag"] == etag
+
+    def test_etag_depends_on_query(self, client):
+        """ Same query in different parameters order has the same ETag. """
+        first_etag = client.get("/users?id=1&name=Jan").headers["ETag"]
+        second_etag = client.get("/users?name=Jan&id=1").headers["ETag"]
+        other_etag = client.get("/users?id=2").headers["ETag"]
+        assert first_etag == second_etag
+        assert first_etag != other_etag
+
+    def test_etag_changed_after_write(self, client):
+        """ Successful write changes ETag of the table. """
+        etag = client.get("/resources").headers["ETag"]
+        put_response = client.put("/resources", json=dict(id=2, active=True))
+        assert put_response.status_code == 200
+        get_response = client.get("/resources", headers={"If-None-Match": etag})
+        assert get_response.status_code == 200
+        assert get_response.headers["ETag"] != etag
+        assert get_response.json[1]["active"] is True
+
+    def test_failed_write_keeps_version(self, client):
+        """ Rejected write does not invalidate ETags of the table. """
+        version = table_versions.get("bookings")
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from="2019-04-10 10:00:00",
+                booked_to="2019-04-10 10:10:00",
+            ),
+        )
+        assert post_response.status_code == 409
+        assert table_versions.get("bookings") == version
+
+    def test_etag_changed_by_other_process(self, client):
+        """ Slots generated by flask slots generate change ETag of slots. """
+        url = "/slots?from=2019-06-17"
+        get_response = client.get(url)
+        assert get_response.json == []
+        etag = get_response.headers["ETag"]
+        subprocess.run(
+            [sys.executable, "-m", "flask", "slots", "generate"]
+            + ["--from", "2019-06-17", "--to", "2019-06-17"],
+            env=dict(os.environ, FLASK_APP="bookings_api.py", LC_ALL="C.UTF-8"),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        get_response = client.get(url, headers={"If-None-Match": etag})
+        assert get_response.status_code == 200
+        assert get_response.headers["ETag"] != etag
+        assert len(get_response.json) == 30 + 8
+
+    def test_etag_shared_by_processes(self, client):
+        """ ETag does not depend on process, epoch is stored in database. """
+        etag = client.get("/users?id=1").headers["ETag"]
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from bookings_api import app\n"
+                "print(app.test_client().get('/users?id=1').headers['ETag'])",
+            ],
+            env=dict(os.environ, LC_ALL="C.UTF-8"),
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+        assert completed.stdout.decode().strip() == etag
+
+    def test_etag_changed_after_database_recreated(self, client):
+        """ Versions start from zero in new database, epoch does not. """
+        etag = client.get("/users?id=1").headers["ETag"]
+        db.drop_all()
+        db.create_all()
+        helpers.insert_test_data_into_db_table(Users)
+        get_response = client.get("/users?id=1", headers={"If-None-Match": etag})
+        assert get_response.status_code == 200
+        assert get_response.headers["ETag"] != etag
+
+    def test_error_response_without_etag(self, client):
+        """ Error responses are not tagged. """
+        get_response = client.get("/users?limit=0")
+        assert get_response.status_code == 406
+        assert "ETag" not in get_response.headers
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
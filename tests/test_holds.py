@@ -0,0 +1,238 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.api.bookings import bookings_index
+from src.database.models import db, Bookings, Holds, Resources
+from src.libs.holds import HoldsSweeper, sweep_expired_holds
+from bookings_api import app
+from tests import helpers
+
+
+def hold(resource_id, held_from, held_to, **kwargs):
+    return dict(
+        resource_id=resource_id,
+        user_id=1,
+        held_from=held_from,
+        held_to=held_to,
+        **kwargs,
+    )
+
+
+def booking(resource_id, booked_from, booked_to):
+    return dict(
+        resource_id=resource_id, user_id=1, booked_from=booked_from, booked_to=booked_to
+    )
+
+
+class TestHolds:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_hold_blocks_bookings_and_availability(self, client):
+        slot_ids = helpers.insert_slots(1, datetime(2030, 1, 7, 10, 0), 2)
+        response = client.post(
+            "/holds", json=hold(1, "2030-01-07 10:00:00", "2030-01-07 11:00:00")
+        )
+        assert response.status_code == 200
+        hold_id = response.json["id"]
+        expires_at = datetime.strptime(
+            response.json["expires_at"], "%Y-%m-%d %H:%M:%S.%f"
+        )
+        assert expires_at > datetime.now() + timedelta(seconds=290)
+        assert helpers.free_places(slot_ids) == [0, 0]
+        response = client.post(
+            "/bookings", json=booking(1, "2030-01-07 10:30:00", "2030-01-07 12:00:00")
+        )
+        assert response.status_code == 409
+        assert response.json["errors"] == f"Booking overlaps hold with ID: {hold_id}"
+        response = client.post(
+            "/holds", json=hold(1, "2030-01-07 09:00:00", "2030-01-07 10:15:00")
+        )
+        assert response.status_code == 409
+        response = client.get(
+            "/availability?resource-id=1&from=2030-01-07&to=2030-01-07"
+        )
+        assert [(window["from"], window["to"]) for window in response.json] == [
+            ("2030-01-07 08:00:00", "2030-01-07 10:00:00"),
+            ("2030-01-07 11:00:00", "2030-01-07 12:00:00"),
+            ("2030-01-07 12:30:00", "2030-01-07 16:00:00"),
+        ]
+
+    def test_release_hold(self, client):
+        slot_ids = helpers.insert_slots(1, datetime(2030, 1, 8, 10, 0), 2)
+        response = client.post(
+            "/holds", json=hold(1, "2030-01-08 10:00:00", "2030-01-08 11:00:00")
+        )
+        hold_id = response.json["id"]
+        assert client.delete(f"/holds?id={hold_id}").status_code == 200
+        assert client.delete(f"/holds?id={hold_id}").status_code == 404
+        assert helpers.free_places(slot_ids) == [1, 1]
+        response = client.post(
+            "/bookings", json=booking(1, "2030-01-08 10:00:00", "2030-01-08 11:00:00")
+        )
+        assert response.status_code == 200
+
+    def test_confirm_hold(self, client):
+        slot_ids = helpers.insert_slots(2, datetime(2030, 1, 9, 10, 0), 2)
+        response = client.post(
+            "/holds", json=hold(2, "2030-01-09 10:00:00", "2030-01-09 11:00:00")
+        )
+        hold_id = response.json["id"]
+        response = client.post("/holds/confirm", json=dict(id=hold_id, notes="paid"))
+        assert response.status_code == 200
+        booking_id = response.json["id"]
+        row = client.get(f"/bookings?id={booking_id}").json[0]
+        assert row["resource_id"] == 2
+        assert row["booked_from"] == "Wed, 09 Jan 2030 10:00:00 GMT"
+        assert row["booked_to"] == "Wed, 09 Jan 2030 11:00:00 GMT"
+        assert row["notes"] == "paid"
+        # places taken by the hold are kept by the booking
+        assert helpers.free_places(slot_ids) == [0, 0]
+        assert Holds.query.get(hold_id) is None
+        response = client.post(
+            "/bookings", json=booking(2, "2030-01-09 10:00:00", "2030-01-09 10:30:00")
+        )
+        assert response.json["errors"] == (
+            f"Booking overlaps existing booking with ID: {booking_id}"
+        )
+        response = client.post("/holds/confirm", json=dict(id=hold_id))
+        assert response.status_code == 404
+
+    def test_confirm_hold_with_outdated_index(self, client):
+        """ Booking deleted and hold added by other process, confirmed booking
+            replaces outdated interval of bookings index. """
+        for _ in range(100):
+            if bookings_index.loaded:
+                break
+            time.sleep(0.05)
+        assert bookings_index.loaded
+        held_from = datetime(2030, 1, 10, 10, 0)
+        held_to = datetime(2030, 1, 10, 11, 0)
+        response = client.post(
+            "/bookings", json=booking(2, "2030-01-10 10:30:00", "2030-01-10 11:30:00")
+        )
+        assert response.status_code == 200
+        db.engine.execute(
+            Bookings.__table__.delete().where(
+                Bookings.booked_from == datetime(2030, 1, 10, 10, 30)
+            )
+        )
+        hold_id = db.engine.execute(
+            Holds.__table__.insert().values(
+                resource_id=2,
+                user_id=1,
+                held_from=held_from,
+                held_to=held_to,
+                expires_at=datetime.now() + timedelta(minutes=5),
+            )
+        ).inserted_primary_key[0]
+        response = client.post("/holds/confirm", json=dict(id=hold_id))
+        assert response.status_code == 200
+        booking_id = response.json["id"]
+        assert bookings_index.overlapping(2, held_from, datetime(2030, 1, 11)) == [
+            (held_from, held_to, booking_id)
+        ]
+
+    def test_invalid_holds(self, client):
+        response = client.post(
+            "/holds", json=hold(3, "2030-01-10 10:00:00", "2030-01-10 11:00:00", ttl=0)
+        )
+        assert response.status_code == 406
+        response = client.post(
+            "/holds",
+            json=hold(3, "2030-01-10 10:00:00", "2030-01-10 11:00:00", ttl=86400),
+        )
+        assert response.status_code == 406
+        response = client.post(
+            "/holds", json=hold(3, "2030-01-10 11:00:00", "2030-01-10 10:00:00")
+        )
+        assert response.status_code == 406
+        response = client.post(
+            "/holds", json=dict(resource_id=3, held_from="2030-01-10 10:00:00")
+        )
+        assert response.status_code == 406
+
+    def test_sweep_expired_holds(self, client):
+        slot_ids = helpers.insert_slots(3, datetime(2030, 1, 11, 10, 0), 2)
+        for hour in (10, 11):
+            response = client.post(
+                "/holds",
+                json=hold(3, f"2030-01-11 {hour}:00:00", f"2030-01-11 {hour}:30:00"),
+            )
+            assert response.status_code == 200
+        assert helpers.free_places(slot_ids) == [0, 1]
+        now = datetime.now() + timedelta(hours=1)
+        expiring = Holds.query.count()
+        assert expiring >= 2
+        # batches of single hold
+        assert sweep_expired_holds(db.engine, bookings_index, 1, now) == expiring
+        assert sweep_expired_holds(db.engine, bookings_index, 1, now) == 0
+        assert helpers.free_places(slot_ids) == [1, 1]
+        assert Holds.query.filter_by(resource_id=3).count() == 0
+        response = client.post(
+            "/bookings", json=booking(3, "2030-01-11 10:00:00", "2030-01-11 11:00:00")
+        )
+        assert response.status_code == 200
+
+    def test_expired_hold_does_not_block(self, client):
+        slot_ids = helpers.insert_slots(3, datetime(2030, 1, 14, 10, 0), 2)
+        first = client.post(
+            "/holds", json=hold(3, "2030-01-14 10:00:00", "2030-01-14 10:30:00", ttl=1)
+        ).json["id"]
+        second = client.post(
+            "/holds", json=hold(3, "2030-01-14 10:30:00", "2030-01-14 11:00:00", ttl=1)
+        ).json["id"]
+        time.sleep(1.1)
+        response = client.post("/holds/confirm", json=dict(id=first))
+        assert response.status_code == 409
+        assert response.json["message"] == "Hold expired"
+        # expired holds in the way are swept by the booking request
+        response = client.post(
+            "/bookings", json=booking(3, "2030-01-14 10:00:00", "2030-01-14 11:00:00")
+        )
+        assert response.status_code == 200
+        assert helpers.free_places(slot_ids) == [0, 0]
+        assert Holds.query.filter(Holds.id.in_([first, second])).count() == 0
+
+    def test_background_sweeper(self, client):
+        slot_ids = helpers.insert_slots(3, datetime(2030, 1, 15, 10, 0), 1)
+        client.post(
+            "/holds", json=hold(3, "2030-01-15 10:00:00", "2030-01-15 10:30:00", ttl=1)
+        )
+        assert helpers.free_places(slot_ids) == [0]
+        sweeper = HoldsSweeper()
+        interval = app.config["HOLDS_SWEEP_INTERVAL"]
+        app.config["HOLDS_SWEEP_INTERVAL"] = 0.05
+        try:
+            sweeper.start(app, bookings_index)
+            assert sweeper.running
+            deadline = time.monotonic() + 5
+            while helpers.free_places(slot_ids) != [1]:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+        finally:
+            sweeper.stop()
+            app.config["HOLDS_SWEEP_INTERVAL"] = interval
+        assert not sweeper.running
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
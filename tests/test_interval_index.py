@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from src.libs.interval_index import IntervalIndex
+
+
+def hour(value):
+    return datetime(2019, 6, 17, value)
+
+
+class TestIntervalIndex:
+    def test_add_and_find_overlap(self):
+        index = IntervalIndex()
+        assert index.add(1, hour(8), hour(10), 1) is None
+        assert index.add(1, hour(10), hour(11), 2) is None
+        assert index.add(1, hour(9), hour(12), 3) == 2
+        assert index.add(2, hour(9), hour(12), 3) is None
+        assert index.find_overlap(1, hour(11), hour(12)) is None
+        index.remove(1, hour(10), 2)
+        assert index.find_overlap(1, hour(10), hour(11)) is None
+
+    def test_load_overlapping_rows(self):
+        """ Rows overlapping each other in table are still detected. """
+        index = IntervalIndex()
+        index.load(
+            [
+                (1, hour(1), hour(10), 100),
+                (1, hour(2), hour(3), 101),
+                (1, hour(12), hour(13), 102),
+                (2, hour(2), hour(3), 200),
+            ]
+        )
+        assert index.overlapping_count == 1
+        assert index.find_overlap(1, hour(5), hour(6)) == 100
+        assert index.find_overlap(1, hour(2), hour(3)) in (100, 101)
+        assert index.add(1, hour(5), hour(6), 103) == 100
+        assert index.add(1, hour(10), hour(12), 104) is None
+        assert [item for _, _, item in index.overlapping(1, hour(0), hour(23))] == [
+            100,
+            101,
+            104,
+            102,
+        ]
+        index.remove(1, hour(1), 100)
+        assert index.find_overlap(1, hour(5), hour(6)) is None
+        assert index.find_overlap(1, hour(2), hour(3)) == 101
+        index.remove(1, hour(2), 101)
+        assert index.find_overlap(1, hour(2), hour(3)) is None
+        assert index.overlapping_count == 0
+
+    def test_writes_during_load_are_replayed(self):
+        """ Intervals added and removed while rows are read are not lost. """
+        index = IntervalIndex()
+        generation = index.start_loading()
+        assert index.add(1, hour(8), hour(9), 1) is None
+        assert index.add(1, hour(10), hour(11), 2) is None
+        index.remove(1, hour(12), 3)
+        assert not index.loaded
+        # rows read after the first write was committed
+        index.load([(1, hour(8), hour(9), 1), (1, hour(12), hour(13), 3)], generation)
+        assert index.loaded
+        assert not index.loading
+        assert [item for _, _, item in index.overlapping(1, hour(0), hour(23))] == [
+            1,
+            2,
+        ]
+
+    def test_load_started_before_clear_is_dropped(self):
+        index = IntervalIndex()
+        generation = index.start_loading()
+        index.clear()
+        index.load([(1, hour(8), hour(9), 1)], generation)
+        assert not index.loaded
+        assert index.find_overlap(1, hour(8), hour(9)) is None
+
+    def test_load_resource(self):
+        """ Reload intervals of single resource, others are kept. """
+        index = IntervalIndex()
+        index.load([(1, hour(8), hour(9), 1), (2, hour(8), hour(9), 2)])
+        index.load_resource(1, [(hour(10), hour(11), 3), (hour(10), hour(12), 4)])
+        assert index.find_overlap(1, hour(8), hour(9)) is None
+        assert index.find_overlap(1, hour(11), hour(12)) == 4
+        assert index.find_overlap(2, hour(8), hour(9)) == 2
@@ -0,0 +1,108 @@
+import json
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from src.logger import JsonFormatter, access_logger, log_queue, slow_query_logger
+from src.database.models import db, Users
+from bookings_api import app
+from tests import helpers
+
+
+def access_records(caplog):
+    return [record for record in caplog.records if record.name == "access"]
+
+
+class TestLogging:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Users)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.fixture
+    def sample_rate(self):
+        """ Restore success sampling rate changed by test. """
+        rate = app.config["LOG_SUCCESS_SAMPLE_RATE"]
+        yield
+        app.config["LOG_SUCCESS_SAMPLE_RATE"] = rate
+
+    def test_loggers_write_to_queue(self):
+        """ Loggers only enqueue records, listener thread writes them. """
+        for logger in (app.logger, access_logger, slow_query_logger):
+            queue_handlers = [
+                handler
+                for handler in logger.handlers
+                if isinstance(handler, QueueHandler)
+            ]
+            assert queue_handlers
+            assert all(handler.queue is log_queue for handler in queue_handlers)
+            assert all(isinstance(handler, QueueHandler) for handler in logger.handlers)
+
+    def test_json_formatter(self):
+        """ Records are formatted as JSON lines with extra fields. """
+        record = access_logger.makeRecord(
+            "access",
+            logging.INFO,
+            __file__,
+            1,
+            "%s %s",
+            ("GET", "/users"),
+            None,
+            extra=dict(status=200, duration_ms=1.5),
+        )
+        line = JsonFormatter().format(record)
+        assert "\n" not in line
+        entry = json.loads(line)
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "access"
+        assert entry["message"] == "GET /users"
+        assert entry["status"] == 200
+        assert entry["duration_ms"] == 1.5
+        assert "time" in entry
+        assert "args" not in entry
+
+    def test_success_logged_with_full_rate(self, client, caplog, sample_rate):
+        app.config["LOG_SUCCESS_SAMPLE_RATE"] = 1
+        with caplog.at_level(logging.INFO, logger="access"):
+            assert client.get("/users?id=1").status_code == 200
+        records = access_records(caplog)
+        assert len(records) == 1
+        assert records[0].route == "/users"
+        assert records[0].status == 200
+        assert records[0].queries >= 1
+        assert records[0].duration_ms >= 0
+
+    def test_success_not_logged_with_zero_rate(self, client, caplog, sample_rate):
+        app.config["LOG_SUCCESS_SAMPLE_RATE"] = 0
+        with caplog.at_level(logging.INFO, logger="access"):
+            for _ in range(10):
+                assert client.get("/users").status_code == 200
+        assert access_records(caplog) == []
+
+    def test_errors_always_logged(self, client, caplog, sample_rate):
+        app.config["LOG_SUCCESS_SAMPLE_RATE"] = 0
+        with caplog.at_level(logging.INFO, logger="access"):
+            assert client.delete("/users").status_code == 406
+            assert client.get("/no-such-endpoint").status_code == 404
+        records = access_records(caplog)
+        assert [record.status for record in records] == [406, 404]
+        assert [record.route for record in records] == ["/users", "unmatched"]
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
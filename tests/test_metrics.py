@@ -0,0 +1,111 @@
+import pytest
+
+from src.libs.metrics import RequestMetrics
+from src.database.models import db, Users
+from bookings_api import app
+from tests import helpers
+
+
+def parse_metrics(text):
+    """ Map sample names with labels to their values. """
+    samples = dict()
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestMetrics:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Users)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_requests_recorded(self, client):
+        """ Count requests by route, method and status. """
+        before = parse_metrics(client.get("/metrics").data.decode())
+        client.get("/users")
+        client.get("/users?id=1")
+        client.post("/users", json=dict())
+        client.get("/users/1/unknown")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+        after = parse_metrics(response.data.decode())
+
+        def delta(name):
+            return after.get(name, 0) - before.get(name, 0)
+
+        assert (
+            delta('http_requests_total{method="GET",route="/users",status="200"}') == 2
+        )
+        assert (
+            delta('http_requests_total{method="POST",route="/users",status="406"}') == 1
+        )
+        assert (
+            delta('http_requests_total{method="GET",route="unmatched",status="404"}')
+            == 1
+        )
+        assert (
+            delta('http_request_duration_seconds_count{method="GET",route="/users"}')
+            == 2
+        )
+        assert (
+            delta(
+                'http_request_duration_seconds_bucket{method="GET",route="/users",le="+Inf"}'
+            )
+            == 2
+        )
+        assert after['http_requests_in_flight{method="GET",route="/users"}'] == 0
+        # request rendering metrics is still in flight
+        assert after['http_requests_in_flight{method="GET",route="/metrics"}'] == 1
+
+    def test_histogram_buckets(self):
+        """ Latencies are counted in cumulative buckets. """
+        metrics = RequestMetrics((0.1, 1.0))
+        for duration in (0.05, 0.1, 0.5, 3.0):
+            metrics.start("GET", "/users")
+            metrics.finish("GET", "/users", 200, duration)
+        metrics.start("PUT", '/a"b')
+        samples = parse_metrics(metrics.render())
+        labels = 'method="GET",route="/users"'
+        assert (
+            samples[f'http_request_duration_seconds_bucket{{{labels},le="0.1"}}'] == 2
+        )
+        assert (
+            samples[f'http_request_duration_seconds_bucket{{{labels},le="1.0"}}'] == 3
+        )
+        assert (
+            samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 4
+        )
+        assert samples[f"http_request_duration_seconds_sum{{{labels}}}"] == 3.65
+        assert samples[f"http_requests_in_flight{{{labels}}}"] == 0
+        assert samples['http_requests_in_flight{method="PUT",route="/a\\"b"}'] == 1
+
+    def test_request_without_response(self):
+        """ Request finished without response only leaves in-flight gauge. """
+        metrics = RequestMetrics((0.1,))
+        metrics.start("GET", "/users")
+        metrics.finish("GET", "/users")
+        assert parse_metrics(metrics.render()) == {
+            'http_requests_in_flight{method="GET",route="/users"}': 0
+        }
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,59 @@
+import pytest
+
+from src.api.bookings import build_bookings_query
+from src.api.slots import build_slots_query
+from src.database.migrations import MIGRATIONS, get_schema_version, upgrade_schema
+from src.database.models import db
+from bookings_api import app
+from tests import helpers
+
+
+class TestQueryPlans:
+    @classmethod
+    def setup_class(cls):
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+
+    @pytest.fixture(scope="module")
+    def context(self):
+        ctx = app.app_context()
+        ctx.push()
+        yield ctx
+        ctx.pop()
+
+    @pytest.mark.parametrize(
+        "query_args",
+        [
+            ("2018-04-01", "2018-06-01", None),
+            ("2018-03-12", None, None),
+            (None, "2018-03-12", None),
+        ],
+    )
+    def test_slots_queries_use_index(self, context, query_args):
+        """ Make sure slots date filters do not scan whole table. """
+        plan = helpers.explain_query_plan(build_slots_query(*query_args))
+        assert not [step for step in plan if step.startswith("SCAN")], plan
+
+    @pytest.mark.parametrize(
+        "query_args", [("1", None, None), (None, "3", None), (None, None, "2")]
+    )
+    def test_bookings_queries_use_index(self, context, query_args):
+        """ Make sure bookings filters do not scan whole table. """
+        plan = helpers.explain_query_plan(build_bookings_query(*query_args))
+        assert not [step for step in plan if step.startswith("SCAN")], plan
+
+    def test_upgrade_schema_is_idempotent(self, context):
+        """ Run migrations twice, second run should not apply anything. """
+        upgrade_schema(db.engine)
+        assert upgrade_schema(db.engine) == []
+        with db.engine.connect() as connection:
+            assert get_schema_version(connection) == MIGRATIONS[-1][0]
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.execute("PRAGMA user_version = 0")
+            app.logger.info("Database dropped")
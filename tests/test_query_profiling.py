@@ -0,0 +1,131 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.database.db_config import configure_query_profiling
+from src.libs.query_stats import QueryStats, normalize_statement
+from src.database.models import db, Users
+from bookings_api import app
+from tests import helpers
+
+
+class TestQueryProfiling:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Users)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.mark.parametrize(
+        "statement, normalized",
+        [
+            (
+                "SELECT users.id \nFROM users \nWHERE users.id = ?",
+                "SELECT users.id FROM users WHERE users.id = ?",
+            ),
+            (
+                "SELECT * FROM slots WHERE id IN (?, ?, ?) LIMIT 10",
+                "SELECT * FROM slots WHERE id IN (...) LIMIT ?",
+            ),
+            (
+                "SELECT * FROM users WHERE name = 'O''Brien' AND id > 12.5",
+                "SELECT * FROM users WHERE name = ? AND id > ?",
+            ),
+            ("SELECT anon_1.id_2 FROM t1", "SELECT anon_1.id_2 FROM t1"),
+        ],
+    )
+    def test_normalize_statement(self, statement, normalized):
+        """ Normalize whitespace, literals and parameter lists. """
+        assert normalize_statement(statement) == normalized
+
+    def test_stats_aggregated(self):
+        """ Executions of the same statement are aggregated. """
+        stats = QueryStats()
+        stats.record("SELECT 1 FROM users WHERE id IN (?, ?)", 0.5)
+        stats.record("SELECT 2 FROM users  WHERE id IN (?)", 1.5)
+        stats.record("DELETE FROM users", 0.25)
+        assert stats.snapshot() == [
+            {
+                "statement": "SELECT ? FROM users WHERE id IN (...)",
+                "count": 2,
+                "total": 2.0,
+                "mean": 1.0,
+                "max": 1.5,
+            },
+            {
+                "statement": "DELETE FROM users",
+                "count": 1,
+                "total": 0.25,
+                "mean": 0.25,
+                "max": 0.25,
+            },
+        ]
+
+    def test_get_query_stats(self, client):
+        """ Statements executed by endpoints are listed in diagnostics. """
+        assert client.get("/users?id=1").status_code == 200
+        response = client.get("/diagnostics/queries")
+        assert response.status_code == 200
+        statements = [stats["statement"] for stats in response.json]
+        assert any(
+            statement.startswith("SELECT users.id")
+            and "WHERE users.id = ?" in statement
+            for statement in statements
+        )
+
+    def test_queries_per_request(self, client):
+        """ Number of queries of request is recorded in metrics. """
+        client.get("/users")
+        metrics = client.get("/metrics").data.decode()
+        assert (
+            'http_request_db_queries_bucket{method="GET",route="/users",le="0"}'
+            in metrics
+        )
+        assert 'http_request_db_queries_count{method="GET",route="/users"}' in metrics
+
+    def test_slow_query_log(self, client, caplog):
+        """ Slow statements are logged with parameters and query plan. """
+        configure_query_profiling(dict(app.config, SLOW_QUERY_THRESHOLD=0))
+        try:
+            with caplog.at_level(logging.WARNING, logger="slow_queries"):
+                assert client.get("/users?id=3").status_code == 200
+        finally:
+            configure_query_profiling(app.config)
+        messages = [
+            record.getMessage()
+            for record in caplog.records
+            if record.name == "slow_queries"
+        ]
+        assert any(
+            "FROM users WHERE users.id = ?" in message
+            and "parameters: ('3'," in message
+            and "plan: SEARCH users USING INTEGER PRIMARY KEY" in message
+            for message in messages
+        )
+
+    def test_failed_statements_not_timed(self, client):
+        """ Failed statements leave nothing behind in connection. """
+        with db.engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute("SELECT * FROM missing_table")
+            assert connection.execute("SELECT 1").scalar() == 1
+            assert not connection.info.get("query_start")
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.database.db_config import configure_sqlite_pragmas
+from src.database.models import db, Bookings
+from src.database.routing import get_read_engine
+from bookings_api import app
+from tests import helpers
+
+
+class TestReadRouting:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.mark.parametrize(
+        "method, read_only", [("GET", True), ("HEAD", True), ("POST", False)]
+    )
+    def test_session_bind(self, client, method, read_only):
+        """ Queries of GET and HEAD requests use read-only engine. """
+        read_engine = get_read_engine(app, db.engine)
+        assert read_engine is not db.engine
+        with app.test_request_context(method=method):
+            bind = db.session.get_bind()
+            db.session.remove()
+        assert (bind is read_engine) is read_only
+        assert (bind is db.engine) is not read_only
+
+    def test_routing_disabled(self, client):
+        """ Primary engine is used for all requests with READ_ONLY_ENGINE off. """
+        app.config["READ_ONLY_ENGINE"] = False
+        try:
+            with app.test_request_context(method="GET"):
+                assert db.session.get_bind() is db.engine
+                db.session.remove()
+        finally:
+            app.config["READ_ONLY_ENGINE"] = True
+
+    def test_read_engine_rejects_writes(self, client):
+        """ Database is opened read-only by read engine. """
+        with get_read_engine(app, db.engine).connect() as connection:
+            assert connection.execute("SELECT count(*) FROM bookings").scalar() > 0
+            with pytest.raises(OperationalError) as err:
+                connection.execute("DELETE FROM bookings")
+        assert "readonly database" in str(err.value)
+
+    def test_get_sees_committed_booking(self, client):
+        """ Booking added through primary engine is returned by GET. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=5,
+                user_id=1,
+                booked_from="2019-05-12 10:00:00",
+                booked_to="2019-05-12 11:00:00",
+            ),
+        )
+        assert post_response.status_code == 200
+        booking_id = db.session.query(db.func.max(Bookings.id)).scalar()
+        get_response = client.get(f"/bookings?id={booking_id}")
+        assert get_response.status_code == 200
+        assert get_response.json[0]["booked_from"] == "Sun, 12 May 2019 10:00:00 GMT"
+
+    def test_rollback_journal_database(self, client, tmpdir):
+        """ GET requests are served from database not switched to WAL yet. """
+        database_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+        db.session.remove()
+        app.config[
+            "SQLALCHEMY_DATABASE_URI"
+        ] = f"sqlite:///{tmpdir.join('rollback.db')}?check_same_thread=false"
+        try:
+            # database created with SQLite defaults
+            app.config["SQLITE_PRAGMA_PROFILE"] = "default"
+            configure_sqlite_pragmas(app.config)
+            db.create_all()
+            helpers.insert_test_data_into_db_table(Bookings)
+            assert db.engine.execute("PRAGMA journal_mode").scalar() == "delete"
+            app.config["SQLITE_PRAGMA_PROFILE"] = "wal"
+            configure_sqlite_pragmas(app.config)
+            for url in ("/resources", "/users", "/bookings"):
+                assert client.get(url).status_code == 200
+            db.session.remove()
+            db.engine.dispose()
+        finally:
+            app.config["SQLITE_PRAGMA_PROFILE"] = "wal"
+            configure_sqlite_pragmas(app.config)
+            app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.database.models import db, Bookings, Resources, Users
+from src.libs.response_cache import response_cache
+from bookings_api import app
+from tests import helpers
+
+
+class TestResponseCache:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+            helpers.insert_test_data_into_db_table(Users)
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        response_cache.clear()
+        yield
+        app.config["RESPONSE_CACHE_SIZE"] = 256
+        app.config["RESPONSE_CACHE_TTL"] = 30
+
+    def test_cache_hit(self, client):
+        """ Second identical request is served from cache. """
+        first_response = client.get("/users?stream=false&limit=1")
+        second_response = client.get("/users?limit=1&stream=false")
+        assert second_response.status_code == 200
+        assert second_response.json == first_response.json
+        assert second_response.headers["X-Next-Cursor"] == (
+            first_response.headers["X-Next-Cursor"]
+        )
+        assert response_cache.stats() == {
+            "size": 1,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def test_write_invalidates_affected_entries(self, client):
+        """ Write drops only entries reading modified table. """
+        client.get("/users")
+        client.get("/bookings")
+        client.get("/availability?resource-id=1&from=2019-04-10&to=2019-04-10")
+        put_response = client.put(
+            "/bookings", json=dict(id=1, booked_from="2019-04-10 09:30:00")
+        )
+        assert put_response.status_code == 200
+        assert response_cache.stats()["invalidations"] == 2
+        assert response_cache.stats()["size"] == 1
+        get_response = client.get("/bookings?id=1")
+        assert get_response.json[0]["booked_from"] == "Wed, 10 Apr 2019 09:30:00 GMT"
+
+    def test_write_of_other_process_not_served(self, client):
+        """ Slots generated by flask slots generate are not hidden by cache. """
+        assert client.get("/slots?from=2019-06-17").json == []
+        subprocess.run(
+            [sys.executable, "-m", "flask", "slots", "generate"]
+            + ["--from", "2019-06-17", "--to", "2019-06-17"],
+            env=dict(os.environ, FLASK_APP="bookings_api.py", LC_ALL="C.UTF-8"),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        assert len(client.get("/slots?from=2019-06-17").json) == 30 + 8
+        assert response_cache.stats()["hits"] == 0
+        assert response_cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self, client):
+        """ Least recently used entry is evicted above size limit. """
+        app.config["RESPONSE_CACHE_SIZE"] = 2
+        client.get("/users?id=1")
+        client.get("/users?id=2")
+        client.get("/users?id=1")
+        client.get("/users?id=3")
+        stats = response_cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        client.get("/users?id=1")
+        assert response_cache.stats()["hits"] == 2
+
+    def test_expiration(self, client):
+        """ Expired entry is not served. """
+        app.config["RESPONSE_CACHE_TTL"] = 0
+        client.get("/resources")
+        client.get("/resources")
+        stats = response_cache.stats()
+        assert stats["hits"] == 0
+        assert stats["expirations"] == 1
+
+    def test_errors_not_cached(self, client):
+        """ Error responses are not stored. """
+        client.get("/users?limit=abc")
+        assert response_cache.stats()["size"] == 0
+
+    def test_get_cache_stats(self, client):
+        """ Get cache counters from diagnostics endpoint. """
+        client.get("/resources")
+        get_response = client.get("/diagnostics/cache")
+        assert get_response.status_code == 200
+        assert get_response.json["misses"] == 1
+        assert get_response.json["size"] == 1
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,199 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.api.resources import resource_schedules
+from src.database.models import db, Resources
+from src.libs.schedule import Schedule, ScheduleCache
+from src.libs.timeslots import generate_timeslots, parse_opening_windows
+from bookings_api import app
+from tests import helpers
+
+
+class TestSchedule:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    @pytest.fixture
+    def opening_hours_check(self):
+        app.config["BOOKINGS_WITHIN_OPENING_HOURS"] = True
+        yield
+        app.config["BOOKINGS_WITHIN_OPENING_HOURS"] = False
+
+    def test_is_open_at(self):
+        """ Check opening hours of weekdays with break and closed weekend. """
+        windows = parse_opening_windows("08:00-12:00-12:30-16:00")
+        schedule = Schedule([windows] * 5 + [[], []], 15)
+        assert schedule.is_open_at(datetime(2019, 6, 17, 8, 0))
+        assert schedule.is_open_at(datetime(2019, 6, 17, 11, 59, 59))
+        assert not schedule.is_open_at(datetime(2019, 6, 17, 7, 59))
+        assert not schedule.is_open_at(datetime(2019, 6, 17, 12, 0))
+        assert schedule.is_open_at(datetime(2019, 6, 21, 15, 45))
+        assert not schedule.is_open_at(datetime(2019, 6, 21, 16, 0))
+        assert not schedule.is_open_at(datetime(2019, 6, 22, 10, 0))
+        assert not schedule.is_open_at(datetime(2019, 6, 23, 23, 59))
+
+    def test_is_open_between(self):
+        """ Range has to fit in single opening window. """
+        windows = parse_opening_windows("08:00-12:00-12:30-16:00")
+        schedule = Schedule([windows] * 7, 15)
+        monday = datetime(2019, 6, 17)
+        assert schedule.is_open_between(
+            monday + timedelta(hours=8), monday + timedelta(hours=12)
+        )
+        assert not schedule.is_open_between(
+            monday + timedelta(hours=11), monday + timedelta(hours=13)
+        )
+        assert not schedule.is_open_between(
+            monday + timedelta(hours=15), monday + timedelta(hours=16, seconds=1)
+        )
+        assert not schedule.is_open_between(
+            monday + timedelta(hours=10), monday + timedelta(hours=10)
+        )
+
+    def test_timeslots_match_generate_timeslots(self):
+        """ Compiled schedule generates the same slots as plain generation. """
+        windows = parse_opening_windows("08:00-12:00-12:30-16:00")
+        weekly_windows = [windows] * 5 + [[], []]
+        days = [date(2019, 6, 17) + timedelta(days=number) for number in range(14)]
+        starts, ends = Schedule(weekly_windows, 30).timeslots(days)
+        expected_starts, expected_ends = generate_timeslots(days, weekly_windows, 30)
+        assert starts.tolist() == expected_starts.tolist()
+        assert ends.tolist() == expected_ends.tolist()
+
+    def test_schedule_without_intervals(self):
+        """ Resource without intervals has opening hours, but no slots. """
+        windows = parse_opening_windows("08:00-16:00")
+        schedule = Schedule([windows] * 7, None)
+        starts, ends = schedule.timeslots([date(2019, 6, 17)])
+        assert schedule.is_open_at(datetime(2019, 6, 17, 9, 0))
+        assert len(starts) == len(ends) == 0
+
+    def test_cache_compiles_once(self):
+        """ Schedule is compiled on first use and kept until invalidated. """
+        loaded = list()
+
+        def loader(resource_id):
+            loaded.append(resource_id)
+            if resource_id == 1:
+                return Resources(intervals="15", opening_hours_mon="08:00-16:00")
+            return None
+
+        cache = ScheduleCache(loader)
+        schedule = cache.get(1)
+        assert cache.get(1) is schedule
+        assert cache.get(2) is None
+        cache.invalidate(1)
+        assert cache.get(1) is not schedule
+        assert loaded == [1, 2, 1]
+
+    def test_cache_invalidated_on_resource_update(self, client):
+        """ Updating resource drops its compiled schedule. """
+        schedule = resource_schedules.get(3)
+        assert resource_schedules.get(3) is schedule
+        resource = Resources.query.get(3)
+        resource.opening_hours_sat = "10:00-12:00"
+        db.session.commit()
+        updated_schedule = resource_schedules.get(3)
+        assert updated_schedule is not schedule
+        assert not updated_schedule.is_open_at(datetime(2019, 6, 22, 9, 0))
+        assert updated_schedule.is_open_at(datetime(2019, 6, 22, 10, 0))
+
+    def test_cache_invalidated_after_commit(self, client):
+        """ Schedule compiled between flush and commit of resource update is
+            dropped by the commit. """
+        schedule = resource_schedules.get(2)
+        writer = Session(bind=db.engine)
+        try:
+            resource = writer.query(Resources).get(2)
+            resource.opening_hours_sat = "10:00-12:00"
+            writer.flush()
+            # concurrent request compiles schedule from the committed row
+            assert resource_schedules.get(2) is schedule
+            writer.commit()
+        finally:
+            writer.close()
+        updated_schedule = resource_schedules.get(2)
+        assert updated_schedule is not schedule
+        assert updated_schedule.is_open_at(datetime(2019, 6, 22, 10, 0))
+
+    def test_cache_kept_after_rollback(self, client):
+        """ Rolled back resource update keeps compiled schedule. """
+        schedule = resource_schedules.get(1)
+        resource = Resources.query.get(1)
+        resource.opening_hours_sat = "10:00-12:00"
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert resource_schedules.get(1) is schedule
+
+    def test_add_booking_within_opening_hours(self, client, opening_hours_check):
+        """ Add booking fitting in resource opening hours. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from="2019-06-17 12:30:00",
+                booked_to="2019-06-17 13:30:00",
+            ),
+        )
+        assert post_response.status_code == 200
+
+    def test_add_booking_outside_opening_hours(self, client, opening_hours_check):
+        """ Try to add booking overlapping resource break. """
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from="2019-06-17 11:30:00",
+                booked_to="2019-06-17 12:30:00",
+            ),
+        )
+        assert post_response.status_code == 406
+        assert (
+            post_response.json["errors"]
+            == "Booking is outside of resource opening hours"
+        )
+
+    def test_add_booking_of_missing_resource(self, client, opening_hours_check):
+        """ Try to add booking of not existing resource. """
+        post_response = client.post(
+            "/bookings/batch",
+            json=dict(
+                bookings=[
+                    dict(
+                        resource_id=10,
+                        user_id=1,
+                        booked_from="2019-06-17 08:00:00",
+                        booked_to="2019-06-17 09:00:00",
+                    )
+                ]
+            ),
+        )
+        assert post_response.status_code == 406
+        assert post_response.json["errors"][0]["errors"] == [
+            "Resource with given ID: 10 was not found"
+        ]
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
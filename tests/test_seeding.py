@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from src.database.models import db, Bookings, Resources, Slots, Users
+from src.database.seeding import SEED_START, booking_chunks, seed_database
+from bookings_api import app
+
+
+class TestSeeding:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            cls.report = seed_database(
+                db.engine, 20, 50, 1000, slot_days=2, seed=7, chunk_size=64
+            )
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_seeded_rows(self, client):
+        """ Insert requested number of rows into every table. """
+        assert self.report["resources"] == Resources.query.count() == 20
+        assert self.report["users"] == Users.query.count() == 50
+        assert self.report["bookings"] == Bookings.query.count() == 1000
+        assert self.report["slots"] == Slots.query.count() > 0
+
+    def test_bookings_do_not_overlap(self, client):
+        """ Bookings of the same resource never overlap. """
+        overlapping = db.session.execute(
+            "SELECT count(*) FROM bookings a JOIN bookings b "
+            "ON a.resource_id = b.resource_id AND a.id < b.id "
+            "AND a.booked_from < b.booked_to AND b.booked_from < a.booked_to"
+        ).scalar()
+        assert overlapping == 0
+        post_response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from=str(SEED_START),
+                booked_to=str(SEED_START.replace(hour=23)),
+            ),
+        )
+        assert post_response.status_code == 409
+
+    def test_seeded_rows_served(self, client):
+        """ Seeded rows are read back by endpoints. """
+        get_response = client.get("/bookings?resource-id=3&limit=2")
+        assert get_response.status_code == 200
+        assert [booking["resource_id"] for booking in get_response.json] == [3, 3]
+        get_response = client.get("/resources?limit=20")
+        hours = {resource["opening_hours_mon"] for resource in get_response.json}
+        assert len(hours) > 1
+
+    def test_indexes_recreated(self, client):
+        """ Indexes dropped for loading are created again. """
+        indexes = {row[1] for row in db.session.execute("PRAGMA index_list(bookings)")}
+        assert {index.name for index in Bookings.__table__.indexes} <= indexes
+
+    def test_deterministic(self):
+        """ The same seed gives the same rows, other seed other rows. """
+
+        def generate(seed):
+            rng = np.random.RandomState(seed)
+            return [
+                row
+                for chunk in booking_chunks(100, 7, 10, rng, SEED_START, 20)
+                for row in chunk
+            ]
+
+        assert generate(1) == generate(1)
+        assert generate(1) != generate(2)
+        assert len(generate(1)) == 100
+
+    def test_seed_command(self, client):
+        """ Recreate database with flask seed command. """
+        runner = app.test_cli_runner()
+        result = runner.invoke(
+            args=[
+                "seed",
+                "--yes",
+                "--resources",
+                "3",
+                "--users",
+                "4",
+                "--bookings",
+                "9",
+            ]
+        )
+        assert result.exit_code == 0, result.output
+        db.session.remove()
+        assert Resources.query.count() == 3
+        assert Users.query.count() == 4
+        assert Bookings.query.count() == 9
+        applied = client.get("/diagnostics/sqlite").json["applied"]
+        assert applied["journal_mode"] == "wal"
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from werkzeug.http import http_date
+
+from src.database.models import Users
+from src.libs.serialization import RowSerializer, http_datetime, iso_datetime
+
+
+class TestSerialization:
+    def test_http_datetime(self):
+        """ Encode datetimes the same way as Flask JSON encoder. """
+        moment = datetime(2019, 1, 1, 0, 0, 5)
+        for number in range(400):
+            value = moment + timedelta(days=number, hours=number % 24)
+            assert http_datetime(value) == http_date(value)
+
+    def test_row_to_dict(self):
+        """ Map row tuple to dictionary, keep None values. """
+        serializer = RowSerializer(
+            [
+                ("id", Users.id, None),
+                ("created_at", Users.created_at, iso_datetime),
+                ("updated_at", Users.updated_at, iso_datetime),
+            ]
+        )
+        assert serializer.to_dict((1, datetime(2019, 4, 10, 10, 0), None)) == {
+            "id": 1,
+            "created_at": "2019-04-10 10:00:00",
+            "updated_at": None,
+        }
+        assert [column.name for column in serializer.select().columns] == [
+            "id",
+            "created_at",
+            "updated_at",
+        ]
@@ -0,0 +1,184 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.database.models import db
+from src.libs.slot_capacity import reserve_slots
+from bookings_api import app
+from tests import helpers
+
+
+def booking(resource_id, booked_from, booked_to):
+    return dict(
+        resource_id=resource_id, user_id=1, booked_from=booked_from, booked_to=booked_to
+    )
+
+
+class TestSlotCapacity:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_booking_takes_overlapped_slots(self, client):
+        slot_ids = helpers.insert_slots(1, datetime(2030, 1, 7, 10, 0), 3)
+        response = client.post(
+            "/bookings", json=booking(1, "2030-01-07 10:15:00", "2030-01-07 10:45:00")
+        )
+        assert response.status_code == 200
+        assert helpers.free_places(slot_ids) == [0, 0, 1]
+
+    def test_full_slot_rejected(self, client):
+        """ Booking not overlapping other bookings, but in full slot. """
+        slot_ids = helpers.insert_slots(1, datetime(2030, 1, 8, 10, 0), 2)
+        response = client.post(
+            "/bookings", json=booking(1, "2030-01-08 10:00:00", "2030-01-08 10:15:00")
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/bookings", json=booking(1, "2030-01-08 10:15:00", "2030-01-08 10:45:00")
+        )
+        assert response.status_code == 409
+        assert response.json["message"] == "Slot fully booked"
+        # slots are taken all or none
+        assert helpers.free_places(slot_ids) == [0, 1]
+        bookings = client.get("/bookings?resource-id=1").json
+        assert "Tue, 08 Jan 2030 10:15:00 GMT" not in [
+            row["booked_from"] for row in bookings
+        ]
+
+    def test_delete_gives_places_back(self, client):
+        slot_ids = helpers.insert_slots(2, datetime(2030, 1, 9, 10, 0), 2)
+        client.post(
+            "/bookings", json=booking(2, "2030-01-09 10:00:00", "2030-01-09 11:00:00")
+        )
+        assert helpers.free_places(slot_ids) == [0, 0]
+        booking_id = client.get("/bookings?resource-id=2").json[-1]["id"]
+        assert client.delete(f"/bookings?id={booking_id}").status_code == 200
+        assert helpers.free_places(slot_ids) == [1, 1]
+
+    def test_update_moves_places(self, client):
+        slot_ids = helpers.insert_slots(3, datetime(2030, 1, 10, 10, 0), 4)
+        client.post(
+            "/bookings", json=booking(3, "2030-01-10 10:00:00", "2030-01-10 10:30:00")
+        )
+        booking_id = client.get("/bookings?resource-id=3").json[-1]["id"]
+        response = client.put(
+            "/bookings",
+            json=dict(
+                id=booking_id,
+                booked_from="2030-01-10 11:00:00",
+                booked_to="2030-01-10 11:30:00",
+            ),
+        )
+        assert response.status_code == 200
+        assert helpers.free_places(slot_ids) == [1, 1, 0, 1]
+
+    def test_update_into_full_slot_rejected(self, client):
+        slot_ids = helpers.insert_slots(4, datetime(2030, 1, 11, 10, 0), 2)
+        client.post(
+            "/bookings", json=booking(4, "2030-01-11 10:00:00", "2030-01-11 10:15:00")
+        )
+        client.post(
+            "/bookings", json=booking(4, "2030-01-11 10:30:00", "2030-01-11 10:45:00")
+        )
+        booking_id = client.get("/bookings?resource-id=4").json[-1]["id"]
+        response = client.put(
+            "/bookings",
+            json=dict(
+                id=booking_id,
+                booked_from="2030-01-11 10:15:00",
+                booked_to="2030-01-11 10:30:00",
+            ),
+        )
+        assert response.status_code == 409
+        assert helpers.free_places(slot_ids) == [0, 0]
+        row = client.get(f"/bookings?id={booking_id}").json[0]
+        assert row["booked_from"] == "Fri, 11 Jan 2030 10:30:00 GMT"
+
+    def test_batch_best_effort_skips_full_slot(self, client):
+        slot_ids = helpers.insert_slots(5, datetime(2030, 1, 14, 10, 0), 2)
+        response = client.post(
+            "/bookings/batch",
+            json=dict(
+                mode="best-effort",
+                bookings=[
+                    booking(5, "2030-01-14 10:00:00", "2030-01-14 10:15:00"),
+                    booking(5, "2030-01-14 10:15:00", "2030-01-14 10:30:00"),
+                    booking(5, "2030-01-14 10:30:00", "2030-01-14 11:00:00"),
+                ],
+            ),
+        )
+        assert response.status_code == 200
+        assert response.json["message"] == "2 of 3 bookings added"
+        assert [result["status"] for result in response.json["results"]] == [
+            200,
+            409,
+            200,
+        ]
+        assert helpers.free_places(slot_ids) == [0, 0]
+
+    def test_batch_all_or_nothing_rolls_back_places(self, client):
+        slot_ids = helpers.insert_slots(6, datetime(2030, 1, 15, 10, 0), 2)
+        response = client.post(
+            "/bookings/batch",
+            json=dict(
+                bookings=[
+                    booking(6, "2030-01-15 10:30:00", "2030-01-15 11:00:00"),
+                    booking(6, "2030-01-15 10:00:00", "2030-01-15 10:15:00"),
+                    booking(6, "2030-01-15 10:15:00", "2030-01-15 10:30:00"),
+                ]
+            ),
+        )
+        assert response.status_code == 409
+        assert response.json["message"] == "Booking conflict"
+        assert response.json["errors"][2]["status"] == 409
+        assert helpers.free_places(slot_ids) == [1, 1]
+
+    def test_concurrent_reservations_exact(self, client):
+        """ Concurrent transactions never take more places than slot has. """
+        start = datetime(2030, 1, 16, 10, 0)
+        slot_ids = helpers.insert_slots(7, start, 2, free=3)
+        barrier = threading.Barrier(10)
+        results = list()
+        engine = db.engine
+
+        def reserve():
+            session = Session(bind=engine)
+            try:
+                barrier.wait()
+                reserved = reserve_slots(
+                    session, 7, start, start + timedelta(minutes=60)
+                )
+                session.commit()
+                results.append(reserved)
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=reserve) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 10
+        assert results.count(True) == 3
+        assert helpers.free_places(slot_ids) == [0, 0]
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
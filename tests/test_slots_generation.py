@@ -0,0 +1,242 @@
+import threading
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.cron import add_slots_every_day
+from src.cron.add_slots_every_day import (
+    ResourceHours,
+    build_slot_rows,
+    format_timing_report,
+    generate_missing_slots,
+    generate_slot_rows,
+    plan_generation,
+)
+from src.database.models import db, Bookings, Resources, Slots, SlotsWatermarks
+from src.libs.slot_capacity import reserve_slots
+from bookings_api import app
+from tests import helpers
+
+MONDAY = date(2019, 6, 17)
+SUNDAY = date(2019, 6, 23)
+
+
+class TestSlotsGeneration:
+    @classmethod
+    def setup_class(cls):
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Resources)
+
+    @pytest.fixture(scope="module")
+    def context(self):
+        ctx = app.app_context()
+        ctx.push()
+        yield ctx
+        ctx.pop()
+
+    def test_build_slot_rows_with_break(self):
+        """ Generate slots of resource with a break in opening hours. """
+        resource = ResourceHours(1, "15", "08:00-12:00-12:30-16:00", *[None] * 6)
+        slot_rows = build_slot_rows(resource, MONDAY, MONDAY)
+        assert slot_rows[0]["timestamp"] == datetime(2019, 6, 17, 8, 0)
+        assert slot_rows[0]["timestamp_end"] == datetime(2019, 6, 17, 8, 15)
+        assert slot_rows[0]["formatted_timestamp"] == "Monday, June, 17, 2019, 08:00 AM"
+        assert {row["maximum_capacity"] for row in slot_rows} == {1}
+        starts = [row["timestamp"].strftime("%H:%M") for row in slot_rows]
+        assert len(slot_rows) == 30
+        assert starts[15:17] == ["11:45", "12:30"]
+        assert starts[-1] == "15:45"
+        assert slot_rows[-1]["timestamp_end"] == datetime(2019, 6, 17, 16, 0)
+        assert {row["free"] for row in slot_rows} == {1}
+        assert {row["resource_id"] for row in slot_rows} == {1}
+        assert {row["available_resources"] for row in slot_rows} == {"1"}
+
+    def test_build_slot_rows_single_window(self):
+        """ Generate slots of resource opened in one time window. """
+        resource = ResourceHours(1, "30", "08:00-12:00", *[None] * 6)
+        slot_rows = build_slot_rows(resource, MONDAY, MONDAY)
+        assert len(slot_rows) == 8
+        assert slot_rows[-1]["timestamp"] == datetime(2019, 6, 17, 11, 30)
+        assert slot_rows[-1]["formatted_timestamp_end"] == (
+            "Monday, June, 17, 2019, 12:00 PM"
+        )
+
+    def test_build_slot_rows_for_whole_week(self):
+        """ Generate slots of many days in one call. """
+        resource = ResourceHours(1, "60", *["08:00-10:00"] * 5, None, "")
+        slot_rows = build_slot_rows(resource, MONDAY, SUNDAY)
+        assert len(slot_rows) == 10
+        assert slot_rows[-1]["timestamp"] == datetime(2019, 6, 21, 9, 0)
+
+    def test_build_slot_rows_closed_day(self):
+        """ Resource closed on given day has no slots. """
+        resource = ResourceHours(1, "15", "08:00-12:00", *[None] * 5, "")
+        assert build_slot_rows(resource, SUNDAY, SUNDAY) == []
+
+    def test_generate_slot_rows_in_parallel(self):
+        """ Parallel generation should give the same rows as serial one. """
+        tasks = [
+            (
+                ResourceHours(
+                    number, str(15 * (1 + number % 4)), *["08:00-12:00-13:00-17:00"] * 7
+                ),
+                MONDAY,
+                MONDAY,
+            )
+            for number in range(10)
+        ]
+        serial_rows = generate_slot_rows(tasks, workers=1)
+        parallel_rows = generate_slot_rows(tasks, workers=3)
+        assert len(serial_rows) == 180
+        assert parallel_rows == serial_rows
+
+    def test_plan_generation(self):
+        """ Only days after watermark should be generated. """
+        resources = [ResourceHours(number, "15", *[None] * 7) for number in (1, 2, 3)]
+        watermarks = {1: date(2019, 6, 20), 2: date(2019, 6, 30)}
+        tasks, new_watermarks = plan_generation(
+            resources, watermarks, MONDAY, date(2019, 6, 25)
+        )
+        assert [(task[0].id, task[1], task[2]) for task in tasks] == [
+            (1, date(2019, 6, 21), date(2019, 6, 25)),
+            (3, MONDAY, date(2019, 6, 25)),
+        ]
+        assert new_watermarks == {1: date(2019, 6, 25), 3: date(2019, 6, 25)}
+
+    def test_generate_missing_slots(self, context):
+        """ Generate slots of all resources, second run is a no-op. """
+        report = generate_missing_slots(db.engine, MONDAY, SUNDAY)
+        # Sample Resource: 5 days * 30 slots, Johnny Bravo: 6 days * 8 slots,
+        # Adam Malysz: 2 days * 8 slots
+        assert report["slots"] == 150 + 48 + 16
+        assert Slots.query.count() == 214
+        assert {
+            watermark.generated_through for watermark in SlotsWatermarks.query.all()
+        } == {SUNDAY}
+        report = generate_missing_slots(db.engine, MONDAY, SUNDAY)
+        assert report["resources"] == 0
+        assert report["slots"] == 0
+        report = generate_missing_slots(db.engine, MONDAY, SUNDAY, force=True)
+        assert report["resources"] == 3
+        assert report["slots"] == 0
+        assert Slots.query.count() == 214
+
+    def test_generate_slots_command(self, context):
+        """ Catch up slots of the next day with flask slots generate. """
+        runner = app.test_cli_runner()
+        result = runner.invoke(
+            args=["slots", "generate", "--from", "2019-06-17", "--to", "2019-06-24"]
+        )
+        assert result.exit_code == 0
+        # only Monday 24th is missing: Sample Resource 30, Johnny Bravo 8 slots
+        assert Slots.query.count() == 214 + 38
+        assert Slots.query.filter_by(resource_id=2).order_by(
+            Slots.timestamp.desc()
+        ).first().timestamp == datetime(2019, 6, 24, 11, 30)
+
+    def test_generated_slots_count_bookings(self, context):
+        """ Slots generated after booking and hold take their places, deleting
+            them gives back exactly those places. """
+        client = app.test_client()
+        response = client.post(
+            "/bookings",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                booked_from="2019-07-01 10:00:00",
+                booked_to="2019-07-01 10:30:00",
+            ),
+        )
+        assert response.status_code == 200
+        booking_id = client.get("/bookings?resource-id=1").json[-1]["id"]
+        response = client.post(
+            "/holds",
+            json=dict(
+                resource_id=1,
+                user_id=1,
+                held_from="2019-07-01 11:00:00",
+                held_to="2019-07-01 11:15:00",
+            ),
+        )
+        assert response.status_code == 200
+        hold_id = response.json["id"]
+        generate_missing_slots(db.engine, date(2019, 7, 1), date(2019, 7, 1))
+
+        def free_places():
+            db.session.remove()
+            slots = Slots.query.filter(
+                Slots.resource_id == 1,
+                Slots.timestamp >= datetime(2019, 7, 1, 10, 0),
+                Slots.timestamp < datetime(2019, 7, 1, 11, 30),
+            ).order_by(Slots.timestamp)
+            return [(slot.free, slot.maximum_capacity) for slot in slots]
+
+        assert free_places() == [(0, 1), (0, 1), (1, 1), (1, 1), (0, 1), (1, 1)]
+        assert client.delete(f"/bookings?id={booking_id}").status_code == 200
+        assert client.delete(f"/holds?id={hold_id}").status_code == 200
+        assert free_places() == [(1, 1)] * 6
+
+    def test_booking_committed_during_generation(self, context, monkeypatch):
+        """ Booking written while slots are generated waits for generation
+            and takes its place in generated slots. """
+        engine = db.engine
+        booked_from = datetime(2019, 7, 8, 10, 0)
+        booked_to = datetime(2019, 7, 8, 10, 15)
+        read_periods = add_slots_every_day.reserved_periods
+
+        def add_booking():
+            session = Session(bind=engine)
+            try:
+                assert reserve_slots(session, 1, booked_from, booked_to)
+                session.add(
+                    Bookings(
+                        resource_id=1,
+                        user_id=1,
+                        booked_from=booked_from,
+                        booked_to=booked_to,
+                    )
+                )
+                session.commit()
+            finally:
+                session.close()
+
+        booking_thread = threading.Thread(target=add_booking)
+
+        def reserved_periods(connection, start, end):
+            periods = read_periods(connection, start, end)
+            # booking committed between reading periods and inserting slots
+            booking_thread.start()
+            booking_thread.join(0.5)
+            return periods
+
+        monkeypatch.setattr(add_slots_every_day, "reserved_periods", reserved_periods)
+        generate_missing_slots(engine, date(2019, 7, 8), date(2019, 7, 8))
+        booking_thread.join()
+        db.session.remove()
+        slot = Slots.query.filter_by(resource_id=1, timestamp=booked_from).one()
+        assert slot.free == 0
+
+    def test_format_timing_report(self):
+        """ Format slots generation timing report. """
+        report = dict(
+            workers=1,
+            resources=2,
+            slots=40,
+            generation_time=0.0123,
+            insert_time=0.0046,
+            total_time=0.0168,
+        )
+        assert format_timing_report(report) == (
+            "Generated 40 slots for 2 resources in 0.017s using 1 worker(s) "
+            "(generation: 0.012s, insert: 0.005s)"
+        )
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
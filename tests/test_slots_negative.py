@@ -0,0 +1,53 @@
+import pytest
+
+from src.database.models import db, Slots
+from bookings_api import app
+from tests import helpers
+
+
+class TestSlotsNegative:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Slots)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_get_slots_with_json(self, client):
+        """ Try to filter GET results with JSON body. """
+        response = client.get("/slots", json=dict(id=1))
+        assert response.status_code == 406
+        assert response.json["errors"] == "JSON body is not accepted in this endpoint"
+        assert response.json["success"] is False
+
+    def test_get_slots_by_improper_date(self, client):
+        """ Filter slots using date in unsupported format. """
+        response = client.get("/slots?from=12.03.2018")
+        assert response.status_code == 406
+        assert response.json["message"] == "Invalid input"
+        assert response.json["success"] is False
+        assert (
+            response.json["errors"] == "Dates should be provided in YYYY-MM-DD format"
+        )
+
+    def test_get_slots_by_date_without_slots(self, client):
+        """ Filter slots by day without any slots. """
+        response = client.get("/slots?from=2018-03-13")
+        assert response.status_code == 200
+        assert response.json == []
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
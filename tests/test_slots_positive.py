@@ -156,6 +156,40 @@ class TestSlotsPositive:
         assert response.status_code == 200
         assert response.json == exp_json
 
+    def test_get_slots_page_by_page(self, client):
+        """ Walk through all slots using limit and after cursor. """
+        slot_ids = list()
+        url = "/slots?limit=4"
+        while url is not None:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.json) <= 4
+            slot_ids.extend(slot["id"] for slot in response.json)
+            cursor = response.headers.get("X-Next-Cursor")
+            url = f"/slots?limit=4&after={cursor}" if cursor else None
+        assert slot_ids == [1, 2, 3, 4, 5, 6]
+
+    def test_get_slots_page_with_same_timestamp(self, client):
+        """ Slots with the same timestamp should be split between pages. """
+        first_page = client.get("/slots?limit=1")
+        assert [slot["id"] for slot in first_page.json] == [1]
+        cursor = first_page.headers["X-Next-Cursor"]
+        second_page = client.get(f"/slots?limit=1&after={cursor}")
+        assert [slot["id"] for slot in second_page.json] == [2]
+
+    def test_stream_all_slots(self, client):
+        """ Streamed response should contain the same slots as regular one. """
+        response = client.get("/slots?stream=true")
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.json == client.get("/slots").json
+
+    def test_stream_slots_by_date_range(self, client):
+        """ Stream slots filtered by date range. """
+        response = client.get("/slots?from=2018-04-01&to=2018-06-01&stream=1")
+        assert response.status_code == 200
+        assert [slot["id"] for slot in response.json] == [5, 6]
+
     @classmethod
     def teardown_class(cls):
         with app.app_context():
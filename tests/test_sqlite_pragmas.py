@@ -0,0 +1,87 @@
+import pytest
+
+from src.database.db_config import configure_sqlite_pragmas
+from src.database.models import db, Bookings
+from bookings_api import app
+from tests import helpers
+
+
+class TestSqlitePragmas:
+    @classmethod
+    def setup_class(cls):
+        cls.url_root = "http://127.0.0.1:5000/"
+        with app.app_context():
+            db.create_all()
+            app.logger.info("Database initialized")
+            helpers.insert_test_data_into_db_table(Bookings)
+
+    @pytest.fixture(scope="module")
+    def client(self):
+        testing_client = app.test_client()
+        ctx = app.app_context()
+        ctx.push()
+        yield testing_client
+        ctx.pop()
+
+    def test_get_applied_pragmas(self, client):
+        """ Get PRAGMAs of default WAL profile. """
+        get_response = client.get("/diagnostics/sqlite")
+        assert get_response.status_code == 200
+        assert get_response.json["profile"] == "wal"
+        assert get_response.json["applied"] == {
+            "busy_timeout": 5000,
+            "journal_mode": "wal",
+            "synchronous": 1,
+            "cache_size": -65536,
+            "mmap_size": 268435456,
+            "temp_store": 2,
+            "foreign_keys": 0,
+        }
+
+    def test_reader_does_not_block_writer(self, client):
+        """ Booking is added while other connection is reading bookings. """
+        reader = db.engine.connect()
+        try:
+            result = reader.execute("SELECT id FROM bookings")
+            assert result.fetchone() is not None
+            post_response = client.post(
+                "/bookings",
+                json=dict(
+                    resource_id=5,
+                    user_id=1,
+                    booked_from="2019-05-10 10:00:00",
+                    booked_to="2019-05-10 11:00:00",
+                ),
+            )
+            assert post_response.status_code == 200
+            result.close()
+        finally:
+            reader.close()
+
+    @pytest.mark.parametrize(
+        "overrides, error",
+        [
+            (dict(SQLITE_PRAGMA_PROFILE="fast"), "Unknown SQLite PRAGMA profile: fast"),
+            (
+                dict(SQLITE_PRAGMAS=dict(page_size=4096)),
+                "Unsupported SQLite PRAGMA: page_size",
+            ),
+            (
+                dict(SQLITE_PRAGMAS=dict(journal_mode="WAL; DROP TABLE x")),
+                "Improper value of SQLite PRAGMA journal_mode: WAL; DROP TABLE x",
+            ),
+        ],
+    )
+    def test_improper_configuration(self, overrides, error):
+        """ Reject unknown profiles, PRAGMAs and values. """
+        config = dict(app.config, **overrides)
+        with pytest.raises(ValueError) as err:
+            configure_sqlite_pragmas(config)
+        assert str(err.value) == error
+
+    @classmethod
+    def teardown_class(cls):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            app.logger.info("Database dropped")
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.libs.timeslots import (
+    format_timestamps,
+    generate_timeslots,
+    parse_opening_windows,
+)
+
+
+class TestTimeslots:
+    def test_parse_opening_windows(self):
+        """ Parse opening hours with any number of windows. """
+        assert parse_opening_windows("08:00-12:00") == [(480, 720)]
+        assert parse_opening_windows("08:00-10:00-11:00-13:00-14:30-18:00") == [
+            (480, 600),
+            (660, 780),
+            (870, 1080),
+        ]
+        assert parse_opening_windows("") == []
+        assert parse_opening_windows(None) == []
+
+    def test_generate_timeslots_many_days_and_windows(self):
+        """ Generate slots of whole week for three opening windows. """
+        windows = parse_opening_windows("08:00-09:00-10:00-11:00-12:00-12:30")
+        weekly_windows = [windows] * 5 + [[], []]
+        days = [date(2019, 6, 17) + timedelta(days=number) for number in range(7)]
+        starts, ends = generate_timeslots(days, weekly_windows, 30)
+        assert len(starts) == 5 * 5
+        assert starts[:5].tolist() == [
+            datetime(2019, 6, 17, 8, 0),
+            datetime(2019, 6, 17, 8, 30),
+            datetime(2019, 6, 17, 10, 0),
+            datetime(2019, 6, 17, 10, 30),
+            datetime(2019, 6, 17, 12, 0),
+        ]
+        assert starts[-1].tolist() == datetime(2019, 6, 21, 12, 0)
+        assert (ends - starts == np.timedelta64(30, "m")).all()
+
+    def test_breaks_and_closing_hours_have_no_slots(self):
+        """ Slots are generated within opening windows only. """
+        windows = parse_opening_windows("08:00-09:00-09:30-10:00")
+        starts, ends = generate_timeslots([date(2019, 6, 17)], [windows] * 7, 15)
+        assert [start.strftime("%H:%M") for start in starts.tolist()] == [
+            "08:00",
+            "08:15",
+            "08:30",
+            "08:45",
+            "09:30",
+            "09:45",
+        ]
+        assert ends[-1].tolist() == datetime(2019, 6, 17, 10, 0)
+
+    def test_generate_timeslots_without_opening_hours(self):
+        """ Closed resource has no slots. """
+        starts, ends = generate_timeslots([date(2019, 6, 17)], [[]] * 7, 15)
+        assert len(starts) == 0
+        assert len(ends) == 0
+
+    def test_format_timestamps(self):
+        """ Batch formatting should match datetime.strftime. """
+        timestamps = [
+            datetime(2019, 6, 17, 8, 0),
+            datetime(2019, 6, 17, 13, 45),
+            datetime(2019, 6, 18, 8, 0),
+        ]
+        formatted = format_timestamps(np.array(timestamps, dtype="datetime64[m]"))
+        assert formatted == [
+            timestamp.strftime("%A, %B, %d, %Y, %H:%M %p") for timestamp in timestamps
+        ]
@@ -141,6 +141,17 @@ class TestUsersPositive:
         assert get_response.json == []
         assert get_response.status_code == 200
 
+    def test_get_users_page(self, client):
+        """ Get users page by page using limit and after cursor. """
+        first_page = client.get("/users?limit=2")
+        assert first_page.status_code == 200
+        assert [user["id"] for user in first_page.json] == [1, 2]
+        cursor = first_page.headers["X-Next-Cursor"]
+        second_page = client.get(f"/users?limit=2&after={cursor}")
+        assert second_page.status_code == 200
+        assert [user["id"] for user in second_page.json] == [3]
+        assert "X-Next-Cursor" not in second_page.headers
+
     @classmethod
     def teardown_class(cls):
         with app.app_context():
@@ -0,0 +1,60 @@
+import pytest
+from jsonschema import Draft4Validator
+
+from src.api import bookings, resources, users
+from src.libs.validation import compile_check, compile_schema
+
+SCHEMAS = [
+    bookings.post_schema,
+    bookings.put_schema,
+    bookings.batch_schema,
+    resources.post_schema,
+    resources.put_schema,
+    users.post_schema,
+    users.put_schema,
+]
+
+VALUES = [
+    dict(
+        resource_id=1,
+        user_id=2,
+        booked_from="2019-04-10 10:00:00",
+        booked_to="2019-04-10 10:15:00",
+        notes="note",
+    ),
+    dict(resource_id=True, user_id="2", booked_from=1),
+    dict(id=1, active=False),
+    dict(id=1, active="yes"),
+    dict(title="Sample", active=True),
+    dict(name="Jan", email="jan@gmail.com", phonenumber="123"),
+    dict(id=1, email=5),
+    dict(bookings=[dict(resource_id=1)], mode="best-effort"),
+    dict(bookings=[], mode="unknown"),
+    dict(bookings=[1]),
+    [],
+    None,
+    "text",
+]
+
+
+class TestValidation:
+    @pytest.mark.parametrize("schema", SCHEMAS)
+    def test_schemas_are_compiled(self, schema):
+        """ All endpoint schemas are supported by compiler. """
+        assert compile_check(schema) is not None
+
+    @pytest.mark.parametrize("schema", SCHEMAS)
+    @pytest.mark.parametrize("value", VALUES)
+    def test_same_errors_as_draft4(self, schema, value):
+        """ Compiled schema reports the same errors as Draft4Validator. """
+        expected = [
+            error.message for error in Draft4Validator(schema).iter_errors(value)
+        ]
+        assert compile_schema(schema)(value) == expected
+
+    def test_unsupported_keyword(self):
+        """ Schema with unsupported keyword falls back to Draft4Validator. """
+        schema = {"type": "integer", "maximum": 5}
+        assert compile_check(schema) is None
+        assert compile_schema(schema)(4) == []
+        assert compile_schema(schema)(6) == ["6 is greater than the maximum of 5"]